@@ -18,6 +18,10 @@
 RETRIES = 3
 TIMEOUT = 1
 WAIT = 10
+HTTP_POOL_CONNECTIONS = 10  # hosts to keep connections to
+# Connections per host. Concurrent requests sent through one session beyond this number open
+# connections which are discarded afterwards, so keep it not less than the configured concurrency.
+HTTP_POOL_MAXSIZE = 20
 
 FIRST_STORED_RECORD_INDEX = 0
 
@@ -32,7 +36,13 @@ SURROGATE_KEYS_PATHS = [
 ]
 
 SEARCH_ID_BATCH_SIZE = 25
+SCHEMA_PREFETCH_WORKERS = 10
+SCHEMA_CACHE_TTL = 24 * 60 * 60  # seconds
+SCHEMA_VALIDATION_FULL_ERROR_MODE = "full"
+SCHEMA_VALIDATION_FIRST_ERROR_MODE = "first_error"
+MAX_LOGGED_VALIDATION_ERRORS = 100
 SAVE_RECORDS_BATCH_SIZE = 500
+ENTITY_ID_CACHE_SIZE = 2 ** 16
 
 
 DATA_SECTION = "Data"
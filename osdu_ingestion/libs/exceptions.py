@@ -77,6 +77,14 @@ class GenericManifestSchemaError(Exception):
     """Raise when a generic manifest schema is invalid."""
 
 
+class CircularDependencyError(ValueError):
+    """Raise when entities of a manifest refer to each other in a circle."""
+
+    def __init__(self, entity_nodes: set):
+        self.entity_nodes = entity_nodes
+        super().__init__(f"Circular dependencies exist among these entities: {entity_nodes}")
+
+
 class BaseEntityValidationError(Exception):
     """
     Base Error for failed validations.
@@ -30,6 +30,7 @@ from osdu_api.providers.types import BlobStorageClient, FileLikeObject
 from osdu_ingestion.libs.constants import RETRIES, WAIT
 from osdu_ingestion.libs.context import Context
 from osdu_ingestion.libs.exceptions import InvalidFileRecordData
+from osdu_ingestion.libs.http_session import get_default_session
 from osdu_ingestion.libs.mixins import HeadersMixin
 
 logger = logging.getLogger()
@@ -60,7 +61,7 @@ class FileHandler(HeadersMixin):
     """Class to perform operations using OSDU File Service."""
 
     def __init__(self, file_service_host: str, token_refresher: TokenRefresher, context: Context,
-                 blob_storage_client: BlobStorageClient = None):
+                 blob_storage_client: BlobStorageClient = None, session: requests.Session = None):
         """File handler.
 
         :param file_service_host: Base OSDU File service url
@@ -69,8 +70,11 @@ class FileHandler(HeadersMixin):
         :type token_refresher: TokenRefresher
         :param context: The tenant context data
         :type context: Context
+        :param session: HTTP session, the shared one is used by default
+        :type session: requests.Session
         """
         super().__init__(context)
+        self.session = session or get_default_session()
         self._file_service_host = file_service_host
         self.token_refresher = token_refresher
         self._blob_storage_client = blob_storage_client or blob_storage.get_client()
@@ -127,14 +131,14 @@ class FileHandler(HeadersMixin):
     @authorize()
     def _send_post_request(self, headers: dict, url: str, request_body: str) -> requests.Response:
         logger.debug(f"{request_body}")
-        response = requests.post(url, request_body, headers=headers)
+        response = self.session.post(url, request_body, headers=headers)
         logger.debug(response.content)
         return response
 
     @tenacity.retry(**RETRY_SETTINGS)
     @authorize()
     def _send_get_request(self, headers: dict, url: str) -> requests.Response:
-        response = requests.get(url, headers=headers)
+        response = self.session.get(url, headers=headers)
         logger.debug(response)
         return response
 
@@ -187,7 +191,7 @@ class FileHandler(HeadersMixin):
         """
         logger.debug("Uploading file.")
         buffer.seek(0)
-        requests.put(signed_url, buffer.read(), headers=headers)
+        self.session.put(signed_url, buffer.read(), headers=headers)
         logger.debug("File uploaded.")
 
     def _get_file_location_request(self, headers: dict, file_id: str) -> str:
@@ -0,0 +1,95 @@
+#  Copyright 2021 Google LLC
+#  Copyright 2021 EPAM Systems
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Provides HTTP sessions keeping connections to OSDU services alive."""
+
+import threading
+from http.cookiejar import CookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from osdu_ingestion.libs.constants import HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+class NoCookiesPolicy(CookiePolicy):
+    """
+    Cookie policy neither accepting nor returning cookies. A session is shared by service clients
+    of any tenant, so cookies set by one response must not be sent with other requests.
+    """
+    netscape = True
+    rfc2965 = False
+    hide_cookie2 = False
+
+    def set_ok(self, cookie, request) -> bool:
+        return False
+
+    def return_ok(self, cookie, request) -> bool:
+        return False
+
+    def domain_return_ok(self, domain, request) -> bool:
+        return False
+
+    def path_return_ok(self, path, request) -> bool:
+        return False
+
+
+def create_session(
+    pool_connections: int = HTTP_POOL_CONNECTIONS,
+    pool_maxsize: int = HTTP_POOL_MAXSIZE
+) -> requests.Session:
+    """
+    Create a session with pools of keep-alive connections, so requests to the same host
+    don't open new TCP and TLS connections. The session doesn't keep cookies.
+
+    :param pool_connections: Number of hosts to keep connection pools for.
+    :param pool_maxsize: Max number of connections kept per host. Set it not less than the
+        number of threads sending requests concurrently, e.g. component_workers *
+        max_in_flight_saves of SingleManifestProcessor or prefetch_workers of SchemaValidator.
+        Otherwise extra connections are opened and discarded with "Connection pool is full".
+    :return: Session.
+    """
+    session = requests.Session()
+    session.cookies.set_policy(NoCookiesPolicy())
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_default_session() -> requests.Session:
+    """
+    :return: Session shared by all the service clients created without their own session.
+    """
+    global _default_session
+    if _default_session is None:
+        with _default_session_lock:
+            if _default_session is None:
+                _default_session = create_session()
+    return _default_session
+
+
+def set_default_session(session: requests.Session):
+    """
+    Replace the shared session, e.g. with one having bigger pools.
+
+    :param session: Session to share.
+    """
+    global _default_session
+    with _default_session_lock:
+        _default_session = session
@@ -13,21 +13,128 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import copy
 import json
 import logging
 import re
+import threading
+from array import array
 from collections import deque
-from typing import Dict, Iterable, Iterator, List, Pattern, Set
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Pattern, Set, Tuple, Union
 from uuid import uuid4
 
-import toposort
-
+from osdu_ingestion.libs.exceptions import CircularDependencyError
 from osdu_ingestion.libs.linearize_manifest import ManifestEntity
 from osdu_ingestion.libs.utils import (EntityId, is_surrogate_key,
                                        remove_trailing_colon, split_id)
 
 logger = logging.getLogger()
 
+# Shared by all the entity nodes with no children or parents.
+NO_ENTITY_NODES = frozenset()
+
+
+class WhitelistRefPatterns:
+    """
+    Whitelist reference regexp patterns compiled once to be shared by all the entity nodes.
+    Each pattern is expected to contain (key) and (value) regexp groups.
+    """
+
+    GROUP_NAME_REGEX = re.compile(r"\(\?P(<|=)(key|value)(>|\))")
+    # Numbered backreferences and conditionals, group numbers are shifted in the combined pattern.
+    GROUP_NUMBER_REFERENCE_REGEX = re.compile(r"(?<!\\)(?:\\\\)*(?:\\[1-9]|\(\?\(\d)")
+
+    def __init__(self, whitelist_ref_patterns: str = None):
+        """
+        :param whitelist_ref_patterns: string containing whitelist reference regexp patterns, one per line
+        """
+        self.patterns = self._compile_patterns(whitelist_ref_patterns)
+        self.combined_pattern, self.separate_patterns = self._combine_patterns(self.patterns)
+        # Names of (value) groups of the combined pattern by names of its alternatives.
+        self._value_group_names = {
+            f"pattern_{index}": f"value_{index}" if "value" in pattern.groupindex else None
+            for index, pattern in enumerate(self.patterns)
+        }
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    @staticmethod
+    def _compile_patterns(whitelist_ref_patterns: str) -> List[Pattern]:
+        """
+        Trying to parse whitelist reference regexp patterns from string into list of regexp compiled patterns
+
+        :param whitelist_ref_patterns: string containing various whitelist reference regexp patterns prepared for compilation
+        :return: list of regexp compiled patterns or nothing
+        """
+        if not whitelist_ref_patterns:
+            return []
+        try:
+            logger.debug(whitelist_ref_patterns)
+            whitelist_ref_patterns = whitelist_ref_patterns.replace('\r\n', '\n').strip().split('\n')
+            return [
+                re.compile(r"{}".format(pattern), re.I + re.M)
+                for pattern in whitelist_ref_patterns
+            ]
+        except Exception as e:
+            logger.error(f"Unable to init whitelist reference patterns: {whitelist_ref_patterns}",
+                         exc_info=e)
+            return []
+
+    @classmethod
+    def _combine_patterns(cls, patterns: List[Pattern]) -> Tuple[Optional[Pattern], List[Pattern]]:
+        """
+        Combine patterns into one alternation regexp, so a source is scanned once for all of them.
+        Each pattern is wrapped into 'pattern_<index>' group to know which one matched, and its
+        groups are renamed to 'key_<index>' and 'value_<index>' to keep names unique.
+        Patterns referring to groups by numbers are not combined, their groups are renumbered
+        in the combined pattern.
+
+        :param patterns: compiled whitelist patterns
+        :return: combined pattern or None if patterns can't be combined, and patterns to apply one by one
+        """
+        alternatives = []
+        separate_patterns = []
+        for index, pattern in enumerate(patterns):
+            if cls.GROUP_NUMBER_REFERENCE_REGEX.search(pattern.pattern):
+                separate_patterns.append(pattern)
+                continue
+            alternative = cls.GROUP_NAME_REGEX.sub(
+                lambda match: f"(?P{match.group(1)}{match.group(2)}_{index}{match.group(3)}",
+                pattern.pattern
+            )
+            alternatives.append(f"(?P<pattern_{index}>{alternative})")
+        if not alternatives:
+            return None, separate_patterns
+        try:
+            return re.compile("|".join(alternatives), re.I + re.M), separate_patterns
+        except re.error as e:
+            logger.warning(f"Whitelist reference patterns can't be combined, "
+                           f"they are applied one by one. {e}")
+            return None, patterns
+
+    def find_references(self, source: str) -> Set[str]:
+        """
+        Find values of (value) groups of all patterns in the source.
+        Combined patterns are tried in their order at each position of the source,
+        like alternatives of one regexp.
+
+        :param source: source to search with patterns
+        :return: set of whitelisted references
+        """
+        references = set()
+        if self.combined_pattern is not None:
+            for match in self.combined_pattern.finditer(source):
+                value_group_name = self._value_group_names[match.lastgroup]
+                references.add(match.group(value_group_name) if value_group_name else None)
+        references.update(
+            match.groupdict().get("value")
+            for pattern in self.separate_patterns
+            for match in pattern.finditer(source)
+        )
+        return references
+
 
 class EntityNode:
     """
@@ -37,32 +144,50 @@ class EntityNode:
         "entity_id",
         "system_srn",
         "entity_info",
-        "children",
-        "parents",
+        "_children",
+        "_parents",
+        "_graph",
+        "_graph_index",
         "is_invalid",
         "is_external_srn",
         "_entity_id",
-        "_whitelist_ref_patterns"
+        "_whitelist_ref_patterns",
+        "_reference_paths",
+        "_reference_paths_content"
     ]
 
     SRN_REGEX = re.compile(
         r"(?<=\")surrogate-key:[\s\w\-\.\d]+(?=\")|(?<=\")[\w\-\.]+:[\w\-\.]+--[\w\-\.]+:.[^,;\"]+(?=\")")
+    # The same grammar for a single string, which is a reference only if it matches entirely.
+    SRN_STRING_REGEX = re.compile(
+        r"surrogate-key:[\s\w\-\.\d]+|[\w\-\.]+:[\w\-\.]+--[\w\-\.]+:.[^,;\"]+")
+    # Printable ASCII strings without quotes and backslashes are not escaped by json.dumps.
+    SERIALIZED_AS_IS_STRING_REGEX = re.compile(r"[ !#-\[\]-~]*")
 
     def __init__(
         self,
         entity_id: EntityId,
         entity_info: ManifestEntity,
         is_external_srn: bool = False,
-        whitelist_ref_patterns: str = None
+        whitelist_ref_patterns: Union[str, WhitelistRefPatterns] = None
     ):
         self.entity_id = entity_id
         self.entity_info = entity_info
         self.system_srn = None
-        self.children = set()
-        self.parents = set()
+        # Sets of links are created on the first link, many entities have none.
+        self._children = None
+        self._parents = None
+        # Compact graph keeping the links instead of the sets.
+        self._graph = None
+        self._graph_index = None
         self.is_invalid = False
         self.is_external_srn = is_external_srn
-        self._whitelist_ref_patterns = self._compile_whitelist_ref_patterns(whitelist_ref_patterns)
+        if isinstance(whitelist_ref_patterns, str):
+            whitelist_ref_patterns = WhitelistRefPatterns(whitelist_ref_patterns)
+        self._whitelist_ref_patterns = whitelist_ref_patterns
+        # Paths to string values containing references, they are valid for the content they were found in.
+        self._reference_paths = None
+        self._reference_paths_content = None
 
     @property
     def srn(self):
@@ -82,32 +207,50 @@ class EntityNode:
     def data(self, value: dict):
         self.entity_info.entity_data = value
 
-    def add_child(self, child_node: "EntityNode"):
-        self.children.add(child_node)
+    @property
+    def children(self) -> Union[Set["EntityNode"], "LinkedEntityNodes"]:
+        if self._graph is not None:
+            return self._graph.children(self._graph_index)
+        return self._children if self._children is not None else NO_ENTITY_NODES
 
-    def add_parent(self, parent_node: "EntityNode"):
-        self.parents.add(parent_node)
+    @property
+    def parents(self) -> Union[Set["EntityNode"], "LinkedEntityNodes"]:
+        if self._graph is not None:
+            return self._graph.parents(self._graph_index)
+        return self._parents if self._parents is not None else NO_ENTITY_NODES
 
-    def _compile_whitelist_ref_patterns(self, whitelist_ref_patterns: str) -> List[Pattern]:
+    def attach_to_graph(self, graph: "CompactEntityGraph", graph_index: int):
         """
-        Trying to parse whitelist reference regexp patterns from string into list of regexp compiled patterns
+        Keep the node's links in the compact graph instead of the node's own sets.
 
-        :param whitelist_ref_patterns: string containing various whitelist reference regexp patterns prepared for compilation
-        :return: list of regexp compiled patterns or nothing
+        :param graph: Compact graph containing the node's links.
+        :param graph_index: Index of the node in the graph.
         """
-        if not whitelist_ref_patterns:
-            return []
-        try:
-            logger.debug(whitelist_ref_patterns)
-            whitelist_ref_patterns = whitelist_ref_patterns.replace('\r\n', '\n').strip().split('\n')
-            return [
-                re.compile(r"{}".format(pattern), re.I + re.M)
-                for pattern in whitelist_ref_patterns
-            ]
-        except Exception as e:
-            logger.error(f"Unable to init whitelist reference patterns: {whitelist_ref_patterns}",
-                         exc_info=e)
-            return []
+        self._graph = graph
+        self._graph_index = graph_index
+        self._children = None
+        self._parents = None
+
+    def _detach_from_graph(self):
+        children, parents = self.children, self.parents
+        self._graph = None
+        self._graph_index = None
+        self._children = set(children) if children else None
+        self._parents = set(parents) if parents else None
+
+    def add_child(self, child_node: "EntityNode"):
+        if self._graph is not None:
+            self._detach_from_graph()
+        if self._children is None:
+            self._children = set()
+        self._children.add(child_node)
+
+    def add_parent(self, parent_node: "EntityNode"):
+        if self._graph is not None:
+            self._detach_from_graph()
+        if self._parents is None:
+            self._parents = set()
+        self._parents.add(parent_node)
 
     def _extract_whitelist_references(self) -> Set[str]:
         """
@@ -115,66 +258,390 @@ class EntityNode:
 
         :return: Set of whitelisted ids to other entities or records.
         """
-        manifest_str = json.dumps(self.data)
-        whitelist_references = set()
-        for pattern in self._whitelist_ref_patterns:
-            whitelist_references.update(
-                {match.get('value') for match in self._match_id_with_whitelist_pattern(pattern, manifest_str)}
-            )
+        whitelist_references = self._whitelist_ref_patterns.find_references(json.dumps(self.data))
         logger.debug(f"Whitelist references of {self.data.get('id')}: {whitelist_references}")
 
         return whitelist_references
 
-    def _match_id_with_whitelist_pattern(
-        self,
-        pattern: Pattern,
-        source: str
-    ) -> List[Dict[str, str]]:
+    @classmethod
+    def _find_string_references(cls, string: str, references: List[str]):
+        """
+        Find references in a string of the entity's content as SRN_REGEX finds them in
+        the serialized entity.
+
+        :param string: String value or key containing ':'.
+        :param references: List to add found references to.
         """
-        Expects whitelist pattern containing (key) and (value) regexp groups
+        if cls.SERIALIZED_AS_IS_STRING_REGEX.fullmatch(string):
+            # Such a string is serialized as is, so it can be a reference only entirely.
+            if cls.SRN_STRING_REGEX.fullmatch(string):
+                references.append(string)
+        else:
+            references.extend(cls.SRN_REGEX.findall(json.dumps(string)))
 
-        :param pattern: compiled regexp whitelist pattern
-        :param source: source to search with pattern
-        :return: pattern matches filtered by groups
+    def _extract_references(self) -> List[str]:
         """
-        return [match.groupdict() for match in pattern.finditer(source)]
+        Walk the entity's content once and find references in its strings and keys.
+        Found references are the same SRN_REGEX finds in the serialized entity.
+        Paths to string values with references are remembered to replace them later.
+
+        :return: References to other entities or records.
+        """
+        references = []
+        reference_paths = []
+        content_parts = [(self.data, ())]
+        while content_parts:
+            content_part, path = content_parts.pop()
+            items = content_part.items() if isinstance(content_part, dict) else enumerate(content_part)
+            for key, value in items:
+                if isinstance(key, str) and ":" in key:
+                    if key.endswith(":"):
+                        # A match in such a key can span the key's closing quote, so find
+                        # references in the serialized pair like in the serialized entity.
+                        references.extend(self.SRN_REGEX.findall(
+                            json.dumps({key: value}, separators=(",", ":"))
+                        ))
+                        # References inside the value are not located.
+                        reference_paths = None
+                        continue
+                    self._find_string_references(key, references)
+                if isinstance(value, str):
+                    if ":" in value:
+                        references_number = len(references)
+                        self._find_string_references(value, references)
+                        if reference_paths is not None and len(references) > references_number:
+                            reference_paths.append(path + (key,))
+                elif isinstance(value, (dict, list)):
+                    content_parts.append((value, path + (key,)))
+        # Tuples take less memory, and entities with no references share the empty one.
+        self._reference_paths = tuple(reference_paths) if reference_paths is not None else None
+        self._reference_paths_content = self.data
+        return references
 
     def get_parent_entity_ids(self) -> Set[EntityId]:
         """
         Get list of parents' EnetityIds.
         """
+        references = self._extract_references()
         whitelist_references = set()
-        entity_data = json.dumps(self.data, separators=(",", ":"))
         if self._whitelist_ref_patterns:
             whitelist_references = self._extract_whitelist_references()
         parent_entity_ids = set(
-            split_id(reference) for reference in self.SRN_REGEX.findall(entity_data)
+            split_id(reference) for reference in references
             if reference not in whitelist_references
         )
         parent_entity_ids.discard(self.entity_id)
         return parent_entity_ids
 
-    def replace_parents_surrogate_srns(self):
+    def _get_parents_srns_replacements(self) -> Dict[str, str]:
         """
-        Replace surrogate parents' keys with system-generated ones in child entity.
+        Map references to parents with system-generated SRNs to the strings they must be replaced with.
+
+        :return: Replacements of references.
         """
-        if not self.parents:
-            return
-        content = json.dumps(self.data)
+        replacements = {}
         for parent in self.parents:
             if parent.system_srn:
                 if is_surrogate_key(parent.srn):
                     # ':' at the end is for showing that it is reference if parent srn was surrogate-key.
-                    content = content.replace(parent.srn, f"{parent.system_srn}:")
+                    replacements[parent.srn] = f"{parent.system_srn}:"
                 else:
-                    content = content.replace(parent.srn, f"{parent.system_srn}")
-        self.data = json.loads(content)
+                    replacements[parent.srn] = parent.system_srn
+                    replacements[f"{parent.srn}:"] = f"{parent.system_srn}:"
+        return replacements
+
+    @classmethod
+    def _replace_references(cls, content: Any, replacements: Dict[str, str]) -> Any:
+        """
+        Replace string values equal to references. Containers with no replaced values are
+        returned as is, others are copied, so the original content is not modified.
+
+        :param content: Entity's content or its part.
+        :param replacements: Replacements of references.
+        :return: Content with replaced references.
+        """
+        if isinstance(content, str):
+            return replacements.get(content, content)
+        if isinstance(content, dict):
+            replaced_content = None
+            for key, value in content.items():
+                replaced_value = cls._replace_references(value, replacements)
+                if replaced_value is not value:
+                    if replaced_content is None:
+                        replaced_content = dict(content)
+                    replaced_content[key] = replaced_value
+            return content if replaced_content is None else replaced_content
+        if isinstance(content, list):
+            replaced_content = None
+            for index, value in enumerate(content):
+                replaced_value = cls._replace_references(value, replacements)
+                if replaced_value is not value:
+                    if replaced_content is None:
+                        replaced_content = list(content)
+                    replaced_content[index] = replaced_value
+            return content if replaced_content is None else replaced_content
+        return content
+
+    @staticmethod
+    def _replace_references_by_paths(
+        content: Union[dict, list],
+        reference_paths: List[tuple],
+        replacements: Dict[str, str]
+    ) -> Union[dict, list]:
+        """
+        Replace references located by paths. Containers along paths of replaced values are
+        copied, so the original content is not modified.
+        Raises LookupError or TypeError if a path doesn't exist in the content.
+
+        :param content: Entity's content.
+        :param reference_paths: Paths to string values containing references.
+        :param replacements: Replacements of references.
+        :return: Content with replaced references.
+        """
+        copied_containers = {}
+        for path in reference_paths:
+            value = content
+            for key in path:
+                value = value[key]
+            if not isinstance(value, str) or value not in replacements:
+                continue
+            container, container_path = content, ()
+            for key in path:
+                copied_container = copied_containers.get(container_path)
+                if copied_container is None:
+                    copied_container = copy.copy(container)
+                    copied_containers[container_path] = copied_container
+                    if container_path:
+                        copied_containers[container_path[:-1]][container_path[-1]] = copied_container
+                container = container[key]
+                container_path += (key,)
+            # The last copied container is the one holding the value.
+            copied_container[path[-1]] = replacements[value]
+        return copied_containers.get((), content)
+
+    def replace_parents_surrogate_srns(self):
+        """
+        Replace surrogate parents' keys with system-generated ones in child entity.
+        """
+        if not self.parents:
+            return
+        replacements = self._get_parents_srns_replacements()
+        if not replacements:
+            return
+        content = None
+        if self._reference_paths is not None and self._reference_paths_content is self.data:
+            try:
+                content = self._replace_references_by_paths(
+                    self.data, self._reference_paths, replacements
+                )
+            except (LookupError, TypeError):
+                logger.debug(f"References of {self.srn} are moved, search them in the whole entity.")
+        if content is None:
+            content = self._replace_references(self.data, replacements)
+        if content is not self.data:
+            if self._reference_paths_content is self.data:
+                self._reference_paths_content = content
+            self.data = content
 
     @property
     def invalid_parents(self) -> Set["EntityNode"]:
         return {parent for parent in self.parents if parent.is_invalid}
 
 
+class LinkedEntityNodes:
+    """
+    Read-only view of a node's links kept in CompactEntityGraph. Linked nodes are looked up
+    on iteration, nothing is copied.
+    """
+    __slots__ = ("_entity_nodes", "_indexes")
+
+    def __init__(self, entity_nodes: List[EntityNode], indexes: memoryview):
+        """
+        :param entity_nodes: All the nodes of the graph.
+        :param indexes: Indexes of the linked nodes.
+        """
+        self._entity_nodes = entity_nodes
+        self._indexes = indexes
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def __iter__(self) -> Iterator[EntityNode]:
+        return map(self._entity_nodes.__getitem__, self._indexes)
+
+    def __contains__(self, entity_node: EntityNode) -> bool:
+        return any(linked_node is entity_node for linked_node in self)
+
+
+class CompactEntityGraph:
+    """
+    Links between entity nodes kept in CSR-style integer arrays instead of per-node sets.
+    Links of the node with the index i are targets[offsets[i]:offsets[i + 1]], so the graph's
+    memory scales with the number of links rather than the number of nodes.
+    """
+
+    def __init__(self, entity_nodes: List[EntityNode], parent_indexes: array, child_indexes: array):
+        """
+        Build the graph from links given as pairs of parent and child indexes and attach
+        the nodes to it.
+
+        :param entity_nodes: Entity nodes, their indexes are positions in this list.
+        :param parent_indexes: Parent index of each link.
+        :param child_indexes: Child index of each link.
+        """
+        self.entity_nodes = entity_nodes
+        self._children_offsets, self._children_targets = self._build_adjacency(
+            len(entity_nodes), parent_indexes, child_indexes
+        )
+        self._parents_offsets, self._parents_targets = self._build_adjacency(
+            len(entity_nodes), child_indexes, parent_indexes
+        )
+        self._children_view = memoryview(self._children_targets)
+        self._parents_view = memoryview(self._parents_targets)
+        for index, entity_node in enumerate(entity_nodes):
+            entity_node.attach_to_graph(self, index)
+
+    @staticmethod
+    def _build_adjacency(nodes_count: int, sources: array, targets: array) -> Tuple[array, array]:
+        """
+        Group links by their sources with a counting sort.
+
+        :param nodes_count: Number of nodes.
+        :param sources: Source index of each link.
+        :param targets: Target index of each link.
+        :return: Offsets of each source's targets and the grouped targets.
+        """
+        offsets = array("I", [0]) * (nodes_count + 1)
+        for source in sources:
+            offsets[source + 1] += 1
+        for index in range(nodes_count):
+            offsets[index + 1] += offsets[index]
+        positions = offsets[:-1]
+        grouped_targets = array("I", [0]) * len(targets)
+        for source, target in zip(sources, targets):
+            grouped_targets[positions[source]] = target
+            positions[source] += 1
+        return offsets, grouped_targets
+
+    def children(self, index: int) -> LinkedEntityNodes:
+        """
+        :param index: Index of the node.
+        :return: Children of the node.
+        """
+        offsets = self._children_offsets
+        return LinkedEntityNodes(self.entity_nodes, self._children_view[offsets[index]:offsets[index + 1]])
+
+    def parents(self, index: int) -> LinkedEntityNodes:
+        """
+        :param index: Index of the node.
+        :return: Parents of the node.
+        """
+        offsets = self._parents_offsets
+        return LinkedEntityNodes(self.entity_nodes, self._parents_view[offsets[index]:offsets[index + 1]])
+
+    @property
+    def links_count(self) -> int:
+        return len(self._children_targets)
+
+
+class EntityNodeScheduler:
+    """
+    Kahn-style scheduler of entity nodes. A node gets ready as soon as all its parents
+    among the scheduled nodes are done. Other parents (e.g. external ones) are considered done.
+    """
+
+    def __init__(self, entity_nodes: Iterable[EntityNode]):
+        """
+        :param entity_nodes: Entity nodes to schedule.
+        """
+        self._in_degrees = dict.fromkeys(entity_nodes, 0)
+        for entity_node in self._in_degrees:
+            self._in_degrees[entity_node] = sum(
+                1 for parent in entity_node.parents if parent in self._in_degrees
+            )
+        self._ready = deque(
+            entity_node for entity_node, in_degree in self._in_degrees.items() if not in_degree
+        )
+        self._not_done_count = len(self._in_degrees)
+
+    @property
+    def is_done(self) -> bool:
+        return not self._not_done_count
+
+    def ensure_acyclic(self):
+        """
+        Check that all the nodes can be scheduled, without changing the scheduler's state.
+        Raises CircularDependencyError otherwise.
+        """
+        in_degrees = dict(self._in_degrees)
+        ready = list(self._ready)
+        scheduled_count = 0
+        while ready:
+            entity_node = ready.pop()
+            scheduled_count += 1
+            for child in entity_node.children:
+                if child in in_degrees:
+                    in_degrees[child] -= 1
+                    if not in_degrees[child]:
+                        ready.append(child)
+        if scheduled_count < len(in_degrees):
+            raise CircularDependencyError(
+                {entity_node for entity_node, in_degree in in_degrees.items() if in_degree > 0}
+            )
+
+    def pop_ready(self) -> List[EntityNode]:
+        """
+        Take all the nodes ready to be processed.
+
+        :return: Nodes whose parents are done.
+        """
+        ready = list(self._ready)
+        self._ready.clear()
+        return ready
+
+    def mark_done(self, entity_node: EntityNode):
+        """
+        Mark the node as processed. Its children with no other not processed parents get ready.
+
+        :param entity_node: Processed node.
+        """
+        self._not_done_count -= 1
+        for child in entity_node.children:
+            in_degree = self._in_degrees.get(child)
+            if in_degree is not None:
+                self._in_degrees[child] = in_degree - 1
+                if in_degree == 1:
+                    self._ready.append(child)
+
+    def _raise_if_stuck(self):
+        if not self._ready and not self.is_done:
+            raise CircularDependencyError(
+                {entity_node for entity_node, in_degree in self._in_degrees.items() if in_degree > 0}
+            )
+
+    def stream(self) -> Iterator[EntityNode]:
+        """
+        Yield nodes one by one. A node is marked as done when the next one is requested.
+        """
+        while self._ready:
+            entity_node = self._ready.popleft()
+            yield entity_node
+            self.mark_done(entity_node)
+        self._raise_if_stuck()
+
+    def generations(self) -> Iterator[Set[EntityNode]]:
+        """
+        Yield sets of not dependant on each other nodes. Nodes of a generation are marked
+        as done when the next generation is requested.
+        """
+        while self._ready:
+            generation = set(self.pop_ready())
+            yield generation
+            for entity_node in generation:
+                self.mark_done(entity_node)
+        self._raise_if_stuck()
+
+
 class ManifestAnalyzer:
     """
     This class is for creating a queue for ingesting set of data, each piece of data can depend on
@@ -194,8 +661,16 @@ class ManifestAnalyzer:
         self,
         entities: Iterable[ManifestEntity],
         previously_skipped_srns: Set[str] = None,
-        whitelist_ref_patterns: str = None
+        whitelist_ref_patterns: Union[str, WhitelistRefPatterns] = None,
+        compact_graph: bool = False
     ):
+        """
+        :param entities: Linearized manifest entities.
+        :param previously_skipped_srns: Srns of entities skipped on previous steps.
+        :param whitelist_ref_patterns: Patterns of whitelisted references.
+        :param compact_graph: Keep links between nodes in CompactEntityGraph instead of
+            per-node sets. Use it for huge manifests.
+        """
         self.entities = entities
         self.entity_id_node_table = dict()
         self.external_entity_id_node_table = dict()
@@ -204,7 +679,10 @@ class ManifestAnalyzer:
             self._previously_skipped_srns = set(split_id(_id) for _id in previously_skipped_srns)
         else:
             self._previously_skipped_srns = []
-        self._whitelist_ref_patterns = whitelist_ref_patterns
+        if not isinstance(whitelist_ref_patterns, WhitelistRefPatterns):
+            whitelist_ref_patterns = WhitelistRefPatterns(whitelist_ref_patterns)
+        # compiled once and shared by all the entity nodes
+        self._whitelist_ref_patterns = whitelist_ref_patterns or None
 
         # used as a root for all orphan entities
         empty_entity_info = ManifestEntity({}, "")
@@ -212,7 +690,19 @@ class ManifestAnalyzer:
                                                    entity_info=empty_entity_info)
 
         self._fill_entity_id_node_table()
-        self._fill_nodes_parents()
+        self.entity_graph = None
+        if compact_graph:
+            self.entity_graph = self._build_compact_graph()
+        else:
+            self._fill_nodes_parents()
+        # Kept up to date on invalidation, so valid and invalid entities are not searched for.
+        # Nodes are mapped to their positions in the entity table to report them in its order.
+        self._valid_entity_nodes_index = {
+            entity_node: position for position, entity_node in enumerate(self.entity_id_node_table.values())
+        }
+        self._invalid_entity_nodes_index = {}
+        # Connected components can be processed in parallel threads.
+        self._invalidation_lock = threading.Lock()
 
         self._find_invalid_nodes()
 
@@ -245,17 +735,18 @@ class ManifestAnalyzer:
         """
         return EntityNode(parent_entity_id, None, is_external_srn=True)
 
-    def _set_entity_parents(self, entity_node: EntityNode):
+    def _find_entity_parents(self, entity_node: EntityNode) -> List[EntityNode]:
         """
         Find all references parent in entity's content.
         If a parent is not presented in manifest, mark this entity as unprocessed.
+
+        :return: Parent nodes, external ones are created on the first reference.
         """
+        parent_nodes = []
         parent_entity_ids = entity_node.get_parent_entity_ids()
         for parent_entity_id in parent_entity_ids:
             if self.entity_id_node_table.get(parent_entity_id):
-                parent_node = self.entity_id_node_table[parent_entity_id]
-                parent_node.add_child(entity_node)
-                entity_node.add_parent(parent_node)
+                parent_nodes.append(self.entity_id_node_table[parent_entity_id])
             elif parent_entity_id in self._previously_skipped_srns:
                 # add to the common root for all invalid entity nodes. Will be marked as invalid
                 # later in _find_invalid_nodes step in __init__.
@@ -266,80 +757,172 @@ class ManifestAnalyzer:
                 if not parent_node:
                     parent_node = self._create_external_entity_node(parent_entity_id)
                     self.external_entity_id_node_table[parent_entity_id] = parent_node
-                parent_node.add_child(entity_node)
-                entity_node.add_parent(parent_node)
+                parent_nodes.append(parent_node)
+        return parent_nodes
+
+    def _set_entity_parents(self, entity_node: EntityNode):
+        """
+        Link the entity with its parents.
+        """
+        for parent_node in self._find_entity_parents(entity_node):
+            parent_node.add_child(entity_node)
+            entity_node.add_parent(parent_node)
+
+    def _build_compact_graph(self) -> CompactEntityGraph:
+        """
+        Find parents in every entity and keep the links in CompactEntityGraph.
+        Links are collected as pairs of integer indexes, so no per-node sets are created.
+        Manifest nodes go first in the graph, external ones follow.
+        """
+        node_indexes = {
+            entity_node: index for index, entity_node in enumerate(self.entity_id_node_table.values())
+        }
+        parent_indexes = array("I")
+        child_indexes = array("I")
+        for entity_node in self.entity_id_node_table.values():
+            child_index = node_indexes[entity_node]
+            for parent_node in self._find_entity_parents(entity_node):
+                parent_index = node_indexes.get(parent_node)
+                if parent_index is None:
+                    parent_index = node_indexes[parent_node] = len(node_indexes)
+                parent_indexes.append(parent_index)
+                child_indexes.append(child_index)
+        return CompactEntityGraph(list(node_indexes), parent_indexes, child_indexes)
+
+    def _mark_node_invalid(self, entity_node: EntityNode):
+        entity_node.is_invalid = True
+        if entity_node is self._invalid_entities_parent:
+            return
+        self._invalid_entities_nodes.add(entity_node)
+        position = self._valid_entity_nodes_index.pop(entity_node, None)
+        if position is not None:
+            self._invalid_entity_nodes_index[entity_node] = position
 
     def _find_invalid_nodes(self, start_node: EntityNode = None):
         """
         Traverse entities dependant on orphaned or invalid ones.
         Add them to set of unprocessed nodes to exclude them from ingestion queue.
+        Dependants of an invalid node are already invalid, so each node is traversed only once
+        however many times invalidation is started.
         """
-        queue = deque()
-        queue.append(start_node or self._invalid_entities_parent)
+        start_node = start_node or self._invalid_entities_parent
+        if start_node.is_invalid and start_node is not self._invalid_entities_parent:
+            return
+        self._mark_node_invalid(start_node)
+        queue = deque([start_node])
         while queue:
             node = queue.popleft()
-            self._invalid_entities_nodes.add(node)
-            node.is_invalid = True
             for child in node.children:
                 if not child.is_invalid:
-                    child.is_invalid = True
+                    self._mark_node_invalid(child)
                     queue.append(child)
-        if start_node is self._invalid_entities_parent:
-            self._invalid_entities_nodes.discard(self._invalid_entities_parent)
 
-    def entity_queue(self) -> Iterator[EntityNode]:
+    def connected_components(self) -> List[List[EntityNode]]:
+        """
+        Split the manifest's entity nodes into groups not linked with each other, so the groups
+        can be processed independently. Links through external entities are not considered,
+        as external entities are not processed.
+
+        :return: Lists of linked entity nodes.
+        """
+        components = []
+        visited = set()
+        for entity_node in self.entity_id_node_table.values():
+            if entity_node in visited:
+                continue
+            visited.add(entity_node)
+            component = []
+            queue = deque([entity_node])
+            while queue:
+                node = queue.popleft()
+                component.append(node)
+                for linked_node in chain(node.parents, node.children):
+                    if linked_node not in visited and not linked_node.is_external_srn:
+                        visited.add(linked_node)
+                        queue.append(linked_node)
+            components.append(component)
+        return components
+
+    def entity_scheduler(self, entity_nodes: Iterable[EntityNode] = None) -> EntityNodeScheduler:
+        """
+        Create a scheduler over the manifest's entity nodes. Use it to take nodes as soon as
+        their parents are processed.
+
+        :param entity_nodes: Schedule only these nodes, e.g. a connected component.
+        """
+        if entity_nodes is None:
+            entity_nodes = self.entity_id_node_table.values()
+        return EntityNodeScheduler(entity_nodes)
+
+    def entity_queue(self, entity_nodes: Iterable[EntityNode] = None) -> Iterator[EntityNode]:
         """
         Create a queue, where a child entity goes after all its parents.
         If an entity is marked as unprocessed, then skip it.
+
+        :param entity_nodes: Queue only these nodes, e.g. a connected component.
         """
-        entity_graph = {entity_node: entity_node.parents for entity_node in self.entity_id_node_table.values()}
-        logger.debug(f"Entity graph {entity_graph}.")
-        entity_queue = toposort.toposort_flatten(entity_graph, sort=False)
-        for entity_node in entity_queue:
+        entity_scheduler = self.entity_scheduler(entity_nodes)
+        entity_scheduler.ensure_acyclic()
+        for entity_node in entity_scheduler.stream():
             if entity_node not in self._invalid_entities_nodes and not entity_node.is_external_srn:
                 yield entity_node
 
-        for entity_node in self._invalid_entities_nodes:
-            entity_node.replace_parents_surrogate_srns()
+        self._replace_invalid_nodes_parents_srns(entity_nodes)
 
-    def entity_generation_queue(self) -> Iterator[Set[EntityNode]]:
+    def entity_generation_queue(self, entity_nodes: Iterable[EntityNode] = None) -> Iterator[Set[EntityNode]]:
         """
         Yield set of not dependant on each other entities (generation). 
         Generations of parents are followed by generations of children.
 
+        :param entity_nodes: Queue only these nodes, e.g. a connected component.
         """
-        entity_graph = {entity: entity.parents for entity in self.entity_id_node_table.values()}
-        logger.debug(f"Entity graph {entity_graph}.")
-        toposorted_entities_nodes = toposort.toposort(entity_graph)
-        for entity_set in toposorted_entities_nodes:
+        for entity_set in self.entity_scheduler(entity_nodes).generations():
             valid_entities = {entity for entity in entity_set
                               if entity not in self._invalid_entities_nodes and not entity.is_external_srn}
             yield valid_entities
 
+        self._replace_invalid_nodes_parents_srns(entity_nodes)
+
+    def _replace_invalid_nodes_parents_srns(self, entity_nodes: Iterable[EntityNode] = None):
+        """
+        Replace surrogate keys of saved parents in invalid entities, so they are reported
+        with system srns of their parents.
+
+        :param entity_nodes: Replace only in these nodes, e.g. a connected component.
+        """
+        if entity_nodes is None:
+            invalid_entity_nodes = self._invalid_entities_nodes
+        else:
+            invalid_entity_nodes = [entity_node for entity_node in entity_nodes if entity_node.is_invalid]
+        for entity_node in invalid_entity_nodes:
+            entity_node.replace_parents_surrogate_srns()
+
     def add_invalid_node(self, entity_node: EntityNode):
         """
         Use if there some problems with ingesting or finding entity.
         Mark it and its dependants as unprocessed.
         """
-        self._invalid_entities_parent.add_child(entity_node)
-        self._find_invalid_nodes(entity_node)
+        with self._invalidation_lock:
+            self._invalid_entities_parent.add_child(entity_node)
+            self._find_invalid_nodes(entity_node)
 
     @property
     def invalid_entities_info(self) -> List[ManifestEntity]:
         """
-        :return: List of invalid entities info.
+        :return: List of invalid entities info in the entity table's order.
         """
-        return [entity_node.entity_info for entity_node in self.entity_id_node_table.values()
-                if entity_node.is_invalid]
+        return [entity_node.entity_info for entity_node in self.invalid_entity_nodes]
 
     @property
     def invalid_entity_nodes(self) -> List[EntityNode]:
-        return [entity_node for entity_node in self.entity_id_node_table.values() if entity_node.is_invalid]
+        """
+        :return: List of invalid entity nodes in the entity table's order.
+        """
+        return sorted(self._invalid_entity_nodes_index, key=self._invalid_entity_nodes_index.get)
 
     @property
     def valid_entities_info(self) -> List[ManifestEntity]:
         """
         :return: List of valid entities info.
         """
-        return [entity_node.entity_info for entity_node in self.entity_id_node_table.values()
-                if not entity_node.is_invalid]
+        return [entity_node.entity_info for entity_node in self._valid_entity_nodes_index]
@@ -17,6 +17,7 @@
 
 import json
 import logging
+from http import HTTPStatus
 from typing import List
 
 import requests
@@ -27,6 +28,7 @@ from osdu_ingestion.libs.constants import RETRIES, WAIT
 from osdu_ingestion.libs.context import Context
 from osdu_ingestion.libs.exceptions import EmptyManifestError
 from osdu_ingestion.libs.handle_file import FileHandler
+from osdu_ingestion.libs.http_session import get_default_session
 from osdu_ingestion.libs.linearize_manifest import ManifestEntity
 from osdu_ingestion.libs.mixins import HeadersMixin
 from osdu_ingestion.libs.source_file_check import SourceFileChecker
@@ -37,6 +39,36 @@ RETRY_SETTINGS = {
     "wait": tenacity.wait_fixed(WAIT),
     "reraise": True
 }
+
+# Client errors not caused by the content of the records, so retrying the records may help.
+NOT_CONTENT_CLIENT_ERRORS = {
+    HTTPStatus.UNAUTHORIZED,
+    HTTPStatus.FORBIDDEN,
+    HTTPStatus.NOT_FOUND,
+    HTTPStatus.REQUEST_TIMEOUT,
+    HTTPStatus.TOO_MANY_REQUESTS,
+}
+
+
+def is_records_rejection(error: BaseException) -> bool:
+    """
+    Check if Storage service rejected records because of their content. Server and connection
+    errors are not caused by particular records.
+
+    :param error: Error raised while saving records.
+    :return: True if some of the records are invalid.
+    """
+    if not isinstance(error, requests.HTTPError) or error.response is None:
+        return False
+    status_code = error.response.status_code
+    return 400 <= status_code < 500 and status_code not in NOT_CONTENT_CLIENT_ERRORS
+
+
+# Rejected records are rejected again, so they are not retried.
+SAVE_RECORDS_RETRY_SETTINGS = {
+    **RETRY_SETTINGS,
+    "retry": tenacity.retry_if_exception(lambda error: not is_records_rejection(error))
+}
 logger = logging.getLogger()
 
 RETRIES = 3
@@ -52,7 +84,8 @@ class ManifestProcessor(HeadersMixin):
         file_handler: FileHandler,
         source_file_checker: SourceFileChecker,
         token_refresher: TokenRefresher,
-        context: Context
+        context: Context,
+        session: requests.Session = None
     ):
         """Manifest processor.
 
@@ -66,8 +99,11 @@ class ManifestProcessor(HeadersMixin):
         :type context: Context
         :param token_refresher: An instance of token refresher
         :type token_refresher: TokenRefresher
+        :param session: HTTP session, the shared one is used by default
+        :type session: requests.Session
         """
         super().__init__(context)
+        self.session = session or get_default_session()
         self.file_handler = file_handler
         self.source_file_checker = source_file_checker
         self.storage_url = storage_url
@@ -110,7 +146,7 @@ class ManifestProcessor(HeadersMixin):
         ):
             raise ValueError(f"Invalid answer from Storage server: {response_dict}")
 
-    @tenacity.retry(**RETRY_SETTINGS)
+    @tenacity.retry(**SAVE_RECORDS_RETRY_SETTINGS)
     @authorize()
     def save_record_to_storage(self, headers: dict, request_data: List[dict]) -> requests.Response:
         """
@@ -119,7 +155,7 @@ class ManifestProcessor(HeadersMixin):
         request_data = json.dumps(request_data)
         logger.info("Sending records to Storage service")
         logger.debug(f"{request_data}")
-        response = requests.put(self.storage_url, request_data, headers=headers)
+        response = self.session.put(self.storage_url, request_data, headers=headers)
         if response.ok:
             response_dict = response.json()
             self._validate_storage_response(response_dict)
@@ -170,6 +206,7 @@ class ManifestProcessor(HeadersMixin):
 
         :manifest_records: List of ManifestEntities to be ingested.
         :raises EmptyManifestError: When manifest is empty
+        :raises requests.HTTPError: When Storage service doesn't save the records
         :return: List of ids of saved records
         :rtype: List[str]
         """
@@ -182,6 +219,7 @@ class ManifestProcessor(HeadersMixin):
                 self._delete_surrogate_key(manifest_record.entity_data))
         save_manifests_response = self.save_record_to_storage(
             self.request_headers, request_data=populated_manifest_records)
+        save_manifests_response.raise_for_status()
         record_ids.extend(save_manifests_response.json()["recordIds"])
 
         return record_ids
@@ -19,7 +19,11 @@ R3 Process Single Manifest helper.
 """
 
 import logging
-from typing import Iterator, List, Set, Tuple
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from operator import itemgetter
+from typing import Any, Callable, Iterator, List, Set, Tuple
 
 from osdu_ingestion.libs.constants import (FIRST_STORED_RECORD_INDEX,
                                            SAVE_RECORDS_BATCH_SIZE)
@@ -27,10 +31,11 @@ from osdu_ingestion.libs.context import Context
 from osdu_ingestion.libs.exceptions import (ProcessRecordBatchError,
                                             ProcessRecordError)
 from osdu_ingestion.libs.linearize_manifest import ManifestLinearizer
-from osdu_ingestion.libs.manifest_analyzer import EntityNode, ManifestAnalyzer
-from osdu_ingestion.libs.process_manifest_r3 import ManifestProcessor
+from osdu_ingestion.libs.manifest_analyzer import (EntityNode, EntityNodeScheduler,
+                                                   ManifestAnalyzer)
+from osdu_ingestion.libs.process_manifest_r3 import ManifestProcessor, is_records_rejection
 from osdu_ingestion.libs.refresh_token import TokenRefresher
-from osdu_ingestion.libs.utils import (create_skipped_entity_info,
+from osdu_ingestion.libs.utils import (create_skipped_entity_info, generate_entity_id,
                                        is_surrogate_key, split_into_batches)
 from osdu_ingestion.libs.validation.validate_referential_integrity import \
     ManifestIntegrity
@@ -38,6 +43,9 @@ from osdu_ingestion.libs.validation.validate_schema import SchemaValidator
 
 logger = logging.getLogger()
 
+# Saved ids and skipped entities.
+SaveResult = Tuple[List[str], List[dict]]
+
 
 class SingleManifestProcessor:
 
@@ -50,9 +58,35 @@ class SingleManifestProcessor:
         schema_validator: SchemaValidator,
         token_refresher: TokenRefresher,
         batch_save_enabled: bool = False,
-        save_records_batch_size: int = SAVE_RECORDS_BATCH_SIZE
+        save_records_batch_size: int = SAVE_RECORDS_BATCH_SIZE,
+        dataflow_save_enabled: bool = False,
+        compact_entity_graph: bool = False,
+        component_workers: int = None,
+        preassign_surrogate_key_ids: bool = False,
+        bisect_failed_batches: bool = False,
+        max_in_flight_saves: int = None
     ):
-        """Init SingleManifestProcessor."""
+        """Init SingleManifestProcessor.
+
+        :param batch_save_enabled: Save entities by batches instead of one by one.
+        :param save_records_batch_size: Max number of entities in a batch.
+        :param dataflow_save_enabled: Pack batches from all the entities whose parents are saved
+            instead of waiting for a whole generation of entities to be saved.
+        :param compact_entity_graph: Keep links between entities in compact arrays,
+            it lowers memory usage on huge manifests.
+        :param component_workers: Number of threads processing not linked with each other
+            groups of entities in parallel. Groups are processed one by one if it is not set.
+        :param preassign_surrogate_key_ids: Generate system ids of surrogate-key entities before
+            saving, so retried save requests overwrite the same records instead of creating
+            new ones.
+        :param bisect_failed_batches: Retry halves of a batch whose records are rejected by
+            Storage service (4xx response), so only invalid entities are skipped instead of
+            the whole batch.
+        :param max_in_flight_saves: Max number of concurrent requests saving independent
+            entities or batches. Requests are sent one by one if it is not set.
+            Up to component_workers * max_in_flight_saves requests share the manifest processor's
+            HTTP session, its pool_maxsize must not be less (see http_session.create_session).
+        """
         super().__init__()
         self.storage_url = storage_url
         self.payload_context = payload_context
@@ -62,6 +96,12 @@ class SingleManifestProcessor:
         self.token_refresher = token_refresher
         self.batch_save_enabled = batch_save_enabled
         self.save_records_batch_size = save_records_batch_size
+        self.dataflow_save_enabled = dataflow_save_enabled
+        self.compact_entity_graph = compact_entity_graph
+        self.component_workers = component_workers
+        self.preassign_surrogate_key_ids = preassign_surrogate_key_ids
+        self.bisect_failed_batches = bisect_failed_batches
+        self.max_in_flight_saves = max_in_flight_saves
 
     def _process_single_entity_node(self, manifest_analyzer: ManifestAnalyzer, entity_node: EntityNode):
         """
@@ -85,11 +125,30 @@ class SingleManifestProcessor:
             raise ProcessRecordError(entity_node.entity_info.entity_data, f"{error}"[:128])
         return record_id
 
+    def _save_entity_nodes_batch(self, entity_node_batch: List[EntityNode]) -> List[str]:
+        """
+        Save batch of EntityNodes in Storage Service.
+
+        Storage Service returns ids in the order of the sent records, so each entity node
+        gets its system srn, and surrogate keys can be replaced in children.
+
+        :param entity_node_batch: Batch of entity nodes.
+        :return: List of saved record ids.
+        """
+        manifest_entities = [entity_node.entity_info for entity_node in entity_node_batch]
+        record_ids = self.manifest_processor.process_manifest_records(manifest_entities)
+        if len(record_ids) != len(entity_node_batch):
+            raise ValueError(f"Storage service returned {len(record_ids)} ids "
+                             f"for {len(entity_node_batch)} records.")
+        for entity_node, record_id in zip(entity_node_batch, record_ids):
+            entity_node.system_srn = record_id
+        return list(record_ids)
+
     def _process_entity_nodes_batch(
         self, 
         manifest_analyzer: ManifestAnalyzer, 
         entity_node_batch: List[EntityNode]   
-    ) -> Tuple[List[str], List[dict]]:
+    ) -> List[str]:
         """
         Try to process batch of EntityNodes by saving their data in Storage Service.
 
@@ -98,16 +157,12 @@ class SingleManifestProcessor:
 
 
         :param manifest_analyzer: Object with proper queue of entities.
-        :param :
+        :param entity_node_batch: Batch of entity nodes.
         :return: List of saved record ids. 
         """
-        record_ids = []
-
         try:
-            manifest_entities = [entity_node.entity_info for entity_node in entity_node_batch]
-            record_ids.extend(self.manifest_processor.process_manifest_records(manifest_entities))
+            record_ids = self._save_entity_nodes_batch(entity_node_batch)
         except Exception as e:
-            # TODO: Fix skipping saving the whole batch in Storage Service if some records in this batch are invalid.
             logger.warning(f"Can't process batch {entity_node_batch}. {str(e)[:128]}")
             for entity_node in entity_node_batch:
                 manifest_analyzer.add_invalid_node(entity_node)
@@ -116,43 +171,222 @@ class SingleManifestProcessor:
 
         return record_ids
 
-    def _process_records_by_one(self, manifest_analyzer: ManifestAnalyzer) -> Tuple[List[str], List[dict]]:
+    def _process_entity_nodes_batch_by_bisection(
+        self,
+        manifest_analyzer: ManifestAnalyzer,
+        entity_node_batch: List[EntityNode]
+    ) -> Tuple[List[str], List[dict]]:
+        """
+        Process batch of EntityNodes. If Storage Service rejects records of the batch, split it
+        into halves and retry them, so only invalid entities are skipped. Rejected requests
+        are not retried as they are, so it takes about O(invalid entities * log(batch size))
+        extra requests. Server and connection errors are not caused by particular records,
+        they skip the whole (part of the) batch.
+
+        :param manifest_analyzer: Object with proper queue of entities.
+        :param entity_node_batch: Batch of entity nodes.
+        :return: List of saved ids and skipped ones.
+        """
+        record_ids = []
+        skipped_ids = []
+        # Left halves are on the top, so ids are collected in the order of the batch.
+        node_batches = [entity_node_batch]
+        while node_batches:
+            node_batch = node_batches.pop()
+            try:
+                record_ids.extend(self._save_entity_nodes_batch(node_batch))
+            except Exception as e:
+                if len(node_batch) > 1 and is_records_rejection(e):
+                    logger.warning(f"Batch of {len(node_batch)} entities is rejected, "
+                                   f"retry its halves. {str(e)[:128]}")
+                    middle = len(node_batch) // 2
+                    node_batches.append(node_batch[middle:])
+                    node_batches.append(node_batch[:middle])
+                    continue
+                logger.warning(f"Can't process batch {node_batch}. {str(e)[:128]}")
+                for entity_node in node_batch:
+                    manifest_analyzer.add_invalid_node(entity_node)
+                skipped_ids.extend(
+                    ProcessRecordBatchError([node.data for node in node_batch], f"{e}"[:128]).skipped_entities
+                )
+        return record_ids, skipped_ids
+
+    def _process_records_by_one(
+        self,
+        manifest_analyzer: ManifestAnalyzer,
+        entity_nodes: List[EntityNode] = None
+    ) -> Tuple[List[str], List[dict]]:
         """
         Process each entity from entity queue created according to child-parent relationships
         between entities.
         Replace surrogate-keys of parents inside child entities with system-generated keys.
 
         :param manifest_analyzer: Object with proper queue of entities
+        :param entity_nodes: Process only these entity nodes, all the manifest's ones by default.
         :return: List of saved ids and skipped ones.
         """
+        if self._are_saves_concurrent:
+            # An entity is saved as soon as its parents are saved, concurrently with others.
+            return self._save_by_dataflow(
+                manifest_analyzer,
+                entity_nodes,
+                1,
+                lambda entity_node_batch: self._save_single_entity_node(
+                    manifest_analyzer, entity_node_batch[0]
+                )
+            )
+
         record_ids = []
         skipped_ids = []
-        for entity_node in manifest_analyzer.entity_queue():
-            try:
-                record_ids.append(self._process_single_entity_node(manifest_analyzer, entity_node))
-            except ProcessRecordError as error:
-                skipped_ids.append(error.skipped_entity)
+        for entity_node in manifest_analyzer.entity_queue(entity_nodes):
+            node_record_ids, node_skipped_ids = self._save_single_entity_node(manifest_analyzer, entity_node)
+            record_ids.extend(node_record_ids)
+            skipped_ids.extend(node_skipped_ids)
         return record_ids, skipped_ids
 
-    def _split_ids_by_type(
-        self, 
-        entity_node_batch: List[EntityNode]
-    ) -> Tuple[List[EntityNode], List[EntityNode]]:
+    def _save_single_entity_node(
+        self,
+        manifest_analyzer: ManifestAnalyzer,
+        entity_node: EntityNode
+    ) -> Tuple[List[str], List[dict]]:
+        """
+        :param manifest_analyzer: Object with proper queue of entities.
+        :param entity_node: Entity node to be processed.
+        :return: Saved id and skipped entity, if any.
         """
-        Split entity node batch into two lists with surrogate keys, and real ids.
+        try:
+            return [self._process_single_entity_node(manifest_analyzer, entity_node)], []
+        except ProcessRecordError as error:
+            return [], [error.skipped_entity]
 
-        :param entity_node_batch: Batch of entity node
-        :return: Two lists of surrogate-key entities and not-surrogate-key entities.
+    @property
+    def _are_saves_concurrent(self) -> bool:
+        return bool(self.max_in_flight_saves) and self.max_in_flight_saves > 1
+
+    def _run_saves(self, save: Callable[[Any], SaveResult], items: List[Any]) -> List[SaveResult]:
         """
-        surrogate_key_id_nodes = []
-        not_surrugate_key_id_nodes = []
-        for entity_node in entity_node_batch:
-            entity_node.replace_parents_surrogate_srns()
-            if is_surrogate_key(entity_node.data.get("id", "")):
-                surrogate_key_id_nodes.append(entity_node)
-            else:
-                not_surrugate_key_id_nodes.append(entity_node)
-        return not_surrugate_key_id_nodes, surrogate_key_id_nodes
+        Run saves with no more than max_in_flight_saves requests in flight.
+
+        :param save: Save function. It must not raise, failures are returned as skipped entities.
+        :param items: Items to save.
+        :return: Results in the items' order.
+        """
+        if not self._are_saves_concurrent or len(items) < 2:
+            return [save(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_in_flight_saves, len(items))) as executor:
+            return list(executor.map(save, items))
+
+    @staticmethod
+    def _take_ready_entity_nodes(entity_scheduler: EntityNodeScheduler, ready_entity_nodes: deque):
+        """
+        Move entity nodes whose parents are done to the ready ones. Invalid nodes are marked
+        as done at once, their children are invalid too and are skipped the same way.
+        Surrogate keys of saved parents are replaced in invalid nodes, as entity_queue does.
+
+        :param entity_scheduler: Scheduler of entity nodes.
+        :param ready_entity_nodes: Ready entity nodes to be saved.
+        """
+        entity_nodes = entity_scheduler.pop_ready()
+        while entity_nodes:
+            for entity_node in entity_nodes:
+                if entity_node.is_invalid:
+                    entity_node.replace_parents_surrogate_srns()
+                    entity_scheduler.mark_done(entity_node)
+                else:
+                    ready_entity_nodes.append(entity_node)
+            entity_nodes = entity_scheduler.pop_ready()
+
+    def _save_by_dataflow(
+        self,
+        manifest_analyzer: ManifestAnalyzer,
+        entity_nodes: List[EntityNode],
+        batch_size: int,
+        save: Callable[[List[EntityNode]], SaveResult]
+    ) -> SaveResult:
+        """
+        Save entities as soon as their parents are saved. Batches are packed from ready entities,
+        and a new one is sent as soon as there are enough ready entities to fill it and fewer than
+        max_in_flight_saves requests are in flight, so a slow save doesn't hold back entities not
+        depending on it. A partly filled batch is sent only when no save is in flight.
+
+        :param manifest_analyzer: Object with proper queue of entities.
+        :param entity_nodes: Process only these entity nodes, all the manifest's ones by default.
+        :param batch_size: Max number of entities in a batch.
+        :param save: Save function. It must not raise, failures are returned as skipped entities.
+        :return: List of saved ids and skipped ones in the order of the manifest analyzer's
+            entity queue, whatever order saves complete in.
+        """
+        entity_scheduler = manifest_analyzer.entity_scheduler(entity_nodes)
+        entity_scheduler.ensure_acyclic()
+        positions = {
+            entity_node: position
+            for position, entity_node in enumerate(manifest_analyzer.entity_scheduler(entity_nodes).stream())
+        }
+        max_in_flight_saves = self.max_in_flight_saves if self._are_saves_concurrent else 1
+        ready_entity_nodes = deque()
+        pending_saves = {}
+        # (position, saved id) and (position, skipped entity) pairs.
+        saved_results = []
+        skipped_results = []
+        with ThreadPoolExecutor(max_workers=max_in_flight_saves) as executor:
+            while True:
+                self._take_ready_entity_nodes(entity_scheduler, ready_entity_nodes)
+                while (
+                    ready_entity_nodes
+                    and len(pending_saves) < max_in_flight_saves
+                    and (len(ready_entity_nodes) >= batch_size or not pending_saves)
+                ):
+                    entity_node_batch = [
+                        ready_entity_nodes.popleft()
+                        for _ in range(min(batch_size, len(ready_entity_nodes)))
+                    ]
+                    logger.debug(f"Batch: {entity_node_batch}")
+                    pending_saves[executor.submit(save, entity_node_batch)] = entity_node_batch
+
+                if not pending_saves:
+                    break
+                done_saves, _ = wait(pending_saves, return_when=FIRST_COMPLETED)
+                for future in done_saves:
+                    entity_node_batch = pending_saves.pop(future)
+                    batch_record_ids, batch_skipped_ids = future.result()
+                    # Ids and skipped entities are returned in the batch's order, and failed
+                    # entities are marked as invalid.
+                    saved_results.extend(zip(
+                        (positions[entity_node] for entity_node in entity_node_batch if not entity_node.is_invalid),
+                        batch_record_ids
+                    ))
+                    skipped_results.extend(zip(
+                        (positions[entity_node] for entity_node in entity_node_batch if entity_node.is_invalid),
+                        batch_skipped_ids
+                    ))
+                    for entity_node in entity_node_batch:
+                        entity_scheduler.mark_done(entity_node)
+
+        record_ids = [record_id for _, record_id in sorted(saved_results, key=itemgetter(0))]
+        skipped_ids = [skipped_id for _, skipped_id in sorted(skipped_results, key=itemgetter(0))]
+        return record_ids, skipped_ids
+
+    def _preassign_surrogate_key_ids(self, manifest_analyzer: ManifestAnalyzer):
+        """
+        Replace surrogate keys of entities with generated system ids. Children get the ids as
+        their parents' system srns, as if the parents were already saved.
+        A save request retried after a lost response then updates the records it has already
+        created instead of creating duplicates with other ids.
+
+        :param manifest_analyzer: Object with proper queue of entities.
+        """
+        for entity_node in manifest_analyzer.entity_id_node_table.values():
+            if entity_node.is_invalid or not is_surrogate_key(entity_node.data.get("id", "")):
+                continue
+            try:
+                entity_id = generate_entity_id(self.payload_context.data_partition_id,
+                                               entity_node.data.get("kind", ""))
+            except ValueError as error:
+                # Such an entity gets its id from Storage service's response.
+                logger.warning(f"Can't generate id for entity {entity_node}. {error}")
+                continue
+            entity_node.data["id"] = entity_id
+            entity_node.system_srn = entity_id
 
     def _save_entities_generation(
         self, 
@@ -169,36 +403,52 @@ class SingleManifestProcessor:
         """
         record_ids = []
         skipped_ids = []
-        for entity_node_batch in split_into_batches(entity_nodes_generation, self.save_records_batch_size):
-            # surrogate-key entities and real-id entities must be treated in different ways.
-            not_surrogate_key_nodes, surrogate_key_nodes = self._split_ids_by_type(entity_node_batch)
-
-            if not_surrogate_key_nodes:
-                try:
-                    record_ids.extend(
-                        self._process_entity_nodes_batch(manifest_analyzer, not_surrogate_key_nodes)
-                    )
-                except ProcessRecordBatchError as error:
-                    skipped_ids.extend(error.skipped_entities)
-
-            for entity_node in surrogate_key_nodes:
-                try:
-                    record_ids.append(self._process_single_entity_node(manifest_analyzer, entity_node))
-                except ProcessRecordError as error:
-                    skipped_ids.append(error.skipped_entity)
+        entity_node_batches = list(split_into_batches(entity_nodes_generation, self.save_records_batch_size))
+        for entity_node_batch in entity_node_batches:
+            for entity_node in entity_node_batch:
+                entity_node.replace_parents_surrogate_srns()
+
+        for batch_record_ids, batch_skipped_ids in self._run_saves(
+            partial(self._save_entity_nodes_batch_with_recovery, manifest_analyzer),
+            entity_node_batches
+        ):
+            record_ids.extend(batch_record_ids)
+            skipped_ids.extend(batch_skipped_ids)
 
         return record_ids, skipped_ids
 
-    def _process_records_by_batches(self, manifest_analyzer: ManifestAnalyzer) -> Tuple[List[str], List[dict]]:
+    def _save_entity_nodes_batch_with_recovery(
+        self,
+        manifest_analyzer: ManifestAnalyzer,
+        entity_node_batch: List[EntityNode]
+    ) -> Tuple[List[str], List[dict]]:
+        """
+        :param manifest_analyzer: Object with proper queue of entities.
+        :param entity_node_batch: Batch of entity nodes.
+        :return: List of saved ids and skipped ones.
+        """
+        if self.bisect_failed_batches:
+            return self._process_entity_nodes_batch_by_bisection(manifest_analyzer, entity_node_batch)
+        try:
+            return self._process_entity_nodes_batch(manifest_analyzer, entity_node_batch), []
+        except ProcessRecordBatchError as error:
+            return [], error.skipped_entities
+
+    def _process_records_by_batches(
+        self,
+        manifest_analyzer: ManifestAnalyzer,
+        entity_nodes: List[EntityNode] = None
+    ) -> Tuple[List[str], List[dict]]:
         """
         Save batches of entities in Storage Service.
         
         :param manifest_analyzer: Object with proper queue of entities
+        :param entity_nodes: Process only these entity nodes, all the manifest's ones by default.
         :return: List of saved ids and skipped ones.
         """
         record_ids = []
         skipped_ids = []
-        for entity_nodes_generation in manifest_analyzer.entity_generation_queue():
+        for entity_nodes_generation in manifest_analyzer.entity_generation_queue(entity_nodes):
             logger.info(f"Generation: {entity_nodes_generation}")
             generation_record_ids, generation_skipped_ids = self._save_entities_generation(manifest_analyzer, entity_nodes_generation)
 
@@ -206,7 +456,88 @@ class SingleManifestProcessor:
             skipped_ids.extend(generation_skipped_ids)
 
         return record_ids, skipped_ids
-            
+
+    def _process_records_by_dataflow(
+        self,
+        manifest_analyzer: ManifestAnalyzer,
+        entity_nodes: List[EntityNode] = None
+    ) -> Tuple[List[str], List[dict]]:
+        """
+        Save batches of entities in Storage Service. An entity gets ready to be saved as soon
+        as all its parents are saved, and batches are packed from all the ready entities,
+        so children don't wait for the rest of their parents' generation.
+
+        :param manifest_analyzer: Object with proper queue of entities
+        :param entity_nodes: Process only these entity nodes, all the manifest's ones by default.
+        :return: List of saved ids and skipped ones.
+        """
+        return self._save_by_dataflow(
+            manifest_analyzer,
+            entity_nodes,
+            self.save_records_batch_size,
+            partial(self._save_ready_entity_nodes_batch, manifest_analyzer)
+        )
+
+    def _save_ready_entity_nodes_batch(
+        self,
+        manifest_analyzer: ManifestAnalyzer,
+        entity_node_batch: List[EntityNode]
+    ) -> Tuple[List[str], List[dict]]:
+        """
+        Save a batch of entities whose parents are saved.
+
+        :param manifest_analyzer: Object with proper queue of entities.
+        :param entity_node_batch: Batch of entity nodes.
+        :return: List of saved ids and skipped ones.
+        """
+        for entity_node in entity_node_batch:
+            entity_node.replace_parents_surrogate_srns()
+        return self._save_entity_nodes_batch_with_recovery(manifest_analyzer, entity_node_batch)
+
+    def _shard_components(self, components: List[List[EntityNode]]) -> List[List[EntityNode]]:
+        """
+        Pack small connected components together, so their entities still fill save batches.
+
+        :param components: Connected components of the manifest.
+        :return: Shards of whole components.
+        """
+        shards = []
+        shard = []
+        for component in components:
+            shard.extend(component)
+            if len(shard) >= self.save_records_batch_size:
+                shards.append(shard)
+                shard = []
+        if shard:
+            shards.append(shard)
+        return shards
+
+    def _process_components_in_parallel(
+        self,
+        manifest_analyzer: ManifestAnalyzer,
+        process_records: Callable[[ManifestAnalyzer, List[EntityNode]], Tuple[List[str], List[dict]]]
+    ) -> Tuple[List[str], List[dict]]:
+        """
+        Process shards of connected components in parallel threads. Entities of different
+        components don't refer to each other, so failures in one shard don't affect others.
+
+        :param manifest_analyzer: Object with proper queue of entities
+        :param process_records: Method processing entity nodes of a shard.
+        :return: List of saved ids and skipped ones in the shards' order.
+        """
+        record_ids = []
+        skipped_ids = []
+        shards = self._shard_components(manifest_analyzer.connected_components())
+        logger.debug(f"Process {len(shards)} shards of connected entities.")
+        with ThreadPoolExecutor(max_workers=self.component_workers) as executor:
+            shard_results = executor.map(
+                lambda shard: process_records(manifest_analyzer, shard), shards
+            )
+            for shard_record_ids, shard_skipped_ids in shard_results:
+                record_ids.extend(shard_record_ids)
+                skipped_ids.extend(shard_skipped_ids)
+        return record_ids, skipped_ids
+
     def process_manifest(self, manifest: dict, with_validation: bool) -> Tuple[
         List[str], List[dict]]:
         """Execute manifest validation then process it.
@@ -242,13 +573,26 @@ class SingleManifestProcessor:
 
         manifest_analyzer = ManifestAnalyzer(
             manifest_entities,
-            {entity["id"] for entity in skipped_ids if entity.get("id")}
+            {entity["id"] for entity in skipped_ids if entity.get("id")},
+            compact_graph=self.compact_entity_graph
         )
 
-        if self.batch_save_enabled:
-            record_ids, not_valid_ids = self._process_records_by_batches(manifest_analyzer)
+        if self.batch_save_enabled and self.preassign_surrogate_key_ids:
+            self._preassign_surrogate_key_ids(manifest_analyzer)
+
+        if self.batch_save_enabled and self.dataflow_save_enabled:
+            process_records = self._process_records_by_dataflow
+        elif self.batch_save_enabled:
+            process_records = self._process_records_by_batches
+        else:
+            process_records = self._process_records_by_one
+
+        if self.component_workers and self.component_workers > 1:
+            record_ids, not_valid_ids = self._process_components_in_parallel(
+                manifest_analyzer, process_records
+            )
         else:
-            record_ids, not_valid_ids = self._process_records_by_one(manifest_analyzer)
+            record_ids, not_valid_ids = process_records(manifest_analyzer)
 
         skipped_ids.extend(not_valid_ids)
         skipped_ids.extend(
@@ -0,0 +1,128 @@
+#  Copyright 2021 Google LLC
+#  Copyright 2021 EPAM Systems
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Provides caches to keep schemas between runs."""
+
+import dataclasses
+import json
+import logging
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+from urllib.parse import quote
+
+from osdu_ingestion.libs.constants import SCHEMA_CACHE_TTL
+
+logger = logging.getLogger()
+
+
+@dataclasses.dataclass
+class SchemaCacheEntry:
+    """
+    Cached schema with data required for its revalidation.
+
+    Args:
+        schema: Content of schema
+        etag: ETag header of the Schema service response the schema was got from
+        fetched_at: Unix time the schema was got from or revalidated with Schema service
+    """
+    schema: dict
+    etag: Optional[str] = None
+    fetched_at: float = 0.0
+
+    def is_fresh(self, ttl: int) -> bool:
+        """
+        :param ttl: Time to live of entries in seconds.
+        :return: True if the entry can be used without revalidation.
+        """
+        return time.time() - self.fetched_at < ttl
+
+
+class BaseSchemaCache(ABC):
+    """Base class for schema caches. Entries are kept by data-partition-id and kind."""
+
+    def __init__(self, ttl: int = SCHEMA_CACHE_TTL):
+        """
+        :param ttl: Time to live of entries in seconds. Stale entries are revalidated.
+        """
+        self.ttl = ttl
+
+    @abstractmethod
+    def get(self, data_partition_id: str, kind: str) -> Optional[SchemaCacheEntry]:
+        """
+        Get cached entry.
+
+        :param data_partition_id: Data partition id.
+        :param kind: Kind of the schema or URI of the referenced schema.
+        :return: Cached entry or None if there is no such an entry.
+        """
+
+    @abstractmethod
+    def set(self, data_partition_id: str, kind: str, entry: SchemaCacheEntry):
+        """
+        Save entry into the cache.
+
+        :param data_partition_id: Data partition id.
+        :param kind: Kind of the schema or URI of the referenced schema.
+        :param entry: Entry to save.
+        """
+
+
+class LocalDirectorySchemaCache(BaseSchemaCache):
+    """Schema cache keeping each entry as a json-file in a local directory."""
+
+    def __init__(self, directory: str, ttl: int = SCHEMA_CACHE_TTL):
+        """
+        :param directory: Directory to keep entries in. It is created if absent.
+        :param ttl: Time to live of entries in seconds. Stale entries are revalidated.
+        """
+        super().__init__(ttl)
+        self.directory = directory
+
+    def _get_entry_path(self, data_partition_id: str, kind: str) -> str:
+        return os.path.join(
+            self.directory,
+            quote(data_partition_id, safe=""),
+            f"{quote(kind, safe='')}.json"
+        )
+
+    def get(self, data_partition_id: str, kind: str) -> Optional[SchemaCacheEntry]:
+        entry_path = self._get_entry_path(data_partition_id, kind)
+        try:
+            with open(entry_path) as f:
+                return SchemaCacheEntry(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Can't read cached schema '{entry_path}'. {e}")
+            return None
+
+    def set(self, data_partition_id: str, kind: str, entry: SchemaCacheEntry):
+        entry_path = self._get_entry_path(data_partition_id, kind)
+        entry_directory = os.path.dirname(entry_path)
+        tmp_path = None
+        try:
+            os.makedirs(entry_directory, exist_ok=True)
+            # Write into a temporary file first, so concurrent tasks never read a partial entry.
+            file_descriptor, tmp_path = tempfile.mkstemp(dir=entry_directory, suffix=".tmp")
+            with os.fdopen(file_descriptor, "w") as f:
+                json.dump(dataclasses.asdict(entry), f)
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            logger.warning(f"Can't save schema into cache '{entry_path}'. {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -24,6 +24,7 @@ from osdu_api.auth.authorization import TokenRefresher, authorize
 
 from osdu_ingestion.libs.constants import RETRIES, WAIT
 from osdu_ingestion.libs.context import Context
+from osdu_ingestion.libs.http_session import get_default_session
 from osdu_ingestion.libs.mixins import HeadersMixin
 
 logger = logging.getLogger(__name__)
@@ -46,7 +47,8 @@ class SearchResponse:
 class SearchClient(HeadersMixin):
     """OSDU Search Client."""
 
-    def __init__(self, search_url: str, token_refresher: TokenRefresher, context: Context):
+    def __init__(self, search_url: str, token_refresher: TokenRefresher, context: Context,
+                 session: requests.Session = None):
         """Initialize Search Client.
 
         :param search_url: The base search url
@@ -56,8 +58,11 @@ class SearchClient(HeadersMixin):
         :type token_refresher: TokenRefresher
         :param context: Tenant context
         :type context: Context
+        :param session: HTTP session, the shared one is used by default
+        :type session: requests.Session
         """
         super().__init__(context)
+        self.session = session or get_default_session()
         self.search_url = search_url
         self.token_refresher = token_refresher
 
@@ -65,7 +70,7 @@ class SearchClient(HeadersMixin):
     @authorize()
     def _send_post_request(self, headers: dict, url: str, request_body: str) -> requests.Response:
         logger.debug(request_body)
-        response = requests.post(url, request_body, headers=headers, timeout=TIMEOUT)
+        response = self.session.post(url, request_body, headers=headers, timeout=TIMEOUT)
         logger.debug(response.content)
         return response
 
@@ -26,6 +26,7 @@ from requests import Response
 
 from osdu_ingestion.libs.context import Context
 from osdu_ingestion.libs.exceptions import RecordsNotSearchableError
+from osdu_ingestion.libs.http_session import get_default_session
 from osdu_ingestion.libs.mixins import HeadersMixin
 
 logger = logging.getLogger()
@@ -41,7 +42,7 @@ class SearchId(HeadersMixin):
     """Class for stored records search validation."""
 
     def __init__(self, search_url: str, record_ids: list, token_refresher: TokenRefresher,
-                 context: Context, limit: int = DEFAULT_LIMIT):
+                 context: Context, limit: int = DEFAULT_LIMIT, session: requests.Session = None):
         """Init search id validator.
 
         :param search_url: Base OSDU Search service url
@@ -54,9 +55,12 @@ class SearchId(HeadersMixin):
         :type context: Context
         :param limit: Search request limit
         :type limit: int
+        :param session: HTTP session, the shared one is used by default
+        :type session: requests.Session
         :raises ValueError: When a mismatch of record counts occur
         """
         super().__init__(context)
+        self.session = session or get_default_session()
         if not record_ids:
             logger.error("There are no record ids")
             raise ValueError("There are no record id")
@@ -124,7 +128,7 @@ class SearchId(HeadersMixin):
         :rtype: requests.Response
         """
         if self.request_body:
-            response = requests.post(
+            response = self.session.post(
                 self.search_url, self.request_body, headers=headers)
             if not self._is_record_searchable(response):
                 logger.error("Expected amount (%s) of records not found." %
@@ -145,8 +149,9 @@ class SearchId(HeadersMixin):
 class ExtendedSearchId(SearchId):
 
     def __init__(self, search_url: str, record_ids: list, token_refresher,
-                 context: Context, limit: int = DEFAULT_LIMIT):
-        super().__init__(search_url, record_ids, token_refresher, context, limit=limit)
+                 context: Context, limit: int = DEFAULT_LIMIT, session: requests.Session = None):
+        super().__init__(search_url, record_ids, token_refresher, context, limit=limit,
+                         session=session)
 
     def _create_request_body(self):
         """
@@ -172,7 +177,7 @@ class ExtendedSearchId(SearchId):
 
     @authorize()
     def _make_post_request(self, headers: dict, request_body: dict) -> Response:
-        return requests.post(self.search_url, request_body, headers=headers)
+        return self.session.post(self.search_url, request_body, headers=headers)
 
     def search_records(self) -> Set[str]:
         """
@@ -22,6 +22,7 @@ import requests
 from osdu_api.auth.authorization import TokenRefresher, authorize
 
 from osdu_ingestion.libs.context import Context
+from osdu_ingestion.libs.http_session import get_default_session
 from osdu_ingestion.libs.mixins import HeadersMixin
 
 logger = logging.getLogger()
@@ -39,6 +40,7 @@ class UpdateStatus(HeadersMixin):
         status: str,
         token_refresher: TokenRefresher,
         context: Context,
+        session: requests.Session = None
     ) -> None:
         """Init the status update processor.
 
@@ -56,8 +58,11 @@ class UpdateStatus(HeadersMixin):
         :type token_refresher: TokenRefresher
         :param context: The tenant context
         :type context: Context
+        :param session: HTTP session, the shared one is used by default
+        :type session: requests.Session
         """
         super().__init__(context)
+        self.session = session or get_default_session()
         self.workflow_name = workflow_name
         self.workflow_url = workflow_url
         self.workflow_id = workflow_id
@@ -82,7 +87,7 @@ class UpdateStatus(HeadersMixin):
         logger.debug(f"Sending request '{request_body}'")
         update_status_url = f"{self.workflow_url}/v1/workflow/{self.workflow_name}/workflowRun/{self.run_id}"
         logger.debug(f"Workflow URL: {update_status_url}")
-        response = requests.put(update_status_url, request_body, headers=headers)
+        response = self.session.put(update_status_url, request_body, headers=headers)
         return response
 
     @authorize()
@@ -100,7 +105,7 @@ class UpdateStatus(HeadersMixin):
         }
         request_body = json.dumps(request_body)
         logger.debug(f" Sending request '{request_body}'")
-        response = requests.post(self.workflow_url, request_body, headers=headers)
+        response = self.session.post(self.workflow_url, request_body, headers=headers)
         return response
 
     def update_workflow_status(self):
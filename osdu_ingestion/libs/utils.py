@@ -15,31 +15,56 @@
 
 """Util functions to work with OSDU Manifests."""
 
-import dataclasses
+import functools
+import sys
 from itertools import islice
 from typing import Any, Generator, Iterable, List, TypeVar
+from uuid import uuid4
+
+from osdu_ingestion.libs.constants import ENTITY_ID_CACHE_SIZE
 
 BatchElement = TypeVar("BatchElement")
 
 
-@dataclasses.dataclass()
 class EntityId:
-    id: str
-    raw_value: str
-    version: str = ""
+    """
+    Id of an entity split into the bare id and the version.
+
+    Instances are immutable and compared by their srns, which are computed and hashed once.
+    """
+    __slots__ = ("id", "raw_value", "version", "srn", "_hash")
+
+    def __init__(self, id: str, raw_value: str, version: str = ""):
+        # split_id shares instances, and they are keys of dicts and sets, so they can't be changed.
+        set_attribute = super().__setattr__
+        set_attribute("id", id)
+        set_attribute("raw_value", raw_value)
+        set_attribute("version", version)
+        srn = sys.intern(f"{id}:{version}" if version else id)
+        set_attribute("srn", srn)
+        set_attribute("_hash", hash(srn))
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"EntityId is immutable, can't set '{name}'.")
 
-    @property
-    def srn(self) -> str:
-        if self.version:
-            return f"{self.id}:{self.version}"
-        else:
-            return self.id
+    def __delattr__(self, name: str):
+        raise AttributeError(f"EntityId is immutable, can't delete '{name}'.")
+
+    def __reduce__(self):
+        return self.__class__, (self.id, self.raw_value, self.version)
 
     def __hash__(self) -> int:
-        return hash(self.srn)
+        return self._hash
 
     def __eq__(self, other: "EntityId") -> bool:
-        return self.srn == self.srn
+        if self is other:
+            return True
+        if not isinstance(other, EntityId):
+            return NotImplemented
+        return self._hash == other._hash and self.srn == other.srn
+
+    def __repr__(self) -> str:
+        return f"EntityId(id={self.id!r}, raw_value={self.raw_value!r}, version={self.version!r})"
 
 
 def remove_trailing_colon(id_value: str) -> str:
@@ -52,24 +77,43 @@ def remove_trailing_colon(id_value: str) -> str:
     return id_value[:-1] if id_value.endswith(":") else id_value
 
 
+@functools.lru_cache(maxsize=ENTITY_ID_CACHE_SIZE)
 def split_id(id_value: str) -> EntityId:
     """
     Get id without a version for searching later.
+    The same id values are parsed once and share the same EntityId.
 
     :id_value: ID of some entity with or without versions.
     """
-    version = ""
     if is_surrogate_key(id_value):
-        _id = id_value
-    elif id_value.endswith(":"):
-        _id = id_value[:-1]
-    elif id_value.split(":")[-1].isdigit():
-        version = str(id_value.split(":")[-1])
-        _id = id_value[:-len(version) - 1]
+        return EntityId(id_value, raw_value=id_value)
+
+    _id, colon, version = id_value.rpartition(":")
+    if not colon:
+        return EntityId(id_value, raw_value=id_value)
+    elif version.isdigit():
+        return EntityId(_id, raw_value=id_value, version=version)
+    elif not version:
+        return EntityId(_id, raw_value=id_value)
     else:
-        _id = id_value
+        return EntityId(id_value, raw_value=id_value)
+
 
-    return EntityId(_id, raw_value=id_value, version=version)
+def generate_entity_id(data_partition_id: str, kind: str) -> str:
+    """
+    Generate a new system id for an entity of the kind.
+    Ex., opendes, osdu:wks:work-product-component--WellLog:1.0.0 ->
+    opendes:work-product-component--WellLog:<uuid>.
+
+    :param data_partition_id: Data partition id.
+    :param kind: Kind of the entity.
+    :raises ValueError: If the kind has no entity type.
+    :return: Generated id.
+    """
+    kind_parts = kind.split(":")
+    if len(kind_parts) != 4 or not kind_parts[2]:
+        raise ValueError(f"Can't get entity type from kind '{kind}'.")
+    return f"{data_partition_id}:{kind_parts[2]}:{uuid4()}"
 
 
 def create_skipped_entity_info(entity: Any, reason: str) -> dict:
@@ -23,7 +23,7 @@ from osdu_ingestion.libs.context import Context
 from osdu_ingestion.libs.exceptions import (EmptyManifestError,
                                             ValidationIntegrityError)
 from osdu_ingestion.libs.linearize_manifest import ManifestLinearizer
-from osdu_ingestion.libs.manifest_analyzer import ManifestAnalyzer
+from osdu_ingestion.libs.manifest_analyzer import ManifestAnalyzer, WhitelistRefPatterns
 from osdu_ingestion.libs.search_record_ids import ExtendedSearchId
 from osdu_ingestion.libs.utils import (EntityId, create_skipped_entity_info,
                                        remove_trailing_colon, split_id,
@@ -47,7 +47,7 @@ class ManifestIntegrity:
         context: Context,
         whitelist_ref_patterns: str = None,
         search_id_batch_size: int = SEARCH_ID_BATCH_SIZE,
-
+        compact_entity_graph: bool = False
     ):
         self.search_url = search_url
         self.token_refresher = token_refresher
@@ -55,6 +55,8 @@ class ManifestIntegrity:
         self.context = context
         self.search_id_batch_size = search_id_batch_size
         self.whitelist_ref_patterns = whitelist_ref_patterns
+        self._compiled_whitelist_ref_patterns = WhitelistRefPatterns(whitelist_ref_patterns)
+        self.compact_entity_graph = compact_entity_graph
         super().__init__()
 
     def _filter_not_found_ids(
@@ -169,8 +171,8 @@ class ManifestIntegrity:
         :return:
         """
         for missing_id in missing_external_ids:
-            missing_id = remove_trailing_colon(missing_id)
-            missing_entity = manifest_analyzer.external_entity_id_node_table[missing_id]
+            missing_entity_id = split_id(remove_trailing_colon(missing_id))
+            missing_entity = manifest_analyzer.external_entity_id_node_table[missing_entity_id]
             manifest_analyzer.add_invalid_node(missing_entity)
 
     def _ensure_external_references_integrity(self, manifest_analyzer: ManifestAnalyzer):
@@ -210,7 +212,9 @@ class ManifestIntegrity:
 
         manifest_traversal = ManifestLinearizer()
         linearized_manifest = manifest_traversal.linearize_manifest(manifest)
-        manifest_analyzer = ManifestAnalyzer(linearized_manifest, previously_skipped_entities_srns, self.whitelist_ref_patterns)
+        manifest_analyzer = ManifestAnalyzer(linearized_manifest, previously_skipped_entities_srns,
+                                             self._compiled_whitelist_ref_patterns,
+                                             compact_graph=self.compact_entity_graph)
 
         self._ensure_external_references_integrity(manifest_analyzer)
 
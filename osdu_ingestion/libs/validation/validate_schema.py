@@ -17,25 +17,39 @@
 
 import copy
 import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from functools import lru_cache
-from typing import Any, List, Tuple, Union
+from http import HTTPStatus
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+from urllib.parse import urldefrag, urljoin, urlsplit
 
 import jsonschema
 import requests
 import tenacity
 from jsonschema import FormatChecker, exceptions
+from jsonschema.exceptions import best_match
 from osdu_api.auth.authorization import TokenRefresher, authorize
 
 from osdu_ingestion.libs.constants import (DATA_SECTION, DATASETS_SECTION,
                                            MASTER_DATA_SECTION,
+                                           MAX_LOGGED_VALIDATION_ERRORS,
                                            REFERENCE_DATA_SECTION,
+                                           SCHEMA_CACHE_TTL,
+                                           SCHEMA_PREFETCH_WORKERS,
+                                           SCHEMA_VALIDATION_FIRST_ERROR_MODE,
+                                           SCHEMA_VALIDATION_FULL_ERROR_MODE,
                                            WORK_PRODUCT_COMPONENTS_SECTION,
                                            WORK_PRODUCT_SECTION)
 from osdu_ingestion.libs.context import Context
 from osdu_ingestion.libs.exceptions import (EntitySchemaValidationError,
                                             GenericManifestSchemaError)
-from osdu_ingestion.libs.linearize_manifest import ManifestEntity
+from osdu_ingestion.libs.http_session import get_default_session
+from osdu_ingestion.libs.linearize_manifest import (ManifestEntity,
+                                                    ManifestLinearizer)
 from osdu_ingestion.libs.mixins import HeadersMixin
+from osdu_ingestion.libs.schema_cache import BaseSchemaCache, SchemaCacheEntry
 
 logger = logging.getLogger()
 
@@ -51,22 +65,161 @@ TIMEOUT = 1
 SurrogateKeysPaths = List[Tuple[Union[str, int]]]
 
 
+class RemoteSchemaStore:
+    """
+    Thread-safe store of resolved remote references keyed by URI.
+    It is shared by all OSDURefResolvers of a Schema service, so each remote document is fetched
+    once per process and TTL. Stored documents must not be modified.
+    """
+
+    def __init__(self, ttl: int = SCHEMA_CACHE_TTL):
+        """
+        :param ttl: Time to live of documents in seconds. Stale documents are fetched again.
+        """
+        self.ttl = ttl
+        # URI -> (document, time it was stored)
+        self._documents = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_fresh_document(self, uri: str) -> Optional[dict]:
+        """
+        Get the document if it is not stale, remove it otherwise. Must be called under the lock.
+
+        :param uri: Normalized URI of the document.
+        :return: Document or None.
+        """
+        document, stored_at = self._documents.get(uri, (None, 0.0))
+        if document is not None and time.time() - stored_at >= self.ttl:
+            del self._documents[uri]
+            return None
+        return document
+
+    @staticmethod
+    def _normalize_uri(uri: str) -> str:
+        return urlsplit(uri).geturl()
+
+    def get(self, uri: str) -> Optional[dict]:
+        """
+        Get resolved document. Count hits and misses.
+
+        :param uri: URI of the document.
+        :return: Document or None.
+        """
+        with self._lock:
+            document = self._get_fresh_document(self._normalize_uri(uri))
+            if document is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return document
+
+    def set(self, uri: str, document: dict):
+        """
+        Save resolved document.
+
+        :param uri: URI of the document.
+        :param document: Document.
+        """
+        with self._lock:
+            self._documents[self._normalize_uri(uri)] = (document, time.time())
+
+    def clear(self):
+        """Remove all the documents and reset counters."""
+        with self._lock:
+            self._documents.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def documents(self) -> Dict[str, dict]:
+        """
+        :return: Copy of URI to fresh document mapping, e.g. to pass it to another process.
+        """
+        with self._lock:
+            return {
+                uri: document for uri, document in (
+                    (uri, self._get_fresh_document(uri)) for uri in list(self._documents)
+                )
+                if document is not None
+            }
+
+    def __contains__(self, uri: str) -> bool:
+        with self._lock:
+            return self._get_fresh_document(self._normalize_uri(uri)) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._documents)
+
+
+# Process-wide stores of remote references by Schema service urls and TTLs.
+# The same URIs (e.g. 'osdu:wks:...') may refer to different documents in different services.
+_remote_schema_stores: Dict[Tuple[str, int], RemoteSchemaStore] = {}
+_remote_schema_stores_lock = threading.Lock()
+
+
+def get_remote_schema_store(schema_service: str, ttl: int = SCHEMA_CACHE_TTL) -> RemoteSchemaStore:
+    """
+    Get the process-wide store of remote references of the Schema service.
+
+    :param schema_service: The base url for schema service.
+    :param ttl: Time to live of documents in seconds.
+    :return: Store shared by all the resolvers of the Schema service.
+    """
+    with _remote_schema_stores_lock:
+        remote_schema_store = _remote_schema_stores.get((schema_service, ttl))
+        if remote_schema_store is None:
+            remote_schema_store = RemoteSchemaStore(ttl)
+            _remote_schema_stores[(schema_service, ttl)] = remote_schema_store
+        return remote_schema_store
+
+
 class OSDURefResolver(jsonschema.RefResolver):
     """Extends base jsonschema resolver for OSDU."""
 
-    def __init__(self, schema_service: str, *args, **kwargs):
+    def __init__(
+        self,
+        schema_service: str,
+        *args,
+        remote_schema_store: RemoteSchemaStore = None,
+        **kwargs
+    ):
         """Implements the schema validatoe
 
         :param schema_service: The base url for schema service
         :type schema_service: str
+        :param remote_schema_store: Store of remote references shared between resolvers,
+            the process-wide one of the schema service by default
+        :type remote_schema_store: RemoteSchemaStore
         """
         super(OSDURefResolver, self).__init__(*args, **kwargs)
         self.schema_service = schema_service
+        self.remote_schema_store = (
+            get_remote_schema_store(schema_service) if remote_schema_store is None
+            else remote_schema_store
+        )
+
+    def resolve_remote(self, uri: str) -> dict:
+        """
+        Resolve a remote reference using the shared store first.
+
+        :param uri: The URI of the referenced document
+        :type uri: str
+        :return: The referenced document
+        :rtype: dict
+        """
+        document = self.remote_schema_store.get(uri)
+        if document is None:
+            document = super().resolve_remote(uri)
+            self.remote_schema_store.set(uri, document)
+        return document
 
     def resolve_fragment(self, document: dict, fragment: str) -> dict:
         """
         Add deleting $id field, as long as RefResolver uses the "$id" for resolving references
         instead of searching for these references in "definitions" field.
+        The field is deleted from a copy of the fragment, documents may be shared by resolvers.
 
         :param document: The schema document
         :type document: dict
@@ -78,11 +231,166 @@ class OSDURefResolver(jsonschema.RefResolver):
         document = super().resolve_fragment(document, fragment)
         # /definitions/<OsduID> -> [..., <OsduID>]
         fragment_parts = fragment.split("/")
-        if len(fragment_parts) > 1:
-            document.pop("$id", None)
+        if len(fragment_parts) > 1 and "$id" in document:
+            document = dict(document)
+            del document["$id"]
         return document
 
 
+def create_schema_validator(
+    schema: dict,
+    schema_service: str,
+    handlers: dict,
+    remote_schema_store: RemoteSchemaStore
+) -> jsonschema.Draft7Validator:
+    """
+    Check the schema itself and build a validator with OSDU resolver and format checker.
+
+    :param schema: The schema to build a validator for.
+    :param schema_service: The base url for schema service.
+    :param handlers: Resolver handlers to fetch remote references by URI scheme.
+    :param remote_schema_store: Store of remote references.
+    :return: Validator ready to validate any number of instances.
+    """
+    validator_cls = jsonschema.validators.validator_for(schema)
+    validator_cls.check_schema(schema)
+    resolver = OSDURefResolver(
+        schema_service=schema_service,
+        base_uri=schema.get("$id", ""),
+        referrer=schema,
+        handlers=handlers,
+        cache_remote=True,
+        remote_schema_store=remote_schema_store
+    )
+    return validator_cls(
+        schema,
+        resolver=resolver,
+        format_checker=FormatChecker(
+            formats=("date-time", "time", "date")
+        )
+    )
+
+
+def find_validation_error(
+    validator: jsonschema.Draft7Validator,
+    data: Any,
+    error_mode: str = SCHEMA_VALIDATION_FULL_ERROR_MODE
+) -> Optional[exceptions.ValidationError]:
+    """
+    Validate data and pick the error to report.
+
+    :param validator: Validator to validate data with.
+    :param data: Any data to validate.
+    :param error_mode: In "full" mode all the errors are collected to pick the most relevant one,
+        in "first_error" mode validation stops at the first error.
+    :return: Validation error or None if the data is valid.
+    """
+    errors = validator.iter_errors(data)
+    if error_mode == SCHEMA_VALIDATION_FIRST_ERROR_MODE:
+        return next(errors, None)
+    return best_match(errors)
+
+
+def describe_validation_error(
+    error: exceptions.ValidationError,
+    error_mode: str = SCHEMA_VALIDATION_FULL_ERROR_MODE
+) -> str:
+    """
+    Format the validation error. In "first_error" mode the description is compact, it contains
+    only the path to the invalid field and the message, without dumps of the schema and the instance.
+
+    :param error: Validation error.
+    :param error_mode: Error mode of validation.
+    :return: Description of the error.
+    """
+    if error_mode == SCHEMA_VALIDATION_FIRST_ERROR_MODE:
+        path = "/".join(str(part) for part in error.absolute_path)
+        return f"{path or '<root>'}: {error.message}"
+    return str(error)
+
+
+def detach_validation_error(
+    error: exceptions.ValidationError,
+    error_mode: str = SCHEMA_VALIDATION_FULL_ERROR_MODE
+) -> exceptions.ValidationError:
+    """
+    Copy only the fields the error is described with, without its parent and context errors,
+    so it is cheap to send from a validation worker and can be described only if it is logged.
+
+    :param error: Validation error.
+    :param error_mode: Error mode of validation.
+    :return: Detached validation error with the same description.
+    """
+    # The compact description uses the absolute path, and the detached error has no parent.
+    path = error.absolute_path if error_mode == SCHEMA_VALIDATION_FIRST_ERROR_MODE else error.relative_path
+    return exceptions.ValidationError(
+        error.message,
+        validator=error.validator,
+        path=path,
+        validator_value=error.validator_value,
+        instance=error.instance,
+        schema=error.schema,
+        schema_path=error.relative_schema_path
+    )
+
+
+# State of a validation worker process. It is filled once by the pool initializer.
+_validation_worker_state = {}
+
+
+def _init_validation_worker(
+    schema_service: str,
+    schemas: Dict[str, dict],
+    remote_documents: Dict[str, dict],
+    error_mode: str
+):
+    """
+    Initialize a validation worker process with prepared schemas and remote documents.
+    Workers don't request Schema service, so everything must be prefetched beforehand.
+
+    :param schema_service: The base url for schema service.
+    :param schemas: Prepared schemas by kinds.
+    :param remote_documents: Documents of remote references by URIs.
+    :param error_mode: Error mode of validation.
+    """
+    remote_schema_store = RemoteSchemaStore()
+    for uri, document in remote_documents.items():
+        remote_schema_store.set(uri, document)
+    _validation_worker_state.update(
+        schema_service=schema_service,
+        schemas=schemas,
+        remote_schema_store=remote_schema_store,
+        error_mode=error_mode,
+        validators={}
+    )
+
+
+def _validate_entity_in_worker(
+    kind_and_entity: Tuple[str, dict]
+) -> Optional[exceptions.ValidationError]:
+    """
+    Validate an entity inside a validation worker process. Errors are described by the main
+    process, only if they are logged.
+
+    :param kind_and_entity: The kind of the entity and the entity itself.
+    :return: Detached validation error if the entity is not valid, otherwise None.
+    """
+    kind, entity = kind_and_entity
+    validators = _validation_worker_state["validators"]
+    validator = validators.get(kind)
+    if validator is None:
+        validator = create_schema_validator(
+            _validation_worker_state["schemas"][kind],
+            _validation_worker_state["schema_service"],
+            handlers={},
+            remote_schema_store=_validation_worker_state["remote_schema_store"]
+        )
+        validators[kind] = validator
+    error_mode = _validation_worker_state["error_mode"]
+    error = find_validation_error(validator, entity, error_mode)
+    return detach_validation_error(error, error_mode) if error is not None else None
+
+
 class SchemaValidator(HeadersMixin):
     """Class to validate schema of Manifests."""
 
@@ -94,15 +402,33 @@ class SchemaValidator(HeadersMixin):
         token_refresher: TokenRefresher,
         context: Context,
         surrogate_key_fields_paths: SurrogateKeysPaths = None,
-        data_types_with_surrogate_ids: List[str] = None
+        data_types_with_surrogate_ids: List[str] = None,
+        prefetch_workers: int = SCHEMA_PREFETCH_WORKERS,
+        schema_cache: BaseSchemaCache = None,
+        remote_schema_store: RemoteSchemaStore = None,
+        validation_workers: int = None,
+        error_mode: str = SCHEMA_VALIDATION_FULL_ERROR_MODE,
+        max_logged_errors: int = MAX_LOGGED_VALIDATION_ERRORS,
+        session: requests.Session = None
     ):
         """Init SchemaValidator.
 
         :param schema_service: The base OSDU Schema service url
         :param token_refresher: An instance of token refresher
         :param context: The tenant context
+        :param prefetch_workers: Max number of concurrent requests while prefetching schemas
+        :param schema_cache: Optional cache to keep schemas between runs
+        :param remote_schema_store: Store of remote references, the process-wide one of
+            the schema service by default. Its documents are kept for the schema cache's TTL
+        :param validation_workers: If more than one, entities are validated by a pool of
+            this number of processes
+        :param error_mode: "full" to report the most relevant of all the errors of an entity,
+            "first_error" to stop validation of an entity at its first error
+        :param max_logged_errors: Max number of rejected entities to log errors of
+        :param session: HTTP session, the shared one is used by default
         """
         super().__init__(context)
+        self.session = session or get_default_session()
         self.schema_service = schema_service
         self.context = context
         self.token_refresher = token_refresher
@@ -113,6 +439,26 @@ class SchemaValidator(HeadersMixin):
         }
         self.surrogate_key_fields_paths = surrogate_key_fields_paths or []
         self.data_types_with_surrogate_ids = data_types_with_surrogate_ids or []
+        self.prefetch_workers = prefetch_workers
+        self.schema_cache = schema_cache
+        if remote_schema_store is None:
+            remote_schema_store = get_remote_schema_store(
+                schema_service, schema_cache.ttl if schema_cache else SCHEMA_CACHE_TTL
+            )
+        self.remote_schema_store = remote_schema_store
+        self.validation_workers = validation_workers
+        if error_mode not in (SCHEMA_VALIDATION_FULL_ERROR_MODE,
+                              SCHEMA_VALIDATION_FIRST_ERROR_MODE):
+            raise ValueError(f"Unknown validation error mode '{error_mode}'")
+        self.error_mode = error_mode
+        self.max_logged_errors = max_logged_errors
+        self._logged_errors_count = 0
+        # Schemas are extended with surrogate keys, checked and built into validators once per
+        # kind and then reused for every entity.
+        self._prepared_schemas: Dict[str, Union[dict, None]] = {}
+        self._kind_validators: Dict[str, jsonschema.Draft7Validator] = {}
+        self._schemas_without_refs: Dict[str, dict] = {}
+        self._common_schema_validators: Dict[str, jsonschema.Draft7Validator] = {}
 
     @tenacity.retry(
         wait=tenacity.wait_fixed(TIMEOUT),
@@ -122,7 +468,7 @@ class SchemaValidator(HeadersMixin):
     @authorize()
     def _get_schema_from_schema_service(self, headers: dict, uri: str) -> requests.Response:
         """Send request to Schema service to retrieve schema."""
-        response = requests.get(uri, headers=headers, timeout=60)
+        response = self.session.get(uri, headers=headers, timeout=60)
         return response
 
     def _clear_data_fields(self, schema_part: Union[dict, list]):
@@ -139,8 +485,57 @@ class SchemaValidator(HeadersMixin):
         if schema_part.get("MasterData"):
             schema_part["MasterData"] = {}
 
+    def _get_schema_cache_key(self, uri: str) -> str:
+        """
+        Get the key of the schema in the cache. It is the kind for schemas got from
+        Schema service, and the URI itself for others.
+
+        :param uri: The URI of the schema
+        :return: The cache key
+        """
+        schema_service_prefix = f"{self.schema_service}/"
+        if uri.startswith(schema_service_prefix):
+            return uri[len(schema_service_prefix):]
+        return uri
+
+    def _get_cached_schema_request(self, uri: str) -> dict:
+        """
+        Get schema from the cache. If the cached schema is stale, revalidate it using its ETag,
+        so Schema service sends the schema again only if it was changed.
+
+        :param uri: The URI to fetch the schema
+        :return: The schema
+        """
+        cache_key = self._get_schema_cache_key(uri)
+        entry = self.schema_cache.get(self.context.data_partition_id, cache_key)
+        if entry and entry.is_fresh(self.schema_cache.ttl):
+            logger.debug(f"Schema '{cache_key}' is taken from cache.")
+            return entry.schema
+
+        headers = self.request_headers
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        response = self._get_schema_from_schema_service(headers, uri)
+
+        if entry and response.status_code == HTTPStatus.NOT_MODIFIED:
+            logger.debug(f"Cached schema '{cache_key}' is not modified.")
+            entry.fetched_at = time.time()
+        else:
+            schema = response.json()
+            schema["$id"] = uri
+            if not response.ok:
+                return schema
+            entry = SchemaCacheEntry(
+                schema=schema,
+                etag=response.headers.get("ETag"),
+                fetched_at=time.time()
+            )
+        self.schema_cache.set(self.context.data_partition_id, cache_key, entry)
+        return entry.schema
+
     def get_schema_request(self, uri: str) -> dict:
         """Get schema from Schema service. Change $id field to url.
+        If the schema cache is set, the schema is taken from it.
 
         :param uri: The URI to fetch the schema
         :type uri: str
@@ -149,6 +544,8 @@ class SchemaValidator(HeadersMixin):
         """
         if uri.startswith("osdu") or uri.startswith(self.context.data_partition_id):
             uri = f"{self.schema_service}/{uri}"
+        if self.schema_cache:
+            return self._get_cached_schema_request(uri)
         response = self._get_schema_from_schema_service(self.request_headers, uri).json()
         response["$id"] = uri
         return response
@@ -157,10 +554,8 @@ class SchemaValidator(HeadersMixin):
     def get_schema(self, kind: str) -> Union[dict, None]:
         """Fetch schema from Schema service.
 
-        Implies that the cache is a one-off.
-
-        @TODO lru_cache should be replaced by generic cache mechanism to work with providers
-        solutions
+        The in-memory cache is a one-off, schemas are kept between runs by the schema cache,
+        if it is set.
 
         :param kind: The kind of the scheema to fetch
         :type kind: str
@@ -177,6 +572,171 @@ class SchemaValidator(HeadersMixin):
             return None
         return response
 
+    @staticmethod
+    def _find_remote_refs(schema: Union[dict, list], base_uri: str) -> Set[str]:
+        """
+        Find URIs of all the documents the schema refers to via '$ref'.
+        Local references (e.g. '#/definitions/...') are skipped.
+
+        :param schema: Schema or any its part.
+        :param base_uri: URI the references are resolved against.
+        :return: Set of URIs without fragments.
+        """
+        remote_refs = set()
+        schema_parts = [schema]
+        while schema_parts:
+            schema_part = schema_parts.pop()
+            if isinstance(schema_part, dict):
+                ref = schema_part.get("$ref")
+                if isinstance(ref, str) and not ref.startswith("#"):
+                    uri, _ = urldefrag(urljoin(base_uri, ref))
+                    remote_refs.add(uri)
+                schema_parts.extend(schema_part.values())
+            elif isinstance(schema_part, list):
+                schema_parts.extend(schema_part)
+        return remote_refs
+
+    def _prefetch_schema(self, kind: str) -> Union[dict, None]:
+        """
+        Fetch the schema of the kind. Errors are not raised here, they are left for validation.
+
+        :param kind: The kind of the schema.
+        :return: Schema or None.
+        """
+        try:
+            return self.get_schema(kind)
+        except Exception as e:
+            logger.warning(f"Can't prefetch schema of kind '{kind}'. {str(e)[:128]}")
+            return None
+
+    def _prefetch_remote_schema(self, uri: str) -> Union[dict, None]:
+        """
+        Fetch a document the schemas refer to. Errors are not raised here, the reference will
+        be resolved during validation.
+
+        :param uri: The URI of the document.
+        :return: Document or None.
+        """
+        try:
+            return self.get_schema_request(uri)
+        except Exception as e:
+            logger.warning(f"Can't prefetch referenced schema '{uri}'. {str(e)[:128]}")
+            return None
+
+    def _get_kind_dependencies(self, kind: str) -> Set[str]:
+        """
+        Fetch the schema of the kind and find the documents it refers to.
+
+        :param kind: The kind of the schema.
+        :return: Set of URIs.
+        """
+        schema = self._prefetch_schema(kind)
+        if not schema:
+            return set()
+        return self._find_remote_refs(schema, schema.get("$id", ""))
+
+    def _get_remote_schema_dependencies(self, uri: str) -> Set[str]:
+        """
+        Fetch the referenced document, if it is not in the store yet, and find the documents
+        it refers to.
+
+        :param uri: The URI of the document.
+        :return: Set of URIs.
+        """
+        document = self.remote_schema_store.get(uri) if uri in self.remote_schema_store else None
+        if document is None:
+            document = self._prefetch_remote_schema(uri)
+            if document:
+                self.remote_schema_store.set(uri, document)
+        if not document:
+            return set()
+        return self._find_remote_refs(document, uri)
+
+    def _resolve_remote_refs_into_store(self, schema: dict) -> bool:
+        """
+        Make sure every document in the schema's '$ref' closure is in the remote schema store.
+        Missing documents (e.g. their prefetching failed) are fetched once more.
+
+        :param schema: The schema.
+        :return: True if the whole closure is in the store.
+        """
+        uris = self._find_remote_refs(schema, schema.get("$id", ""))
+        visited = set()
+        while uris:
+            uri = uris.pop()
+            if uri in visited:
+                continue
+            visited.add(uri)
+            dependencies = self._get_remote_schema_dependencies(uri)
+            if uri not in self.remote_schema_store:
+                return False
+            uris.update(dependencies)
+        return True
+
+    def get_schemas_dependency_graph(self, kinds: Iterable[str]) -> Dict[str, Set[str]]:
+        """
+        Walk the '$ref' closure of the kinds' schemas. Schemas and referenced documents are
+        fetched concurrently, each wave fetches documents referred by the previous one.
+        Fetched referenced documents are put into the remote schema store.
+
+        :param kinds: Kinds of schemas.
+        :return: Graph with kinds and URIs of referenced documents as nodes, each node is mapped
+            to the set of URIs it refers to. Nodes that can't be fetched have no dependencies.
+        """
+        kinds = list(set(kinds))
+        dependency_graph = {}
+        with ThreadPoolExecutor(max_workers=self.prefetch_workers) as executor:
+            uris = set()
+            for kind, dependencies in zip(kinds, executor.map(self._get_kind_dependencies, kinds)):
+                dependency_graph[kind] = dependencies
+                uris.update(dependencies)
+
+            while uris:
+                uris = [uri for uri in uris if uri not in dependency_graph]
+                next_uris = set()
+                for uri, dependencies in zip(
+                    uris, executor.map(self._get_remote_schema_dependencies, uris)
+                ):
+                    dependency_graph[uri] = dependencies
+                    next_uris.update(dependencies)
+                uris = next_uris
+        return dependency_graph
+
+    def prefetch_schemas(self, kinds: Iterable[str]):
+        """
+        Fetch schemas of the kinds and documents they refer to concurrently and build
+        validators for them, so that validation of entities doesn't wait for Schema service.
+
+        :param kinds: Kinds of entities to be validated.
+        """
+        kinds = [kind for kind in set(kinds) if kind not in self._kind_validators]
+        if not kinds:
+            return
+
+        self.get_schemas_dependency_graph(kinds)
+
+        for kind in kinds:
+            schema = self.get_prepared_schema(kind)
+            if not schema:
+                continue
+            try:
+                self._get_kind_validator(kind, schema)
+            except jsonschema.SchemaError as e:
+                logger.warning(f"Schema of kind '{kind}' is invalid. {str(e)[:128]}")
+
+    def prefetch_manifest_schemas(self, manifest_records: List[ManifestEntity]):
+        """
+        Prefetch schemas of all the kinds present in manifest records.
+
+        :param manifest_records: List of manifest's records.
+        """
+        kinds = {
+            record.entity_data["kind"] for record in manifest_records
+            if isinstance(record.entity_data, dict) and isinstance(record.entity_data.get("kind"), str)
+        }
+        logger.debug(f"Prefetch schemas of kinds: {kinds}")
+        self.prefetch_schemas(kinds)
+
     @staticmethod
     def _extend_pattern_with_surrogate_key(pattern: str) -> str:
         """
@@ -263,14 +823,36 @@ class SchemaValidator(HeadersMixin):
         schema = self._extend_referential_patterns_with_surrogate_keys(schema)
         return schema
 
-    def _validate_entity(self, entity: dict, schema: dict = None) -> None:
+    def _prepare_schema(self, schema: dict) -> dict:
         """
-        Validate an entity against a schema.
-        If the entity is valid, then return True, otherwise, False.
-        If the schema isn't passed, get it from Schema service.
+        Make a copy of the schema with patterns extended with surrogate keys.
+        The original schema stays untouched.
+
+        :param schema: Original schema.
+        :return: Prepared schema.
+        """
+        return self._add_surrogate_keys_to_patterns(copy.deepcopy(schema))
+
+    def get_prepared_schema(self, kind: str) -> Union[dict, None]:
+        """
+        Get the schema of the kind ready for entity validation.
+        The schema is fetched and extended with surrogate keys only once per kind,
+        the result is cached and must not be modified afterwards.
+
+        :param kind: The kind of the schema.
+        :return: Prepared schema or None if the kind is not present in Schema service.
+        """
+        if kind not in self._prepared_schemas:
+            schema = self.get_schema(kind)
+            self._prepared_schemas[kind] = self._prepare_schema(schema) if schema else None
+        return self._prepared_schemas[kind]
+
+    @staticmethod
+    def _check_entity(entity: Any):
+        """
+        Check if the entity can be validated against a schema.
 
         :param entity: A manifest's entity.
-        :param schema: The schema to validate an entity against.
         """
         if not isinstance(entity, dict):
             raise EntitySchemaValidationError(entity, "Entity must be type of dict.")
@@ -278,45 +860,185 @@ class SchemaValidator(HeadersMixin):
         if not entity.get("kind"):
             raise EntitySchemaValidationError(entity, "Kind field is absent")
 
+    def _get_entity_schema(self, entity: dict) -> dict:
+        """
+        Get the prepared schema of the entity's kind.
+
+        :param entity: A manifest's entity.
+        :return: Prepared schema.
+        """
+        schema = self.get_prepared_schema(entity["kind"])
         if not schema:
-            schema = self.get_schema(entity["kind"])
-            if not schema:
-                logger.warning(f"{entity['kind']} is not present in Schema service.")
-                raise EntitySchemaValidationError(entity, "Kind is not present in Schema service")
+            logger.warning(f"{entity['kind']} is not present in Schema service.")
+            raise EntitySchemaValidationError(entity, "Kind is not present in Schema service")
+        return schema
+
+    def _reject_entity(
+        self,
+        entity: dict,
+        error: exceptions.ValidationError
+    ) -> EntitySchemaValidationError:
+        """
+        Log the reason the entity failed the validation. Errors are formatted only when they
+        are logged, and no more than max_logged_errors of them are logged.
+
+        :param entity: A manifest's entity.
+        :param error: Validation error.
+        :return: Error to raise or to take the skipped entity info from.
+        """
+        if self._logged_errors_count < self.max_logged_errors:
+            if logger.isEnabledFor(logging.ERROR):
+                logger.error("Schema validation error. Data field.")
+                logger.error(f"Manifest kind: {entity['kind']}")
+                logger.error(f"Error: {describe_validation_error(error, self.error_mode)}")
+        elif self._logged_errors_count == self.max_logged_errors:
+            logger.error(f"More than {self.max_logged_errors} entities failed the schema "
+                         f"validation. Errors of the rest of them are not logged.")
+        self._logged_errors_count += 1
+        return EntitySchemaValidationError(entity, "Entity doesn't pass the schema validation.")
+
+    def _validate_entity(self, entity: dict, schema: dict = None) -> None:
+        """
+        Validate an entity against a schema.
+        If the entity is valid, then return True, otherwise, False.
+        If the schema isn't passed, get it from Schema service.
+
+        :param entity: A manifest's entity.
+        :param schema: The schema to validate an entity against.
+        """
+        self._check_entity(entity)
+
+        if schema:
+            schema = self._prepare_schema(schema)
+            validator_kind = None
+        else:
+            schema = self._get_entity_schema(entity)
+            validator_kind = entity["kind"]
 
         try:
-            schema = self._add_surrogate_keys_to_patterns(schema)
-            self._validate_against_schema(schema, entity)
+            self._validate_against_schema(schema, entity, kind=validator_kind)
             logger.debug(f"Record successfully validated")
         except exceptions.ValidationError as exc:
-            logger.error("Schema validation error. Data field.")
-            logger.error(f"Manifest kind: {entity['kind']}")
-            logger.error(f"Error: {exc}")
-            raise EntitySchemaValidationError(entity, "Entity doesn't pass the schema validation.")
+            raise self._reject_entity(entity, exc)
 
-    def _validate_against_schema(self, schema: dict, data: Any):
+    def _validate_entities_in_parallel(self, entities: List[Any]) -> List[Optional[dict]]:
+        """
+        Validate entities by a pool of processes. Prepared schemas and remote documents are
+        shipped to each worker once, when the worker starts. Entities of kinds with unresolved
+        remote references are validated in this process.
+
+        :param entities: Manifest's entities.
+        :return: Skipped entity info or None for each entity in the same order.
+        """
+        results = [None] * len(entities)
+        schemas = {}
+        # Kinds whose '$ref' closure is not in the store are validated in this process, where
+        # missing references are resolved lazily. Workers can't request Schema service.
+        in_process_kinds = set()
+        tasks = []
+        for index, entity in enumerate(entities):
+            try:
+                self._check_entity(entity)
+                kind = entity["kind"]
+                if kind not in schemas and kind not in in_process_kinds:
+                    schema = self._get_entity_schema(entity)
+                    if self._resolve_remote_refs_into_store(schema):
+                        schemas[kind] = schema
+                    else:
+                        logger.warning(f"References of kind '{kind}' are not resolved, "
+                                       f"its entities are validated in the main process.")
+                        in_process_kinds.add(kind)
+                if kind in in_process_kinds:
+                    self._validate_entity(entity)
+                    continue
+            except EntitySchemaValidationError as error:
+                results[index] = error.skipped_entity
+            else:
+                tasks.append(index)
+
+        if tasks:
+            chunksize = max(1, len(tasks) // (self.validation_workers * 4))
+            with ProcessPoolExecutor(
+                max_workers=self.validation_workers,
+                initializer=_init_validation_worker,
+                initargs=(self.schema_service, schemas, self.remote_schema_store.documents(),
+                          self.error_mode)
+            ) as executor:
+                errors = executor.map(
+                    _validate_entity_in_worker,
+                    [(entities[index]["kind"], entities[index]) for index in tasks],
+                    chunksize=chunksize
+                )
+                for index, error in zip(tasks, errors):
+                    if error is not None:
+                        results[index] = self._reject_entity(entities[index], error).skipped_entity
+        return results
+
+    def _validate_entities(self, entities: List[Any]) -> List[Optional[dict]]:
+        """
+        Validate entities one-by-one or by a pool of processes, if validation workers are set.
+
+        :param entities: Manifest's entities.
+        :return: Skipped entity info or None for each entity in the same order.
+        """
+        if self.validation_workers and self.validation_workers > 1 and len(entities) > 1:
+            return self._validate_entities_in_parallel(entities)
+
+        results = []
+        for entity in entities:
+            try:
+                self._validate_entity(entity)
+            except EntitySchemaValidationError as error:
+                results.append(error.skipped_entity)
+            else:
+                results.append(None)
+        return results
+
+    def _create_validator(self, schema: dict) -> jsonschema.Draft7Validator:
+        """
+        Build a validator using resolver handlers of this SchemaValidator.
+
+        :param schema: The schema to build a validator for.
+        :return: Validator ready to validate any number of instances.
+        """
+        return create_schema_validator(
+            schema,
+            self.schema_service,
+            self.resolver_handlers,
+            self.remote_schema_store
+        )
+
+    def _get_kind_validator(self, kind: str, schema: dict) -> jsonschema.Draft7Validator:
+        """
+        Get the validator of the kind from cache. Build it from the schema on the first call.
+
+        :param kind: The kind the schema belongs to.
+        :param schema: The schema of the kind.
+        :return: Cached validator.
+        """
+        validator = self._kind_validators.get(kind)
+        if validator is None:
+            validator = self._create_validator(schema)
+            self._kind_validators[kind] = validator
+        return validator
+
+    def _validate_against_schema(self, schema: dict, data: Any, kind: str = None):
         """
         Validate any data against schema. If the data is not valid, raises ValidationError.
+        If the kind is passed, the validator built for this kind is reused.
 
         :param schema: The schema to validate an entity against.
         :param data: Any data to validate against schema.
+        :param kind: The kind of the schema.
         :return:
         """
-        resolver = OSDURefResolver(
-            schema_service=self.schema_service,
-            base_uri=schema.get("$id", ""),
-            referrer=schema,
-            handlers=self.resolver_handlers,
-            cache_remote=True
-        )
-        jsonschema.validate(
-            schema=schema,
-            instance=data,
-            resolver=resolver,
-            format_checker=FormatChecker(
-                formats=("date-time", "time", "date")
-            )
-        )
+        if kind:
+            validator = self._get_kind_validator(kind, schema)
+        else:
+            validator = self._create_validator(schema)
+        error = find_validation_error(validator, data, self.error_mode)
+        if error is not None:
+            raise error
 
     @staticmethod
     def get_manifest_kind(manifest: dict) -> str:
@@ -346,21 +1068,43 @@ class SchemaValidator(HeadersMixin):
             raise GenericManifestSchemaError(
                 f"There is no schema for Manifest kind {kind}")
 
-        schema_without_refs = copy.deepcopy(schema)
-        if schema_without_refs.get("properties"):
-            self._clear_data_fields(schema_without_refs["properties"])
-        else:
-            self._clear_data_fields(schema_without_refs)
-        logger.debug("Schema without refs")
-        logger.debug(f"{schema_without_refs}")
+        validator = self._common_schema_validators.get(kind)
+        if validator is None:
+            validator = self._create_validator(self.get_schema_without_refs(kind, schema))
+            self._common_schema_validators[kind] = validator
 
-        try:
-            self._validate_against_schema(schema_without_refs, manifest)
-        except jsonschema.ValidationError as err:
-            raise GenericManifestSchemaError(f"Manifest failed generic schema validation.\n {err}")
+        error = find_validation_error(validator, manifest, self.error_mode)
+        if error is not None:
+            raise GenericManifestSchemaError(
+                f"Manifest failed generic schema validation.\n "
+                f"{describe_validation_error(error, self.error_mode)}"
+            )
 
         return schema
 
+    def get_schema_without_refs(self, kind: str, schema: dict) -> dict:
+        """
+        Get the Manifest schema with cleared ReferenceData, Data and MasterData fields.
+        It is derived once per kind. Only the changed levels are copied, the rest of the
+        schema is shared with the original one, so the result must not be modified.
+
+        :param kind: Manifest kind.
+        :param schema: Manifest schema.
+        :return: Schema without refs.
+        """
+        schema_without_refs = self._schemas_without_refs.get(kind)
+        if schema_without_refs is None:
+            schema_without_refs = dict(schema)
+            if schema_without_refs.get("properties"):
+                schema_without_refs["properties"] = dict(schema_without_refs["properties"])
+                self._clear_data_fields(schema_without_refs["properties"])
+            else:
+                self._clear_data_fields(schema_without_refs)
+            logger.debug("Schema without refs")
+            logger.debug(f"{schema_without_refs}")
+            self._schemas_without_refs[kind] = schema_without_refs
+        return schema_without_refs
+
     def _validate_work_product(self, entity: dict) -> dict:
         """
         Validate a single entity. If the entity is valid, then return it,.
@@ -385,11 +1129,9 @@ class SchemaValidator(HeadersMixin):
         """
         valid_entities = []
         skipped_entities = []
-        for entity in manifest_section:
-            try:
-                self._validate_entity(entity)
-            except EntitySchemaValidationError as error:
-                skipped_entities.append(error.skipped_entity)
+        for entity, skipped_entity in zip(manifest_section, self._validate_entities(manifest_section)):
+            if skipped_entity:
+                skipped_entities.append(skipped_entity)
             else:
                 valid_entities.append(entity)
         return valid_entities, skipped_entities
@@ -405,29 +1147,70 @@ class SchemaValidator(HeadersMixin):
         """
         validated_records = []
         skipped_entities = []
-        for manifest_record in manifest_records:
-            entity = manifest_record.entity_data
-            try:
-                self._validate_entity(entity)
-            except EntitySchemaValidationError as error:
-                skipped_entities.append(error.skipped_entity)
+        self._logged_errors_count = 0
+        self.prefetch_manifest_schemas(manifest_records)
+        validation_results = self._validate_entities(
+            [manifest_record.entity_data for manifest_record in manifest_records]
+        )
+        for manifest_record, skipped_entity in zip(manifest_records, validation_results):
+            if skipped_entity:
+                skipped_entities.append(skipped_entity)
             else:
                 validated_records.append(manifest_record)
         return validated_records, skipped_entities
 
+    def _validate_manifest_sections(self, manifest_sections: List[List[dict]]) -> Tuple[
+        List[List[dict]], List[dict]]:
+        """
+        Validate entities of several Manifest's sections at once.
+
+        :param manifest_sections: Manifest sections
+        :return: Valid entities of each section and skipped entities of all the sections
+        """
+        entities = [entity for manifest_section in manifest_sections for entity in manifest_section]
+        validation_results = iter(self._validate_entities(entities))
+        valid_sections = []
+        skipped_entities = []
+        for manifest_section in manifest_sections:
+            valid_entities = []
+            for entity in manifest_section:
+                skipped_entity = next(validation_results)
+                if skipped_entity:
+                    skipped_entities.append(skipped_entity)
+                else:
+                    valid_entities.append(entity)
+            valid_sections.append(valid_entities)
+        return valid_sections, skipped_entities
+
     def ensure_manifest_validity(self, manifest: dict) -> Tuple[dict, List[dict]]:
         """
         Validate manifest entities inside manifest and return only valid entities with saved structure
 
         """
         skipped_entities = []
-        for data_type in (REFERENCE_DATA_SECTION, MASTER_DATA_SECTION):
-            if manifest.get(data_type):
-                valid_entities, not_valid_entities = self._validate_manifest_section(
-                    manifest[data_type]
-                )
-                manifest[data_type] = valid_entities
-                skipped_entities.extend(not_valid_entities)
+        self._logged_errors_count = 0
+        if manifest:
+            self.prefetch_manifest_schemas(ManifestLinearizer().linearize_manifest(manifest))
+
+        # Sections are validated together to start validation workers only once.
+        section_paths = [(data_type,) for data_type in (REFERENCE_DATA_SECTION, MASTER_DATA_SECTION)
+                         if manifest.get(data_type)]
+        if manifest.get(DATA_SECTION):
+            section_paths.extend(
+                (DATA_SECTION, data_type)
+                for data_type in (WORK_PRODUCT_COMPONENTS_SECTION, DATASETS_SECTION)
+                if manifest[DATA_SECTION].get(data_type)
+            )
+        sections = [
+            manifest[path[0]] if len(path) == 1 else manifest[path[0]][path[1]]
+            for path in section_paths
+        ]
+        valid_sections, not_valid_entities = self._validate_manifest_sections(sections)
+        for path, valid_entities in zip(section_paths, valid_sections):
+            if len(path) == 1:
+                manifest[path[0]] = valid_entities
+            else:
+                manifest[path[0]][path[1]] = valid_entities
 
         if manifest.get(DATA_SECTION):
             if manifest[DATA_SECTION].get(WORK_PRODUCT_SECTION):
@@ -437,12 +1220,5 @@ class SchemaValidator(HeadersMixin):
                     manifest[DATA_SECTION][WORK_PRODUCT_SECTION] = {}
                     skipped_entities.append(error.skipped_entity)
 
-            for data_type in (WORK_PRODUCT_COMPONENTS_SECTION, DATASETS_SECTION):
-                if manifest[DATA_SECTION].get(data_type):
-                    valid_entities, not_valid_entities = self._validate_manifest_section(
-                        manifest[DATA_SECTION][data_type]
-                    )
-                    manifest[DATA_SECTION][data_type] = valid_entities
-                    skipped_entities.extend(not_valid_entities)
-
+        skipped_entities.extend(not_valid_entities)
         return manifest, skipped_entities
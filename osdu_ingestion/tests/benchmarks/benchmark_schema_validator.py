@@ -0,0 +1,272 @@
+#  Copyright 2021 Google LLC
+#  Copyright 2021 EPAM Systems
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Offline benchmark of SchemaValidator on synthetic R3 manifests.
+
+Manifests are built from the fixtures of libs-unit-tests, schemas are served by a local stub,
+so neither Schema service nor network access is required.
+
+Usage:
+    export CLOUD_PROVIDER=provider_test
+    PYTHONPATH=. python osdu_ingestion/tests/benchmarks/benchmark_schema_validator.py --entities 2000 \
+        --mix wpc=4,dataset=4,wp=1,master=1 --invalid-ratio 0.1
+"""
+
+import argparse
+import copy
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+LIBS_UNIT_TESTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   "libs-unit-tests")
+sys.path.insert(0, LIBS_UNIT_TESTS_DIR)
+os.environ.setdefault("CLOUD_PROVIDER", "provider_test")
+
+from file_paths import (SCHEMA_FILE_VALID_PATH, SCHEMA_SEISMIC_TRACE_DATA_VALID_PATH,
+                        SCHEMA_TEST_MASTERDATA_PATH, SCHEMA_WORK_PRODUCT_VALID_PATH,
+                        TRAVERSAL_SEISMIC_TRACE_DATA_VALID_PATH, TRAVERSAL_WELLBORE_VALID_PATH)
+from mock_providers import get_test_credentials
+from osdu_ingestion.libs.constants import (DATA_SECTION, DATASETS_SECTION, MASTER_DATA_SECTION,
+                                           WORK_PRODUCT_COMPONENTS_SECTION, WORK_PRODUCT_SECTION)
+from osdu_ingestion.libs.context import Context
+from osdu_ingestion.libs.linearize_manifest import ManifestEntity, ManifestLinearizer
+from osdu_ingestion.libs.refresh_token import BaseTokenRefresher
+from osdu_ingestion.libs.validation.validate_schema import RemoteSchemaStore, SchemaValidator
+
+STUB_SCHEMAS = {
+    "WorkProduct": SCHEMA_WORK_PRODUCT_VALID_PATH,
+    "SeismicTraceData": SCHEMA_SEISMIC_TRACE_DATA_VALID_PATH,
+    "File": SCHEMA_FILE_VALID_PATH,
+    "TestMaster": SCHEMA_TEST_MASTERDATA_PATH,
+}
+
+# Entity templates by short names used in --mix: (manifest path, traversal file, index).
+ENTITY_TEMPLATES = {
+    "wp": (f"{DATA_SECTION}.{WORK_PRODUCT_SECTION}", TRAVERSAL_SEISMIC_TRACE_DATA_VALID_PATH, 0),
+    "wpc": (f"{DATA_SECTION}.{WORK_PRODUCT_COMPONENTS_SECTION}",
+            TRAVERSAL_SEISMIC_TRACE_DATA_VALID_PATH, 1),
+    "dataset": (f"{DATA_SECTION}.{DATASETS_SECTION}", TRAVERSAL_SEISMIC_TRACE_DATA_VALID_PATH, 2),
+    "master": (MASTER_DATA_SECTION, TRAVERSAL_WELLBORE_VALID_PATH, 0),
+}
+
+
+class StubSchemaService:
+    """Serve schemas from the fixture files and count requests."""
+
+    def __init__(self):
+        self.requests_count = 0
+        self._schemas = {}
+        for name, path in STUB_SCHEMAS.items():
+            with open(path) as f:
+                self._schemas[name] = json.load(f)
+
+    def get_schema_request(self, uri: str) -> dict:
+        self.requests_count += 1
+        for name, schema in self._schemas.items():
+            if f":{name}:" in uri:
+                return copy.deepcopy(schema)
+        # Referenced abstract schemas are not present among fixtures.
+        return {"type": "object"}
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    """
+    :param mix: Kind mix like 'wpc=4,dataset=4,wp=1,master=1'.
+    :return: Weights by template names.
+    """
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        if name not in ENTITY_TEMPLATES:
+            raise argparse.ArgumentTypeError(
+                f"Unknown entity '{name}', choose from {sorted(ENTITY_TEMPLATES)}")
+        weights[name] = int(weight or 1)
+    return weights
+
+
+def build_manifest_records(
+    entities_number: int,
+    weights: Dict[str, int],
+    invalid_ratio: float
+) -> List[ManifestEntity]:
+    """
+    Build synthetic linearized manifest. Invalid entities are spread evenly.
+
+    :param entities_number: Number of entities.
+    :param weights: Weights of entity templates.
+    :param invalid_ratio: Share of entities which don't pass the validation.
+    :return: Manifest records.
+    """
+    templates = []
+    for name, weight in weights.items():
+        manifest_path, traversal_path, index = ENTITY_TEMPLATES[name]
+        with open(traversal_path) as f:
+            entity = json.load(f)[index]["entity_data"]
+        templates.extend([(manifest_path, entity)] * weight)
+
+    invalid_every = int(1 / invalid_ratio) if invalid_ratio else 0
+    manifest_records = []
+    for number in range(entities_number):
+        manifest_path, entity = templates[number % len(templates)]
+        entity = copy.deepcopy(entity)
+        if invalid_every and number % invalid_every == 0:
+            entity["id"] = 1
+        manifest_records.append(ManifestEntity(entity_data=entity, manifest_path=manifest_path))
+    return manifest_records
+
+
+def build_manifest(manifest_records: List[ManifestEntity]) -> dict:
+    """
+    Assemble R3 manifest from its linearized records.
+    A manifest has only one WorkProduct, so the last WorkProduct record is kept.
+
+    :param manifest_records: Manifest records.
+    :return: Manifest.
+    """
+    manifest = {MASTER_DATA_SECTION: [], DATA_SECTION: {WORK_PRODUCT_COMPONENTS_SECTION: [],
+                                                        DATASETS_SECTION: []}}
+    for record in manifest_records:
+        entity = copy.deepcopy(record.entity_data)
+        if record.manifest_path == MASTER_DATA_SECTION:
+            manifest[MASTER_DATA_SECTION].append(entity)
+        elif record.manifest_path.endswith(WORK_PRODUCT_SECTION):
+            manifest[DATA_SECTION][WORK_PRODUCT_SECTION] = entity
+        else:
+            manifest[DATA_SECTION][record.manifest_path.split(".")[1]].append(entity)
+    return manifest
+
+
+def create_schema_validator(args: argparse.Namespace) -> Tuple[SchemaValidator, StubSchemaService]:
+    schema_service = StubSchemaService()
+    validator = SchemaValidator(
+        "",
+        BaseTokenRefresher(get_test_credentials()),
+        Context(app_key="", data_partition_id="opendes"),
+        remote_schema_store=RemoteSchemaStore(),
+        validation_workers=args.workers,
+        error_mode=args.error_mode
+    )
+    validator.get_schema_request = schema_service.get_schema_request
+    return validator, schema_service
+
+
+def percentile(values: List[float], percent: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[percent - 1]
+
+
+def run_benchmark(
+    name: str,
+    args: argparse.Namespace,
+    entities_number: int,
+    prepare: Callable[[], Any],
+    run: Callable[[SchemaValidator, Any], None]
+) -> dict:
+    """
+    Run the benchmark on a new validator for each repeat, so schema fetching is included.
+
+    :param name: Benchmark name.
+    :param args: Command line arguments.
+    :param entities_number: Number of entities validated by each run.
+    :param prepare: Callable preparing the input of a run, it is neither timed nor traced.
+    :param run: Callable validating the prepared synthetic manifest.
+    :return: Results.
+    """
+    durations = []
+    latencies = []
+    for _ in range(args.repeat):
+        validator, schema_service = create_schema_validator(args)
+        data = prepare()
+        validate_entity = validator._validate_entity
+
+        def timed_validate_entity(*validate_args, **validate_kwargs):
+            start = time.perf_counter()
+            try:
+                return validate_entity(*validate_args, **validate_kwargs)
+            finally:
+                latencies.append(time.perf_counter() - start)
+
+        validator._validate_entity = timed_validate_entity
+        start = time.perf_counter()
+        run(validator, data)
+        durations.append(time.perf_counter() - start)
+
+    validator, _ = create_schema_validator(args)
+    data = prepare()
+    tracemalloc.start()
+    run(validator, data)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    duration = min(durations)
+    # Entities validated in worker processes are not timed one by one.
+    if args.workers and args.workers > 1:
+        latencies = []
+    return {
+        "benchmark": name,
+        "entities": entities_number,
+        "entities_per_sec": round(entities_number / duration, 1),
+        "best_duration_sec": round(duration, 4),
+        "p50_latency_ms": round(percentile(latencies, 50) * 1000, 4) if latencies else None,
+        "p99_latency_ms": round(percentile(latencies, 99) * 1000, 4) if latencies else None,
+        "peak_memory_mb": round(peak_memory / 2 ** 20, 2),
+        "schema_requests": schema_service.requests_count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=1000, help="Entities in the manifest")
+    parser.add_argument("--mix", type=parse_mix, default="wpc=4,dataset=4,wp=1,master=1",
+                        help=f"Kind mix, weights of {sorted(ENTITY_TEMPLATES)}")
+    parser.add_argument("--invalid-ratio", type=float, default=0.0,
+                        help="Share of entities failing the validation")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeats, the best one is reported")
+    parser.add_argument("--workers", type=int, default=None, help="Validation workers")
+    parser.add_argument("--error-mode", choices=("full", "first_error"), default="full")
+    parser.add_argument("--json", action="store_true", help="Print results as json lines")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    manifest_records = build_manifest_records(args.entities, args.mix, args.invalid_ratio)
+    manifest = build_manifest(manifest_records)
+
+    results = [
+        run_benchmark("validate_manifest", args, len(manifest_records),
+                      lambda: manifest_records,
+                      lambda validator, records: validator.validate_manifest(records)),
+        run_benchmark("ensure_manifest_validity", args,
+                      len(ManifestLinearizer().linearize_manifest(manifest)),
+                      lambda: copy.deepcopy(manifest),
+                      lambda validator, manifest_copy: validator.ensure_manifest_validity(manifest_copy)),
+    ]
+    for result in results:
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(", ".join(f"{key}: {value}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#  Copyright 2021 Google LLC
+#  Copyright 2021 EPAM Systems
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+import pytest
+import requests
+import responses
+
+from mock_providers import get_test_credentials
+from mock_responses import MockWorkflowResponse
+from osdu_ingestion.libs import http_session
+from osdu_ingestion.libs.context import Context
+from osdu_ingestion.libs.http_session import create_session, get_default_session, set_default_session
+from osdu_ingestion.libs.refresh_token import BaseTokenRefresher
+from osdu_ingestion.libs.search_record_ids import ExtendedSearchId
+from osdu_ingestion.libs.update_status import UpdateStatus
+
+
+class TestHttpSession:
+
+    @pytest.fixture(autouse=True)
+    def restore_default_session(self, monkeypatch):
+        monkeypatch.setattr(http_session, "_default_session", None)
+
+    @pytest.mark.parametrize(
+        "url",
+        [
+            pytest.param("https://storage/api/storage/v2/records", id="HTTPS"),
+            pytest.param("http://storage/api/storage/v2/records", id="HTTP"),
+        ]
+    )
+    def test_create_session_pools(self, url: str):
+        session = create_session(pool_connections=2, pool_maxsize=32)
+        adapter = session.get_adapter(url)
+        assert adapter._pool_connections == 2
+        assert adapter._pool_maxsize == 32
+
+    @responses.activate
+    def test_session_does_not_keep_cookies(self):
+        responses.add(responses.GET, "http://workflow/first", headers={"Set-Cookie": "tenant=opendes; Path=/"})
+        responses.add(responses.GET, "http://workflow/second")
+        session = create_session()
+        session.get("http://workflow/first")
+        session.get("http://workflow/second")
+        assert not session.cookies
+        assert "Cookie" not in responses.calls[1].request.headers
+
+    def test_default_session_is_shared(self):
+        context = Context(app_key="", data_partition_id="opendes")
+        token_refresher = BaseTokenRefresher(get_test_credentials())
+        first_search = ExtendedSearchId("http://search", ["id"], token_refresher, context)
+        second_search = ExtendedSearchId("http://search", ["id"], token_refresher, context)
+        assert first_search.session is second_search.session is get_default_session()
+
+        session = create_session()
+        set_default_session(session)
+        assert ExtendedSearchId("http://search", ["id"], token_refresher, context).session is session
+
+    def test_injected_session_is_used(self, monkeypatch):
+        session = create_session()
+        sent_requests = []
+        monkeypatch.setattr(session, "put",
+                            lambda *args, **kwargs: sent_requests.append(args) or MockWorkflowResponse())
+        monkeypatch.setattr(requests, "put", lambda *args, **kwargs: pytest.fail("New connection is opened"))
+        status_updater = UpdateStatus(
+            workflow_name="test_workflow",
+            workflow_id="",
+            run_id="test_run",
+            workflow_url="http://workflow",
+            status="finished",
+            token_refresher=BaseTokenRefresher(get_test_credentials()),
+            context=Context(app_key="", data_partition_id="opendes"),
+            session=session
+        )
+        status_updater.update_workflow_status()
+        assert len(sent_requests) == 1
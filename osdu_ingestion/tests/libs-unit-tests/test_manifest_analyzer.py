@@ -14,22 +14,46 @@
 #  limitations under the License.
 
 
+import copy
 import json
 import logging
 import uuid
 
 from functools import partial
-from typing import List
+from unittest.mock import PropertyMock, patch
+from typing import List, Set
 
 import pytest
 from file_paths import SURROGATE_MANIFEST_WELLBORE, REF_RESULT_WHITELIST_WELLLOG_PATH, \
-    MANIFEST_WELLLOG_PATH, MANIFEST_REFERENCE_PATTERNS_WHITELIST
-from osdu_ingestion.libs.manifest_analyzer import ManifestAnalyzer, EntityNode
+    MANIFEST_WELLLOG_PATH, MANIFEST_REFERENCE_PATTERNS_WHITELIST, \
+    TRAVERSAL_SEISMIC_TRACE_DATA_VALID_PATH
+from osdu_ingestion.libs.manifest_analyzer import (ManifestAnalyzer, EntityNode, WhitelistRefPatterns,
+                                                   NO_ENTITY_NODES)
+from osdu_ingestion.libs.exceptions import CircularDependencyError
 from osdu_ingestion.libs.linearize_manifest import ManifestEntity, ManifestLinearizer
 from osdu_ingestion.libs.utils import EntityId, split_id
 
 logger = logging.getLogger()
 
+TEST_ISLANDS_DATA = [
+    {
+        "id": "surrogate-key:a1",
+        "unit": "osdu:reference-data--UnitOfMeasure:m:"
+    },
+    {
+        "id": "surrogate-key:a2",
+        "parent": "surrogate-key:a1"
+    },
+    {
+        "id": "osdu:master-data--Well:b1",
+        "unit": "osdu:reference-data--UnitOfMeasure:m:"
+    },
+    {
+        "id": "osdu:master-data--Wellbore:b2",
+        "parent": "osdu:master-data--Well:b1:"
+    },
+]
+
 TEST_FAKE_DATA = [
         {
             "id": "1",
@@ -63,6 +87,30 @@ TEST_FAKE_DATA = [
 
 TEST_FAKE_DATA = [ManifestEntity(entity_data=i, manifest_path="") for i in TEST_FAKE_DATA]
 
+TEST_TRICKY_REFERENCES_DATA = {
+    "id": "opendes:work-product-component--WellLog:1",
+    "trailing-colon": "opendes:master-data--Well:1:",
+    "list": [
+        "surrogate-key:wpc 1",
+        "prefix opendes:master-data--Well:2",
+        "quoted \"opendes:master-data--Well:3\" value",
+        "\u00fcnicode opendes:master-data--Well:4",
+        "opendes:master-data--Wellbore:\u00fc5",
+        "opendes:master-data--Well:6,opendes:master-data--Well:7",
+        "line\nopendes:master-data--Well:8",
+        "back\\slash:opendes:master-data--Well:9",
+        "", ":", 10, None, True, [], {}
+    ],
+    "opendes:reference-data--Key:1:": {"nested": "opendes:master-data--Well:10"},
+    "opendes:reference-data--Key:2:": "opendes:master-data--Well:11",
+    "opendes:reference-data--Key:3:": [1, {"a": "opendes:master-data--Well:12"}],
+    "opendes:master-data--Well:13": 1,
+    "opendes:reference-data--Key:": {"nested": "opendes:master-data--Well:14"},
+    "opendes:reference-data--Key:4": 1,
+    "CurveUnit": "opendes:reference-data--UnitOfMeasure:GAPI:",
+    "data": {"CurveUnit": "opendes:reference-data--UnitOfMeasure:V/V:"},
+}
+
 class TestManifestAnalyzer(object):
 
     @pytest.fixture()
@@ -83,6 +131,20 @@ class TestManifestAnalyzer(object):
         manifest_analyzer = ManifestAnalyzer(data)
         return manifest_analyzer
 
+    @staticmethod
+    def find_parent_srns_in_serialized_entity(entity_node: EntityNode) -> Set[str]:
+        """Find parents' SRNs like the analyzer used to, with regexes over the serialized entity."""
+        whitelist_references = set()
+        serialized_entity = json.dumps(entity_node.data)
+        whitelist_ref_patterns = entity_node._whitelist_ref_patterns
+        for pattern in whitelist_ref_patterns.patterns if whitelist_ref_patterns else []:
+            whitelist_references.update(m.group("value") for m in pattern.finditer(serialized_entity))
+        references = EntityNode.SRN_REGEX.findall(json.dumps(entity_node.data, separators=(",", ":")))
+        return {
+            split_id(reference).srn for reference in references
+            if reference not in whitelist_references
+        } - {entity_node.srn}
+
     def process_entity(self, entity: EntityNode) -> str:
         if "surrogate-key" in entity.srn:
             return f"system_srn: {entity.srn}"
@@ -336,4 +398,368 @@ class TestManifestAnalyzer(object):
         for generation in manifest_analyzer.entity_generation_queue():
             result.append({e.data.get("id") for e in generation})
         assert result == expected_generations
-        
\ No newline at end of file
+        
+    @pytest.mark.parametrize(
+        "entities",
+        [
+            pytest.param(
+                [ManifestEntity(entity_data=e, manifest_path="")
+                 for e in json.load(open(SURROGATE_MANIFEST_WELLBORE))],
+                id="Surrogate Wellbore"
+            ),
+            pytest.param(
+                ManifestLinearizer().linearize_manifest(json.load(open(MANIFEST_WELLLOG_PATH))),
+                id="WellLog"
+            ),
+            pytest.param(
+                [ManifestEntity(**e) for e in json.load(open(TRAVERSAL_SEISMIC_TRACE_DATA_VALID_PATH))],
+                id="SeismicTraceData"
+            ),
+            pytest.param(
+                [ManifestEntity(entity_data=TEST_TRICKY_REFERENCES_DATA, manifest_path="")],
+                id="Tricky references"
+            ),
+        ]
+    )
+    @pytest.mark.parametrize("with_whitelist", [False, True])
+    def test_structural_references_extraction_matches_serialized_entity_search(
+        self,
+        whitelist_ref_patterns_str: str,
+        entities: List[ManifestEntity],
+        with_whitelist: bool
+    ):
+        for entity in entities:
+            entity_node = EntityNode(
+                split_id(entity.entity_data.get("id", "surrogate-key:1")),
+                entity,
+                whitelist_ref_patterns=whitelist_ref_patterns_str if with_whitelist else None
+            )
+            references = entity_node._extract_references()
+            assert sorted(references) == sorted(EntityNode.SRN_REGEX.findall(
+                json.dumps(entity_node.data, separators=(",", ":"))
+            ))
+            parent_srns = {p.srn for p in entity_node.get_parent_entity_ids()}
+            assert parent_srns == self.find_parent_srns_in_serialized_entity(entity_node)
+
+    @pytest.mark.parametrize(
+        "whitelist_ref_patterns_str,data,expected_whitelisted_srns",
+        [
+            pytest.param(
+                r"\"(?P<value>[^\"]*UOM:[^\"]*)\"",
+                {
+                    "id": "opendes:work-product-component--WellLog:1",
+                    "UnitOfMeasureIDs": ["opendes:reference-data--UOM:m:", "opendes:reference-data--UOM:ft:"],
+                    "Wellbore": "opendes:master-data--Wellbore:1:",
+                },
+                {"opendes:reference-data--UOM:m", "opendes:reference-data--UOM:ft"},
+                id="List items"
+            ),
+            pytest.param(
+                r"\"(?P<key>Units)\":\s?\[[^\]]*?\"(?P<value>[^\"]+)\"\]",
+                {
+                    "id": "opendes:work-product-component--WellLog:1",
+                    "Units": ["opendes:reference-data--UOM:m:", "opendes:reference-data--UOM:ft:"],
+                    "Wellbore": "opendes:master-data--Wellbore:1:",
+                },
+                {"opendes:reference-data--UOM:ft"},
+                id="Pattern spanning list"
+            ),
+            pytest.param(
+                r"\"(?P<key>Unit)\":\s?\"(?P<value>[^\"]+)\"" "\n"
+                r"\"(?P<value>[^\"]*--UOM:[^\"]*)\"",
+                {
+                    "id": "opendes:work-product-component--WellLog:1",
+                    "Unit": "opendes:reference-data--UOM:m:",
+                    "Curves": [{"Unit": "opendes:reference-data--UOM:ft:"}],
+                    "Wellbore": "opendes:master-data--Wellbore:1:",
+                },
+                {"opendes:reference-data--UOM:m", "opendes:reference-data--UOM:ft"},
+                id="Overlapping patterns"
+            ),
+        ]
+    )
+    def test_whitelist_matches_serialized_entity(self, whitelist_ref_patterns_str: str, data: dict,
+                                                 expected_whitelisted_srns: Set[str]):
+        entity_node = EntityNode(
+            split_id(data["id"]),
+            ManifestEntity(entity_data=data, manifest_path=""),
+            whitelist_ref_patterns=whitelist_ref_patterns_str
+        )
+        references = {split_id(reference).srn for reference in entity_node._extract_references()}
+        parent_srns = {p.srn for p in entity_node.get_parent_entity_ids()}
+        assert parent_srns == self.find_parent_srns_in_serialized_entity(entity_node)
+        assert references - parent_srns - {entity_node.srn} == expected_whitelisted_srns
+        assert "opendes:master-data--Wellbore:1" in parent_srns
+
+    @pytest.mark.parametrize(
+        "conf_path",
+        [
+            pytest.param(MANIFEST_WELLLOG_PATH, id="WellLog")
+        ]
+    )
+    def test_whitelist_ref_patterns_are_shared_by_nodes(self, whitelist_ref_patterns_str: str,
+                                                         conf_path: str):
+        with open(conf_path) as f:
+            conf = json.load(f)
+        manifest_analyzer = ManifestAnalyzer(
+            ManifestLinearizer().linearize_manifest(conf),
+            whitelist_ref_patterns=whitelist_ref_patterns_str
+        )
+        whitelist_ref_patterns = {
+            id(node._whitelist_ref_patterns) for node in manifest_analyzer.entity_id_node_table.values()
+        }
+        assert len(whitelist_ref_patterns) == 1
+
+    @pytest.mark.parametrize(
+        "extra_pattern,is_combined,separate_patterns_number",
+        [
+            pytest.param(None, True, 0, id="Combined"),
+            pytest.param(r"\"(?P<key>Unit)\":\s?\"(?P<value>(?P=key):.*?)\"", True, 0,
+                         id="Combined with backreference"),
+            pytest.param(r"\"(?P<key>(Unit))\":\s?\"(?P<value>\2:.*?)\"", True, 1,
+                         id="Numbered backreference"),
+            pytest.param(r"\"(?P<key>(?P<name>Unit))\":\s?\"(?P<value>.*?)\"" "\n"
+                         r"\"(?P<key>(?P<name>Other))\":\s?\"(?P<value>.*?)\"", False, 4,
+                         id="Not combinable"),
+        ]
+    )
+    def test_whitelist_ref_patterns_find_references(self, whitelist_ref_patterns_str: str,
+                                                    extra_pattern: str, is_combined: bool,
+                                                    separate_patterns_number: int):
+        if extra_pattern:
+            whitelist_ref_patterns_str = f"{whitelist_ref_patterns_str.strip()}\n{extra_pattern}"
+        whitelist_ref_patterns = WhitelistRefPatterns(whitelist_ref_patterns_str)
+        assert len(whitelist_ref_patterns.separate_patterns) == separate_patterns_number
+        fragments = [
+            '"CurveUnit": "opendes:reference-data--UnitOfMeasure:GAPI:"',
+            '"CurveUnit": "opendes:reference-data--UnitOfMeasure:V/V:"',
+            '"Unit": "Unit:opendes:reference-data--UnitOfMeasure:M:"',
+            '"Other": "opendes:reference-data--UnitOfMeasure:GAPI:"',
+        ]
+        assert (whitelist_ref_patterns.combined_pattern is not None) == is_combined
+        for fragment in fragments:
+            expected_references = {
+                match.group("value")
+                for pattern in whitelist_ref_patterns.patterns
+                for match in pattern.finditer(fragment)
+            }
+            assert whitelist_ref_patterns.find_references(fragment) == expected_references
+        if separate_patterns_number == 1:
+            assert whitelist_ref_patterns.find_references(fragments[2]) == {
+                "Unit:opendes:reference-data--UnitOfMeasure:M:"
+            }
+
+    @pytest.mark.parametrize(
+        "child,expected_child",
+        [
+            pytest.param(
+                {
+                    "id": "surrogate-key:child",
+                    "data": {
+                        "Parent": "surrogate-key:wpc",
+                        "Parents": [{"ID": "surrogate-key:wpc"}, "surrogate-key:wpc2"],
+                        "Description": "Derived from surrogate-key:wpc",
+                        "Well": "osdu:master-data--Well:1:",
+                        "Count": 1,
+                    }
+                },
+                {
+                    "id": "surrogate-key:child",
+                    "data": {
+                        "Parent": "osdu:work-product--WorkProduct:1:",
+                        "Parents": [{"ID": "osdu:work-product--WorkProduct:1:"},
+                                    "osdu:work-product--WorkProduct:2:"],
+                        "Description": "Derived from surrogate-key:wpc",
+                        "Well": "osdu:master-data--Well:1:2:",
+                        "Count": 1,
+                    }
+                },
+                id="Only references are replaced"
+            ),
+        ]
+    )
+    def test_replace_parents_surrogate_srns_replaces_only_references(self, child: dict,
+                                                                      expected_child: dict):
+        parents = [
+            {"id": "surrogate-key:wpc"},
+            {"id": "surrogate-key:wpc2"},
+            {"id": "osdu:master-data--Well:1"},
+        ]
+        system_srns = {
+            "surrogate-key:wpc": "osdu:work-product--WorkProduct:1",
+            "surrogate-key:wpc2": "osdu:work-product--WorkProduct:2",
+            "osdu:master-data--Well:1": "osdu:master-data--Well:1:2",
+        }
+        original_child = copy.deepcopy(child)
+        data = [ManifestEntity(entity_data=e, manifest_path="") for e in parents + [child]]
+        manifest_analyzer = ManifestAnalyzer(data)
+        for entity_node in manifest_analyzer.entity_id_node_table.values():
+            entity_node.system_srn = system_srns.get(entity_node.srn)
+
+        child_node = manifest_analyzer.entity_id_node_table[split_id(child["id"])]
+        child_node.replace_parents_surrogate_srns()
+
+        assert child_node.data == expected_child
+        assert child == original_child, "The original content must not be modified."
+
+    @pytest.mark.parametrize(
+        "reassign_content,is_searched_again",
+        [
+            pytest.param(False, False, id="Known reference paths"),
+            pytest.param(True, True, id="Content is reassigned"),
+        ]
+    )
+    def test_replace_parents_surrogate_srns_by_reference_paths(self, reassign_content: bool,
+                                                                is_searched_again: bool):
+        entities = [
+            {"id": "surrogate-key:wpc"},
+            {"id": "surrogate-key:child", "data": {"Parents": [{"ID": "surrogate-key:wpc"}]}},
+        ]
+        data = [ManifestEntity(entity_data=e, manifest_path="") for e in entities]
+        manifest_analyzer = ManifestAnalyzer(data)
+        manifest_analyzer.entity_id_node_table[split_id("surrogate-key:wpc")].system_srn = \
+            "osdu:work-product--WorkProduct:1"
+        child_node = manifest_analyzer.entity_id_node_table[split_id("surrogate-key:child")]
+        if reassign_content:
+            child_node.data = copy.deepcopy(child_node.data)
+
+        with patch.object(EntityNode, "_replace_references",
+                          wraps=EntityNode._replace_references) as mock_replace_references:
+            child_node.replace_parents_surrogate_srns()
+
+        assert mock_replace_references.called == is_searched_again
+        assert child_node.data["data"]["Parents"][0]["ID"] == "osdu:work-product--WorkProduct:1:"
+        assert entities[1]["data"]["Parents"][0]["ID"] == "surrogate-key:wpc"
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            pytest.param(TEST_FAKE_DATA, id="Fake data")
+        ]
+    )
+    def test_entity_scheduler_streams_ready_nodes(self, monkeypatch, data):
+        monkeypatch.setattr(EntityNode, "get_parent_entity_ids", self.mock_get_parent_srns)
+        manifest_analyzer = ManifestAnalyzer(data)
+        entity_scheduler = manifest_analyzer.entity_scheduler()
+        nodes = {
+            entity_id.raw_value: node for entity_id, node in manifest_analyzer.entity_id_node_table.items()
+        }
+
+        assert entity_scheduler.pop_ready() == [nodes["1"]]
+        assert not entity_scheduler.pop_ready()
+
+        entity_scheduler.mark_done(nodes["1"])
+        assert set(entity_scheduler.pop_ready()) == {nodes["2"], nodes["3"], nodes["7"]}, \
+            "External parent '6' must not hold '7' back."
+
+        entity_scheduler.mark_done(nodes["3"])
+        assert set(entity_scheduler.pop_ready()) == {nodes["5"]}
+        assert not entity_scheduler.is_done
+
+    @pytest.mark.parametrize(
+        "get_queue",
+        [
+            pytest.param(lambda analyzer: list(analyzer.entity_queue()), id="Queue"),
+            pytest.param(lambda analyzer: list(analyzer.entity_generation_queue()), id="Generations"),
+        ]
+    )
+    def test_circular_dependency(self, get_queue):
+        manifest = [
+            {"id": "surrogate-key:root"},
+            {"id": "surrogate-key:wpc1", "ref": "surrogate-key:wpc2", "root": "surrogate-key:root"},
+            {"id": "surrogate-key:wpc2", "ref": "surrogate-key:wpc1"},
+        ]
+        data = [ManifestEntity(entity_data=e, manifest_path="") for e in manifest]
+        manifest_analyzer = ManifestAnalyzer(data)
+        with pytest.raises(CircularDependencyError) as error:
+            get_queue(manifest_analyzer)
+        assert {node.srn for node in error.value.entity_nodes} == {
+            "surrogate-key:wpc1", "surrogate-key:wpc2"
+        }
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            pytest.param(TEST_FAKE_DATA, id="Fake data")
+        ]
+    )
+    def test_compact_graph(self, monkeypatch, data: dict):
+        monkeypatch.setattr(EntityNode, "get_parent_entity_ids", self.mock_get_parent_srns)
+        manifest_analyzer = ManifestAnalyzer(data, {"6"})
+        # Links are put into the compact graph directly, no per-node sets are created.
+        with patch.object(EntityNode, "add_parent", side_effect=AssertionError):
+            compact_manifest_analyzer = ManifestAnalyzer(data, {"6"}, compact_graph=True)
+        entity_graph = compact_manifest_analyzer.entity_graph
+        assert entity_graph._children_targets.typecode == entity_graph._parents_offsets.typecode == "I"
+
+        for srn in ("1", "3", "5", "7"):
+            entity_node = manifest_analyzer.entity_id_node_table[split_id(srn)]
+            compact_entity_node = compact_manifest_analyzer.entity_id_node_table[split_id(srn)]
+            assert {p.srn for p in compact_entity_node.parents} == {p.srn for p in entity_node.parents}
+            assert {c.srn for c in compact_entity_node.children} == {c.srn for c in entity_node.children}
+            assert compact_entity_node._children is None and compact_entity_node._parents is None
+            assert len(compact_entity_node.children) == len(entity_node.children)
+            assert all(child in compact_entity_node.children for child in compact_entity_node.children)
+        assert compact_manifest_analyzer.entity_graph.links_count == sum(
+            len(entity_node.children) for entity_node in manifest_analyzer.entity_id_node_table.values()
+        )
+        assert [
+            {e.srn for e in generation} for generation in compact_manifest_analyzer.entity_generation_queue()
+        ] == [
+            {e.srn for e in generation} for generation in manifest_analyzer.entity_generation_queue()
+        ]
+
+        compact_manifest_analyzer.add_invalid_node(
+            compact_manifest_analyzer.entity_id_node_table[split_id("3")])
+        assert {e.srn for e in compact_manifest_analyzer.invalid_entity_nodes} >= {"3", "5"}
+
+    def test_entity_node_without_links_has_no_sets(self):
+        entity_node = EntityNode(split_id("1"), ManifestEntity(entity_data={"id": "1"}, manifest_path=""))
+        assert entity_node.children is NO_ENTITY_NODES
+        assert entity_node.parents is NO_ENTITY_NODES
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            pytest.param(TEST_FAKE_DATA, id="Fake data")
+        ]
+    )
+    def test_valid_and_invalid_entities_are_indexed_on_invalidation(self, monkeypatch, data: dict):
+        monkeypatch.setattr(EntityNode, "get_parent_entity_ids", self.mock_get_parent_srns)
+        manifest_analyzer = ManifestAnalyzer(data, {"6"})
+        entity_nodes = list(manifest_analyzer.entity_id_node_table.values())
+
+        def assert_indexes_match_nodes():
+            # Invalid entities are reported in the entity table's order, not in invalidation one.
+            assert manifest_analyzer.invalid_entity_nodes == [e for e in entity_nodes if e.is_invalid]
+            assert manifest_analyzer.valid_entities_info == [e.entity_info for e in entity_nodes if not e.is_invalid]
+            assert manifest_analyzer.invalid_entities_info == \
+                [e.entity_info for e in manifest_analyzer.invalid_entity_nodes]
+
+        assert_indexes_match_nodes()
+        assert {e.srn for e in manifest_analyzer.invalid_entity_nodes} == {"7", "9"}
+
+        invalid_node = manifest_analyzer.entity_id_node_table[split_id("3")]
+        manifest_analyzer.add_invalid_node(invalid_node)
+        assert_indexes_match_nodes()
+        assert [e.srn for e in manifest_analyzer.invalid_entity_nodes] == ["3", "5", "7", "9"]
+
+        # Dependants of already invalid nodes are not traversed again.
+        with patch.object(EntityNode, "children", new_callable=PropertyMock) as children_mock:
+            manifest_analyzer.add_invalid_node(invalid_node)
+            children_mock.assert_not_called()
+        assert len(manifest_analyzer.invalid_entity_nodes) == 4
+
+    def test_connected_components(self):
+        data = [ManifestEntity(entity_data=e, manifest_path="") for e in TEST_ISLANDS_DATA]
+        manifest_analyzer = ManifestAnalyzer(data)
+        components = manifest_analyzer.connected_components()
+        # The shared external parent doesn't link the islands.
+        assert sorted(sorted(e.data["id"] for e in component) for component in components) == [
+            ["osdu:master-data--Well:b1", "osdu:master-data--Wellbore:b2"],
+            ["surrogate-key:a1", "surrogate-key:a2"],
+        ]
+        assert [
+            {e.data["id"] for e in generation}
+            for generation in manifest_analyzer.entity_generation_queue(components[0])
+        ] == [{"surrogate-key:a1"}, {"surrogate-key:a2"}]
@@ -54,13 +54,13 @@ class TestManifestProcessor:
         Make storage service request return mock response.
         """
 
-        def mockresponse(url, data=None, **kwargs):
+        def mockresponse(session, url, data=None, **kwargs):
             response = requests.Response()
             response.status_code = http.HTTPStatus.OK
             response._content = response_content
             return response
 
-        monkeypatch.setattr(requests, "put", mockresponse)
+        monkeypatch.setattr(requests.Session, "put", mockresponse)
 
     @staticmethod
     def monkeypatch_storage_response_error(monkeypatch, error_status: http.HTTPStatus):
@@ -68,13 +68,13 @@ class TestManifestProcessor:
         Make storage request return HTTPError response.
         """
 
-        def mockresponse(url, data=None, **kwargs):
+        def mockresponse(session, url, data=None, **kwargs):
             response = requests.Response()
             response.status_code = error_status
             response._content = b"{\"recordIds\": [\"test\"]}"
             return response
 
-        monkeypatch.setattr(requests, "put", mockresponse)
+        monkeypatch.setattr(requests.Session, "put", mockresponse)
 
     @pytest.fixture()
     def manifest_records(self, traversal_manifest_file: str) -> list:
@@ -0,0 +1,130 @@
+#  Copyright 2021 Google LLC
+#  Copyright 2021 EPAM Systems
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+
+import http
+import time
+
+import pytest
+import requests
+
+from mock_providers import get_test_credentials
+from file_paths import SCHEMA_WELLBORE_VALID_PATH
+from mock_responses import MockSchemaResponse
+from osdu_ingestion.libs.context import Context
+from osdu_ingestion.libs.refresh_token import BaseTokenRefresher
+from osdu_ingestion.libs.schema_cache import LocalDirectorySchemaCache, SchemaCacheEntry
+from osdu_ingestion.libs.validation.validate_schema import SchemaValidator
+
+TENANT = "opendes"
+SCHEMA_SERVICE = "http://schema"
+KIND = "opendes:osdu:Wellbore:0.3.0"
+
+
+class MockETagSchemaResponse(MockSchemaResponse):
+
+    def __init__(self, schema_path: str, status_code=http.HTTPStatus.OK, etag: str = None):
+        super().__init__(schema_path, status_code)
+        if etag:
+            self.headers["ETag"] = etag
+
+
+class TestLocalDirectorySchemaCache:
+
+    def test_get_absent_entry(self, tmp_path):
+        schema_cache = LocalDirectorySchemaCache(str(tmp_path))
+        assert schema_cache.get(TENANT, KIND) is None
+
+    def test_set_and_get_entry(self, tmp_path):
+        schema_cache = LocalDirectorySchemaCache(str(tmp_path))
+        entry = SchemaCacheEntry(schema={"type": "object"}, etag="\"1\"", fetched_at=time.time())
+        schema_cache.set(TENANT, KIND, entry)
+        assert schema_cache.get(TENANT, KIND) == entry
+        assert schema_cache.get("other-partition", KIND) is None
+
+    def test_broken_entry_is_ignored(self, tmp_path):
+        schema_cache = LocalDirectorySchemaCache(str(tmp_path))
+        schema_cache.set(TENANT, KIND, SchemaCacheEntry(schema={}))
+        with open(schema_cache._get_entry_path(TENANT, KIND), "w") as f:
+            f.write("{not json")
+        assert schema_cache.get(TENANT, KIND) is None
+
+    def test_unwritable_directory_is_ignored(self, tmp_path):
+        # The cache directory can't be created where a file is.
+        cache_path = tmp_path / "cache"
+        cache_path.write_text("")
+        schema_cache = LocalDirectorySchemaCache(str(cache_path))
+        schema_cache.set(TENANT, KIND, SchemaCacheEntry(schema={}))
+        assert schema_cache.get(TENANT, KIND) is None
+
+    @pytest.mark.parametrize(
+        "fetched_at_delta,is_fresh",
+        [
+            pytest.param(0, True, id="Fresh"),
+            pytest.param(120, False, id="Stale"),
+        ]
+    )
+    def test_entry_freshness(self, fetched_at_delta: int, is_fresh: bool):
+        entry = SchemaCacheEntry(schema={}, fetched_at=time.time() - fetched_at_delta)
+        assert entry.is_fresh(ttl=60) == is_fresh
+
+
+class TestSchemaValidatorWithCache:
+
+    @pytest.fixture
+    def requests_headers(self, monkeypatch):
+        """Patch Schema service and collect headers of all the requests sent to it."""
+        requests_headers = []
+
+        def mock_get(session, uri, headers, **kwargs):
+            requests_headers.append(dict(headers))
+            if headers.get("If-None-Match") == "\"1\"":
+                return MockETagSchemaResponse(SCHEMA_WELLBORE_VALID_PATH,
+                                              http.HTTPStatus.NOT_MODIFIED)
+            return MockETagSchemaResponse(SCHEMA_WELLBORE_VALID_PATH, etag="\"1\"")
+
+        monkeypatch.setattr(requests.Session, "get", mock_get)
+        return requests_headers
+
+    def create_schema_validator(self, schema_cache: LocalDirectorySchemaCache) -> SchemaValidator:
+        return SchemaValidator(
+            SCHEMA_SERVICE,
+            BaseTokenRefresher(get_test_credentials()),
+            Context(app_key="", data_partition_id=TENANT),
+            schema_cache=schema_cache
+        )
+
+    def test_warm_start_has_no_requests(self, tmp_path, requests_headers: list):
+        schema_cache = LocalDirectorySchemaCache(str(tmp_path))
+        schema = self.create_schema_validator(schema_cache).get_schema(KIND)
+        assert len(requests_headers) == 1
+
+        # New validator has empty in-memory cache, like in a new process.
+        cached_schema = self.create_schema_validator(schema_cache).get_schema(KIND)
+        assert len(requests_headers) == 1
+        assert cached_schema == schema
+        assert cached_schema["$id"] == f"{SCHEMA_SERVICE}/{KIND}"
+
+    def test_stale_entry_is_revalidated(self, tmp_path, requests_headers: list):
+        schema_cache = LocalDirectorySchemaCache(str(tmp_path), ttl=0)
+        schema = self.create_schema_validator(schema_cache).get_schema(KIND)
+        fetched_at = schema_cache.get(TENANT, KIND).fetched_at
+
+        revalidated_schema = self.create_schema_validator(schema_cache).get_schema(KIND)
+        assert len(requests_headers) == 2
+        assert "If-None-Match" not in requests_headers[0]
+        assert requests_headers[1]["If-None-Match"] == "\"1\""
+        assert revalidated_schema == schema
+        assert schema_cache.get(TENANT, KIND).fetched_at >= fetched_at
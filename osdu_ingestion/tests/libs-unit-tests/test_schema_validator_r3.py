@@ -14,11 +14,14 @@
 #  limitations under the License.
 
 
+import copy
 import http
 import requests
 import json
 import os
 import sys
+import threading
+from unittest.mock import patch
 
 import jsonschema
 
@@ -42,16 +45,20 @@ from file_paths import (
     MANIFEST_GENERIC_PATH,
     MANIFEST_NEW_GENERIC_SCHEMA_PATH,
     SCHEMA_WELLBORE_VALID_PATH,
+    TRAVERSAL_SEISMIC_TRACE_DATA_VALID_PATH,
     TRAVERSAL_WELLBORE_VALID_PATH,
 )
-from mock_responses import MockSchemaResponse
+from mock_responses import MockSchemaResponse, MockWorkflowResponse
 from osdu_ingestion.libs.context import Context
 from osdu_ingestion.libs.linearize_manifest import ManifestEntity
 from osdu_ingestion.libs.refresh_token import BaseTokenRefresher
 from osdu_ingestion.libs.exceptions import EmptyManifestError, NotOSDUSchemaFormatError
 import pytest
 
-from osdu_ingestion.libs.validation.validate_schema import SchemaValidator
+from osdu_ingestion.libs.validation import validate_schema
+from osdu_ingestion.libs.validation.validate_schema import (OSDURefResolver, RemoteSchemaStore,
+                                                            SchemaValidator,
+                                                            get_remote_schema_store)
 
 TENANT = "opendes"
 
@@ -68,10 +75,11 @@ class TestSchemaValidator:
         validator = SchemaValidator(
             "",
             BaseTokenRefresher(get_test_credentials()),
-            context
+            context,
+            remote_schema_store=RemoteSchemaStore()
         )
         if schema_file:
-            monkeypatch.setattr(requests, "get",
+            monkeypatch.setattr(requests.Session, "get",
                                 lambda *args, **kwargs: MockSchemaResponse(schema_file))
         return validator
 
@@ -190,7 +198,7 @@ class TestSchemaValidator:
                               traversal_manifest_file: str,
                               schema_file: str,
                               kind: str):
-        monkeypatch.setattr(requests,
+        monkeypatch.setattr(requests.Session,
                             "get",
                             lambda *args, **kwargs: MockSchemaResponse("{}",
                                                                        http.HTTPStatus.INTERNAL_SERVER_ERROR))
@@ -222,6 +230,39 @@ class TestSchemaValidator:
         monkeypatch.setattr(schema_validator, "get_schema", mock_get_schema)
         schema_validator.validate_common_schema(manifest_content)
 
+    @pytest.mark.parametrize(
+        "manifest_file,schema_file",
+        [
+            pytest.param(
+                MANIFEST_GENERIC_PATH,
+                MANIFEST_NEW_GENERIC_SCHEMA_PATH,
+                id="Valid generic manifest"),
+        ]
+    )
+    def test_generic_manifest_validator_is_built_once(
+        self,
+        monkeypatch,
+        schema_validator: SchemaValidator,
+        manifest_file: str,
+        schema_file
+    ):
+        with open(schema_file) as f:
+            schema = json.load(f)
+        original_schema = copy.deepcopy(schema)
+        with open(manifest_file) as f:
+            manifest_content = json.load(f)
+        monkeypatch.setattr(schema_validator, "get_schema", lambda kind: schema)
+
+        with patch.object(
+            schema_validator, "_create_validator", wraps=schema_validator._create_validator
+        ) as mock_create_validator, patch("copy.deepcopy") as mock_deepcopy:
+            for _ in range(3):
+                schema_validator.validate_common_schema(manifest_content)
+
+        assert mock_create_validator.call_count == 1
+        assert not mock_deepcopy.called
+        assert schema == original_schema, "The fetched schema must not be modified."
+
     @pytest.mark.parametrize(
         "manifest_file,schema_file",
         [
@@ -401,3 +442,437 @@ class TestSchemaValidator:
         with pytest.raises(jsonschema.exceptions.ValidationError) as err:
             schema_validator._validate_against_schema(schema, data)
         assert "is not a \'date-time\'" in str(err)
+
+    @pytest.mark.parametrize(
+        "traversal_manifest_file_path,schema_file",
+        [
+            pytest.param(
+                TRAVERSAL_SEISMIC_TRACE_DATA_VALID_PATH,
+                None,
+                id="Valid WorkProduct manifest"
+            )
+        ]
+    )
+    def test_validator_is_built_once_per_kind(
+        self,
+        monkeypatch,
+        schema_validator: SchemaValidator,
+        traversal_manifest_file_path: str,
+        schema_file
+    ):
+        monkeypatch.setattr(schema_validator, "get_schema", self.mock_get_schema)
+        with open(traversal_manifest_file_path) as f:
+            manifest_file = json.load(f)
+        manifest_records = [ManifestEntity(**e) for e in manifest_file] * 5
+        expected_kinds_number = len({r.entity_data["kind"] for r in manifest_records})
+
+        with patch.object(
+            schema_validator, "_create_validator", wraps=schema_validator._create_validator
+        ) as mock_create_validator:
+            validated_records, _ = schema_validator.validate_manifest(manifest_records)
+            schema_validator.validate_manifest(manifest_records)
+
+        assert len(validated_records) == len(manifest_records)
+        assert mock_create_validator.call_count == expected_kinds_number
+
+    @pytest.mark.parametrize(
+        "schema_file, manifest_file",
+        [
+            pytest.param(
+                SCHEMA_WPC_DATA_QUALITY,
+                SURROGATE_WPC_DATA_QUALITY,
+                id="Extend with surrogate keys. WPC"
+            ),
+        ]
+    )
+    def test_surrogate_keys_patterns_are_added_once_per_kind(
+        self,
+        monkeypatch,
+        surrogate_fields_paths,
+        schema_file: str,
+        manifest_file: str
+    ):
+        with open(schema_file) as f:
+            schema = json.load(f)
+        with open(manifest_file) as f:
+            entity = json.load(f)
+        original_schema = copy.deepcopy(schema)
+
+        context = Context(app_key="", data_partition_id="osdu")
+        validator = SchemaValidator(
+            "",
+            BaseTokenRefresher(get_test_credentials()),
+            context,
+            surrogate_key_fields_paths=surrogate_fields_paths,
+            data_types_with_surrogate_ids=("dataset", "work-product", "work-product-component")
+        )
+        monkeypatch.setattr(validator, "get_schema", lambda kind: schema)
+        manifest_records = [ManifestEntity(entity, "Data.WorkProductComponents")] * 10
+
+        with patch.object(
+            validator,
+            "_add_surrogate_keys_to_patterns",
+            wraps=validator._add_surrogate_keys_to_patterns
+        ) as mock_add_surrogate_keys:
+            validated_records, skipped_entities = validator.validate_manifest(manifest_records)
+
+        assert len(validated_records) == len(manifest_records) and not skipped_entities
+        assert mock_add_surrogate_keys.call_count == 1
+        assert schema == original_schema, "The fetched schema must not be modified."
+
+    @pytest.mark.parametrize(
+        "traversal_manifest_file_path,schema_file",
+        [
+            pytest.param(
+                TRAVERSAL_SEISMIC_TRACE_DATA_VALID_PATH,
+                None,
+                id="Valid WorkProduct manifest"
+            )
+        ]
+    )
+    def test_prefetch_manifest_schemas(
+        self,
+        monkeypatch,
+        schema_validator: SchemaValidator,
+        traversal_manifest_file_path: str,
+        schema_file
+    ):
+        requested_uris = []
+
+        def mock_get_schema_request(uri: str):
+            requested_uris.append((uri, threading.current_thread()))
+            if "AbstractSpatialLocation" in uri:
+                return {"type": "object"}
+            return self.mock_get_schema(uri)
+
+        monkeypatch.setattr(schema_validator, "get_schema_request", mock_get_schema_request)
+        with open(traversal_manifest_file_path) as f:
+            manifest_file = json.load(f)
+        manifest_records = [ManifestEntity(**e) for e in manifest_file]
+        kinds = {r.entity_data["kind"] for r in manifest_records}
+
+        schema_validator.prefetch_manifest_schemas(manifest_records)
+
+        assert set(schema_validator._kind_validators) == kinds
+        assert "opendes:osdu:AbstractSpatialLocation:1.0.0" in schema_validator.remote_schema_store
+        assert len(requested_uris) == len(kinds) + 1
+        assert all(thread is not threading.main_thread() for _, thread in requested_uris)
+
+        requested_uris.clear()
+        validated_records, _ = schema_validator.validate_manifest(manifest_records)
+        assert len(validated_records) == len(manifest_records)
+        assert not requested_uris, "Schemas must be taken from the cache after prefetching."
+
+    @pytest.mark.parametrize(
+        "schema_file",
+        [
+            pytest.param(None, id="Shared remote reference")
+        ]
+    )
+    def test_remote_refs_are_shared_between_resolvers(
+        self,
+        monkeypatch,
+        schema_validator: SchemaValidator,
+        schema_file
+    ):
+        requested_uris = []
+
+        def mock_get(session, uri, *args, **kwargs):
+            requested_uris.append(uri)
+            return MockWorkflowResponse({"type": "string"})
+
+        monkeypatch.setattr(requests.Session, "get", mock_get)
+        schema = {
+            "$id": "https://schema.osdu.opengroup.org/json/Test.1.0.0.json",
+            "type": "object",
+            "properties": {"Shared": {"$ref": "osdu:wks:AbstractShared:1.0.0"}}
+        }
+
+        # Each validation without kind builds a new resolver.
+        for _ in range(3):
+            schema_validator._validate_against_schema(schema, {"Shared": "value"})
+        with pytest.raises(jsonschema.exceptions.ValidationError):
+            schema_validator._validate_against_schema(schema, {"Shared": 1})
+
+        assert requested_uris == ["/osdu:wks:AbstractShared:1.0.0"]
+        assert schema_validator.remote_schema_store.misses == 1
+        assert schema_validator.remote_schema_store.hits == 3
+
+    @pytest.mark.parametrize(
+        "schema_file",
+        [
+            pytest.param(None, id="Stale remote reference")
+        ]
+    )
+    def test_stale_remote_refs_are_fetched_again(
+        self,
+        monkeypatch,
+        schema_validator: SchemaValidator,
+        schema_file
+    ):
+        requested_uris = []
+
+        def mock_get(session, uri, *args, **kwargs):
+            requested_uris.append(uri)
+            return MockWorkflowResponse({"type": "string"})
+
+        monkeypatch.setattr(requests.Session, "get", mock_get)
+        schema_validator.remote_schema_store = RemoteSchemaStore(ttl=0)
+        schema = {
+            "$id": "https://schema.osdu.opengroup.org/json/Test.1.0.0.json",
+            "type": "object",
+            "properties": {"Shared": {"$ref": "osdu:wks:AbstractShared:1.0.0"}}
+        }
+
+        for _ in range(2):
+            schema_validator._validate_against_schema(schema, {"Shared": "value"})
+
+        assert requested_uris == ["/osdu:wks:AbstractShared:1.0.0"] * 2
+        assert "osdu:wks:AbstractShared:1.0.0" not in schema_validator.remote_schema_store
+
+    def test_remote_schema_stores_are_scoped_by_schema_service(self):
+        context = Context(app_key="", data_partition_id="")
+        token_refresher = BaseTokenRefresher(get_test_credentials())
+        first_validator = SchemaValidator("https://first/api/schema-service/v1/schema",
+                                          token_refresher, context)
+        second_validator = SchemaValidator("https://second/api/schema-service/v1/schema",
+                                           token_refresher, context)
+        assert first_validator.remote_schema_store is not second_validator.remote_schema_store
+        assert first_validator.remote_schema_store is get_remote_schema_store(
+            "https://first/api/schema-service/v1/schema"
+        )
+
+    def test_resolve_fragment_keeps_shared_documents(self):
+        document = {
+            "definitions": {
+                "osdu:wks:AbstractShared:1.0.0": {"$id": "osdu:wks:AbstractShared:1.0.0", "type": "string"}
+            }
+        }
+        resolver = OSDURefResolver("", base_uri="", referrer={},
+                                   remote_schema_store=RemoteSchemaStore())
+
+        fragment = resolver.resolve_fragment(document, "/definitions/osdu:wks:AbstractShared:1.0.0")
+
+        assert fragment == {"type": "string"}
+        assert document["definitions"]["osdu:wks:AbstractShared:1.0.0"]["$id"] == \
+               "osdu:wks:AbstractShared:1.0.0"
+
+    @pytest.mark.parametrize(
+        "traversal_manifest_file_path,schema_file",
+        [
+            pytest.param(
+                TRAVERSAL_SEISMIC_TRACE_DATA_VALID_PATH,
+                None,
+                id="Valid WorkProduct manifest"
+            )
+        ]
+    )
+    def test_parallel_validation_matches_serial(
+        self,
+        monkeypatch,
+        schema_validator: SchemaValidator,
+        traversal_manifest_file_path: str,
+        schema_file
+    ):
+        def mock_get_schema_request(uri: str):
+            if "AbstractSpatialLocation" in uri:
+                return {"type": "object"}
+            return self.mock_get_schema(uri)
+
+        monkeypatch.setattr(schema_validator, "get_schema_request", mock_get_schema_request)
+        with open(traversal_manifest_file_path) as f:
+            manifest_file = json.load(f)
+        invalid_entity = copy.deepcopy(manifest_file[0]["entity_data"])
+        invalid_entity["id"] = 1
+        entities = [e["entity_data"] for e in manifest_file] * 3 + [invalid_entity, "not a dict", {}]
+        manifest_records = [ManifestEntity(entity_data=e, manifest_path="") for e in entities]
+
+        serial_result = schema_validator.validate_manifest(manifest_records)
+        schema_validator.validation_workers = 2
+        parallel_result = schema_validator.validate_manifest(manifest_records)
+
+        assert parallel_result == serial_result
+        assert len(parallel_result[0]) == len(manifest_file) * 3
+        assert len(parallel_result[1]) == 3
+
+    @pytest.mark.parametrize(
+        "traversal_manifest_file_path,schema_file,failed_requests",
+        [
+            pytest.param(
+                TRAVERSAL_SEISMIC_TRACE_DATA_VALID_PATH,
+                None,
+                1,
+                id="Reference fetched before dispatching"
+            ),
+            pytest.param(
+                TRAVERSAL_SEISMIC_TRACE_DATA_VALID_PATH,
+                None,
+                2,
+                id="Kind validated in main process"
+            ),
+        ]
+    )
+    def test_parallel_validation_with_ref_missing_from_store(
+        self,
+        monkeypatch,
+        schema_validator: SchemaValidator,
+        traversal_manifest_file_path: str,
+        schema_file,
+        failed_requests: int
+    ):
+        ref_requests = []
+
+        def mock_get_schema_request(uri: str):
+            if "AbstractSpatialLocation" in uri:
+                ref_requests.append(uri)
+                if len(ref_requests) <= failed_requests:
+                    raise requests.exceptions.ConnectionError("Transient error")
+                return {"type": "object"}
+            return self.mock_get_schema(uri)
+
+        monkeypatch.setattr(schema_validator, "get_schema_request", mock_get_schema_request)
+        monkeypatch.setattr(schema_validator, "resolver_handlers", {"opendes": mock_get_schema_request})
+        with open(traversal_manifest_file_path) as f:
+            manifest_file = json.load(f)
+        # The WorkProduct's SpatialArea refers to AbstractSpatialLocation.
+        manifest_file[0]["entity_data"]["data"]["SpatialArea"] = {}
+        invalid_entity = copy.deepcopy(manifest_file[0]["entity_data"])
+        invalid_entity["id"] = 1
+        entities = [e["entity_data"] for e in manifest_file] * 3 + [invalid_entity]
+        manifest_records = [ManifestEntity(entity_data=e, manifest_path="") for e in entities]
+        schema_validator.validation_workers = 2
+
+        validated_records, skipped_entities = schema_validator.validate_manifest(manifest_records)
+
+        assert len(validated_records) == len(manifest_file) * 3
+        assert len(skipped_entities) == 1
+        assert len(ref_requests) == failed_requests + 1
+        assert "opendes:osdu:AbstractSpatialLocation:1.0.0" in schema_validator.remote_schema_store
+
+    @pytest.mark.parametrize(
+        "traversal_manifest_file_path,schema_file,error_mode,validation_workers",
+        [
+            pytest.param(
+                TRAVERSAL_SEISMIC_TRACE_DATA_VALID_PATH,
+                None,
+                "full",
+                None,
+                id="Full error mode"
+            ),
+            pytest.param(
+                TRAVERSAL_SEISMIC_TRACE_DATA_VALID_PATH,
+                None,
+                "first_error",
+                None,
+                id="First error mode"
+            ),
+            pytest.param(
+                TRAVERSAL_SEISMIC_TRACE_DATA_VALID_PATH,
+                None,
+                "full",
+                2,
+                id="Full error mode in workers"
+            ),
+            pytest.param(
+                TRAVERSAL_SEISMIC_TRACE_DATA_VALID_PATH,
+                None,
+                "first_error",
+                2,
+                id="First error mode in workers"
+            ),
+        ]
+    )
+    def test_rejected_entities_logging_is_capped(
+        self,
+        monkeypatch,
+        caplog,
+        schema_validator: SchemaValidator,
+        traversal_manifest_file_path: str,
+        schema_file,
+        error_mode: str,
+        validation_workers: int
+    ):
+        monkeypatch.setattr(schema_validator, "get_schema", self.mock_get_schema)
+        schema_validator.error_mode = error_mode
+        schema_validator.max_logged_errors = 2
+        schema_validator.validation_workers = validation_workers
+        with open(traversal_manifest_file_path) as f:
+            manifest_file = json.load(f)
+        invalid_entity = copy.deepcopy(manifest_file[0]["entity_data"])
+        invalid_entity["id"] = 1
+        manifest_records = [ManifestEntity(entity_data=invalid_entity, manifest_path="")] * 5
+
+        validated_records, skipped_entities = schema_validator.validate_manifest(manifest_records)
+
+        assert not validated_records
+        assert len(skipped_entities) == 5
+        logged_errors = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Error: ")]
+        assert len(logged_errors) == 2
+        assert any("are not logged" in r.getMessage() for r in caplog.records)
+        if error_mode == "first_error":
+            assert logged_errors[0] == "Error: id: 1 is not of type 'string'"
+        else:
+            assert logged_errors[0].startswith("Error: 1 is not of type 'string'\n\nFailed validating")
+
+        if validation_workers:
+            # Workers leave errors to be described by the main process.
+            monkeypatch.setattr(validate_schema, "_validation_worker_state", {})
+            kind = invalid_entity["kind"]
+            validate_schema._init_validation_worker(
+                "", {kind: schema_validator.get_prepared_schema(kind)}, {}, error_mode
+            )
+            error = validate_schema._validate_entity_in_worker((kind, invalid_entity))
+            assert isinstance(error, jsonschema.exceptions.ValidationError)
+
+        # The count of logged errors is reset for each manifest.
+        caplog.clear()
+        schema_validator.ensure_manifest_validity({"MasterData": [invalid_entity] * 3})
+        logged_errors = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Error: ")]
+        assert len(logged_errors) == 2
+
+    @pytest.mark.parametrize(
+        "traversal_manifest_file_path,schema_file",
+        [
+            pytest.param(
+                TRAVERSAL_SEISMIC_TRACE_DATA_VALID_PATH,
+                None,
+                id="Valid WorkProduct manifest"
+            )
+        ]
+    )
+    def test_get_schemas_dependency_graph(
+        self,
+        monkeypatch,
+        schema_validator: SchemaValidator,
+        traversal_manifest_file_path: str,
+        schema_file
+    ):
+        requested_uris = []
+
+        def mock_get_schema_request(uri: str):
+            requested_uris.append(uri)
+            if "AbstractSpatialLocation" in uri:
+                return {"properties": {"Geo": {"$ref": "opendes:osdu:AbstractGeo:1.0.0#/geo"}}}
+            if "AbstractGeo" in uri:
+                return {"geo": {"type": "object"}}
+            return self.mock_get_schema(uri)
+
+        monkeypatch.setattr(schema_validator, "get_schema_request", mock_get_schema_request)
+        with open(traversal_manifest_file_path) as f:
+            manifest_file = json.load(f)
+        kinds = {e["entity_data"]["kind"] for e in manifest_file}
+
+        dependency_graph = schema_validator.get_schemas_dependency_graph(kinds)
+
+        assert dependency_graph["opendes:osdu:WorkProduct:1.0.0"] == {
+            "opendes:osdu:AbstractSpatialLocation:1.0.0"
+        }
+        assert dependency_graph["opendes:osdu:AbstractSpatialLocation:1.0.0"] == {
+            "opendes:osdu:AbstractGeo:1.0.0"
+        }
+        assert dependency_graph["opendes:osdu:AbstractGeo:1.0.0"] == set()
+        assert set(dependency_graph) == kinds | {
+            "opendes:osdu:AbstractSpatialLocation:1.0.0", "opendes:osdu:AbstractGeo:1.0.0"
+        }
+        assert "opendes:osdu:AbstractGeo:1.0.0" in schema_validator.remote_schema_store
+        assert len(requested_uris) == len(dependency_graph)
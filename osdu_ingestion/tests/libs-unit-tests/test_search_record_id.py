@@ -46,7 +46,7 @@ class TestManifestProcessor:
         def mock_response(*args, **kwargs):
             return MockSearchResponse(body_path, status_code, total_count)
 
-        monkeypatch.setattr(requests, "post", mock_response)
+        monkeypatch.setattr(requests.Session, "post", mock_response)
         # turn of retry for unit tests
         SearchId.search_files.retry.stop = stop_after_attempt(1)
 
@@ -74,7 +74,7 @@ class TestManifestProcessor:
                 return MockSearchResponseForRecords([], status_code=status_code, total_count=total_count, cursor=cursor)
 
 
-        monkeypatch.setattr(requests, "post", mock_response)
+        monkeypatch.setattr(requests.Session, "post", mock_response)
         # turn of retry for unit tests
         SearchId.search_files.retry.stop = stop_after_attempt(1)
 
@@ -14,14 +14,22 @@
 #  limitations under the License.
 
 
+import copy
 import json
+import threading
+import time
 import uuid
+from typing import Set
 from unittest.mock import patch
 
 import mock_providers
 import pytest
+import requests
+import tenacity
 from file_paths import MANIFEST_BATCH_SAVE_PATH, SURROGATE_MANIFEST_WELLBORE
+from osdu_ingestion.libs.context import Context
 from osdu_ingestion.libs.manifest_analyzer import ManifestAnalyzer
+from osdu_ingestion.libs.process_manifest_r3 import ManifestProcessor
 from osdu_ingestion.libs.processors.single_manifest_processor import SingleManifestProcessor
 from osdu_ingestion.libs.refresh_token import BaseTokenRefresher
 from osdu_ingestion.libs.linearize_manifest import ManifestEntity, ManifestLinearizer
@@ -31,6 +39,23 @@ from osdu_ingestion.libs.utils import is_surrogate_key, split_into_batches
 
 TENANT = "opendes"
 
+TEST_ISLANDS_DATA = [
+    {
+        "id": "surrogate-key:a1"
+    },
+    {
+        "id": "surrogate-key:a2",
+        "parent": "surrogate-key:a1"
+    },
+    {
+        "id": "osdu:master-data--Well:b1"
+    },
+    {
+        "id": "osdu:master-data--Wellbore:b2",
+        "parent": "osdu:master-data--Well:b1:"
+    },
+]
+
 
 class MockManifestProcessor:
 
@@ -135,17 +160,15 @@ class TestSingleManifestProcessor:
         manifest_analyzer = ManifestAnalyzer(linearized_manifest)
 
         for generation in manifest_analyzer.entity_generation_queue():
-            surrogate_key_number = len([e for e in generation if is_surrogate_key(e.data.get("id", ""))])
-
-            not_surrogate_key = [e for e in generation if not is_surrogate_key(e.data.get("id", ""))]
-            expected_batch_number = len(list(split_into_batches(not_surrogate_key, batch_size)))
+            # Surrogate-key entities are saved by batches too.
+            expected_batch_number = len(list(split_into_batches(generation, batch_size)))
 
             with patch.object(SingleManifestProcessor, "_process_entity_nodes_batch", return_value="none") as mock_process_nodes_batch, \
                 patch.object(SingleManifestProcessor, "_process_single_entity_node", return_value="none") as mock_process_single_node:
                 single_manifest_processor._save_entities_generation(manifest_analyzer, generation)
 
                 assert mock_process_nodes_batch.call_count == expected_batch_number
-                assert mock_process_single_node.call_count == surrogate_key_number
+                assert mock_process_single_node.call_count == 0
 
     @pytest.mark.parametrize(
         "file_path",
@@ -259,4 +282,575 @@ class TestSingleManifestProcessor:
                 single_manifest_processor.manifest_processor, "process_manifest_records", side_effect=Exception('a')
             ):
                 with pytest.raises(ProcessRecordError):
-                    single_manifest_processor._process_single_entity_node(manifest_analyzer, entity)
\ No newline at end of file
+                    single_manifest_processor._process_single_entity_node(manifest_analyzer, entity)
+
+    @pytest.mark.parametrize(
+        "file_path,batch_size",
+        [
+            pytest.param(
+                MANIFEST_BATCH_SAVE_PATH,
+                10
+            ),
+            pytest.param(
+                MANIFEST_BATCH_SAVE_PATH,
+                500
+            )
+        ]
+    )
+    def test_save_records_by_dataflow(
+        self,
+        single_manifest_processor: SingleManifestProcessor,
+        file_path: str,
+        batch_size: int
+    ):
+        with open(file_path) as f:
+            manifest = json.load(f)
+        single_manifest_processor.batch_save_enabled = True
+        single_manifest_processor.save_records_batch_size = batch_size
+
+        def save_manifest(dataflow_save_enabled: bool):
+            saved_batches = []
+
+            def mock_process_manifest_records(records):
+                saved_batches.append([r.entity_data.get("id") for r in records])
+                return MockManifestProcessor().process_manifest_records(records)
+
+            single_manifest_processor.dataflow_save_enabled = dataflow_save_enabled
+            with patch.object(single_manifest_processor.manifest_processor, "process_manifest_records",
+                              side_effect=mock_process_manifest_records):
+                record_ids, skipped_ids = single_manifest_processor.process_manifest(
+                    copy.deepcopy(manifest), False)
+            return record_ids, skipped_ids, saved_batches
+
+        record_ids, skipped_ids, saved_batches = save_manifest(dataflow_save_enabled=True)
+        generations_record_ids, _, generations_saved_batches = save_manifest(dataflow_save_enabled=False)
+
+        assert not skipped_ids
+        # Storage mock generates random ids for entities without ids.
+        assert len(record_ids) == len(generations_record_ids)
+        assert len(saved_batches) <= len(generations_saved_batches)
+        assert all(len(batch) <= batch_size for batch in saved_batches)
+
+        saved_ids = [_id for batch in saved_batches for _id in batch]
+        manifest_analyzer = ManifestAnalyzer(ManifestLinearizer().linearize_manifest(manifest))
+        for entity_node in manifest_analyzer.entity_id_node_table.values():
+            for parent in entity_node.parents:
+                if not parent.is_external_srn and parent.data.get("id") and entity_node.data.get("id"):
+                    assert saved_ids.index(parent.data["id"]) < saved_ids.index(entity_node.data["id"])
+
+    @pytest.mark.parametrize(
+        "batch_save_enabled,dataflow_save_enabled",
+        [
+            pytest.param(False, False, id="By one"),
+            pytest.param(True, False, id="By generations"),
+            pytest.param(True, True, id="By dataflow"),
+        ]
+    )
+    def test_process_components_in_parallel(
+        self,
+        single_manifest_processor: SingleManifestProcessor,
+        batch_save_enabled: bool,
+        dataflow_save_enabled: bool
+    ):
+        def mock_process_manifest_records(records):
+            if any(r.entity_data["id"] == "osdu:master-data--Well:b1" for r in records):
+                raise Exception("Dummy exception")
+            return MockManifestProcessor().process_manifest_records(records)
+
+        single_manifest_processor.batch_save_enabled = batch_save_enabled
+        single_manifest_processor.dataflow_save_enabled = dataflow_save_enabled
+        single_manifest_processor.save_records_batch_size = 1
+        single_manifest_processor.component_workers = 2
+        data = [ManifestEntity(entity_data=e, manifest_path="") for e in copy.deepcopy(TEST_ISLANDS_DATA)]
+        manifest_analyzer = ManifestAnalyzer(data)
+        process_records = {
+            (False, False): single_manifest_processor._process_records_by_one,
+            (True, False): single_manifest_processor._process_records_by_batches,
+            (True, True): single_manifest_processor._process_records_by_dataflow,
+        }[(batch_save_enabled, dataflow_save_enabled)]
+
+        with patch.object(single_manifest_processor.manifest_processor, "process_manifest_records",
+                          side_effect=mock_process_manifest_records):
+            record_ids, skipped_ids = single_manifest_processor._process_components_in_parallel(
+                manifest_analyzer, process_records)
+
+        # The failed island doesn't affect the other one.
+        assert record_ids == ["surrogate-key:a1", "surrogate-key:a2"]
+        assert [e["id"] for e in skipped_ids] == ["osdu:master-data--Well:b1"]
+        assert {e.srn for e in manifest_analyzer.invalid_entity_nodes} == {
+            "osdu:master-data--Well:b1", "osdu:master-data--Wellbore:b2"
+        }
+
+    @pytest.mark.parametrize(
+        "batch_save_enabled,dataflow_save_enabled,bisect_failed_batches,max_in_flight_saves",
+        [
+            pytest.param(False, False, False, None, id="By one"),
+            pytest.param(False, False, False, 2, id="By one concurrently"),
+            pytest.param(True, False, False, None, id="By generations"),
+            pytest.param(True, False, True, None, id="By generations with bisection"),
+            pytest.param(True, True, False, None, id="By dataflow"),
+            pytest.param(True, True, True, 2, id="By dataflow with bisection concurrently"),
+        ]
+    )
+    def test_invalid_entities_refer_to_saved_parents(
+        self,
+        single_manifest_processor: SingleManifestProcessor,
+        batch_save_enabled: bool,
+        dataflow_save_enabled: bool,
+        bisect_failed_batches: bool,
+        max_in_flight_saves: int
+    ):
+        data = [
+            {"id": "surrogate-key:saved"},
+            {"id": "osdu:master-data--Well:failed"},
+            {"id": "osdu:master-data--Wellbore:child",
+             "parents": ["surrogate-key:saved", "osdu:master-data--Well:failed:"]},
+            {"id": "osdu:master-data--Wellbore:grandchild", "parent": "osdu:master-data--Wellbore:child:"},
+        ]
+
+        def mock_process_manifest_records(records):
+            if any(r.entity_data["id"] == "osdu:master-data--Well:failed" for r in records):
+                raise requests.HTTPError("Dummy exception", response=bad_request_response)
+            return [
+                f"{TENANT}:master-data--Well:saved" if is_surrogate_key(r.entity_data["id"])
+                else r.entity_data["id"] for r in records
+            ]
+
+        bad_request_response = requests.Response()
+        bad_request_response.status_code = 400
+        single_manifest_processor.batch_save_enabled = batch_save_enabled
+        single_manifest_processor.dataflow_save_enabled = dataflow_save_enabled
+        single_manifest_processor.bisect_failed_batches = bisect_failed_batches
+        single_manifest_processor.max_in_flight_saves = max_in_flight_saves
+        # Without bisection the saved entity must not share a batch with the failed one.
+        single_manifest_processor.save_records_batch_size = 2 if bisect_failed_batches else 1
+        manifest_analyzer = ManifestAnalyzer(
+            [ManifestEntity(entity_data=e, manifest_path="") for e in copy.deepcopy(data)]
+        )
+        process_records = {
+            (False, False): single_manifest_processor._process_records_by_one,
+            (True, False): single_manifest_processor._process_records_by_batches,
+            (True, True): single_manifest_processor._process_records_by_dataflow,
+        }[(batch_save_enabled, dataflow_save_enabled)]
+
+        with patch.object(single_manifest_processor.manifest_processor, "process_manifest_records",
+                          side_effect=mock_process_manifest_records):
+            record_ids, skipped_ids = process_records(manifest_analyzer)
+
+        assert record_ids == [f"{TENANT}:master-data--Well:saved"]
+        assert [e["id"] for e in skipped_ids] == ["osdu:master-data--Well:failed"]
+        assert [e.data for e in manifest_analyzer.invalid_entity_nodes] == [
+            data[1],
+            {"id": "osdu:master-data--Wellbore:child",
+             "parents": [f"{TENANT}:master-data--Well:saved:", "osdu:master-data--Well:failed:"]},
+            data[3],
+        ]
+
+    @pytest.mark.parametrize(
+        "dataflow_save_enabled",
+        [
+            pytest.param(False, id="By generations"),
+            pytest.param(True, id="By dataflow"),
+        ]
+    )
+    def test_save_surrogate_key_records_by_batches(
+        self,
+        single_manifest_processor: SingleManifestProcessor,
+        dataflow_save_enabled: bool
+    ):
+        with open(MANIFEST_BATCH_SAVE_PATH) as f:
+            manifest = json.load(f)
+        single_manifest_processor.payload_context = Context(app_key="", data_partition_id=TENANT)
+        single_manifest_processor.batch_save_enabled = True
+        single_manifest_processor.dataflow_save_enabled = dataflow_save_enabled
+        single_manifest_processor.preassign_surrogate_key_ids = True
+        manifest_entities = ManifestLinearizer().linearize_manifest(manifest)
+        manifest_ids = {e.entity_data.get("id") for e in manifest_entities}
+        saved_records = []
+
+        def mock_process_manifest_records(records):
+            saved_records.append([copy.deepcopy(r.entity_data) for r in records])
+            return MockManifestProcessor().process_manifest_records(records)
+
+        with patch.object(single_manifest_processor.manifest_processor, "process_manifest_records",
+                          side_effect=mock_process_manifest_records):
+            record_ids, skipped_ids = single_manifest_processor.process_manifest(manifest, False)
+
+        assert len(record_ids) == len(manifest_entities) and not skipped_ids
+        # Surrogate-key entities are not saved on their own, the manifest has 3 generations.
+        assert len(saved_records) == 3
+        serialized_records = json.dumps(saved_records)
+        assert "surrogate-key:" not in serialized_records
+        # WorkProduct has no id at all, Storage service generates it.
+        generated_ids = set(record_ids) - manifest_ids
+        assert len([
+            record_id for record_id in generated_ids
+            if record_id.startswith(f"{TENANT}:work-product-component--WellLog:")
+        ]) == 1
+
+    @pytest.mark.parametrize(
+        "preassign_surrogate_key_ids,expected_stored_records",
+        [
+            pytest.param(False, 4, id="Storage service generates ids"),
+            pytest.param(True, 2, id="Preassigned ids"),
+        ]
+    )
+    def test_retried_batch_save_with_preassigned_ids_is_idempotent(
+        self,
+        monkeypatch,
+        single_manifest_processor: SingleManifestProcessor,
+        preassign_surrogate_key_ids: bool,
+        expected_stored_records: int
+    ):
+        manifest = {
+            "Data": {
+                "WorkProductComponents": [
+                    {"id": f"surrogate-key:wpc-{i}", "kind": "osdu:wks:work-product-component--WellLog:1.0.0"}
+                    for i in range(2)
+                ]
+            }
+        }
+        context = Context(app_key="", data_partition_id=TENANT)
+        session = requests.Session()
+        stored_records = {}
+        put_requests = []
+
+        def mock_put(url, data, **kwargs):
+            put_requests.append(data)
+            record_ids = [record.get("id") or f"{TENANT}:generated:{uuid.uuid4()}" for record in json.loads(data)]
+            stored_records.update(dict.fromkeys(record_ids))
+            if len(put_requests) == 1:
+                # The records are stored, but the response is lost, so the request is retried.
+                raise requests.Timeout("Dummy timeout")
+            response = requests.Response()
+            response.status_code = 200
+            response._content = json.dumps({"recordIds": record_ids}).encode()
+            return response
+
+        monkeypatch.setattr(session, "put", mock_put)
+        monkeypatch.setattr(ManifestProcessor.save_record_to_storage.retry, "wait", tenacity.wait_none())
+        single_manifest_processor.manifest_processor = ManifestProcessor(
+            storage_url="",
+            file_handler=None,
+            source_file_checker=None,
+            token_refresher=BaseTokenRefresher(mock_providers.get_test_credentials()),
+            context=context,
+            session=session
+        )
+        single_manifest_processor.payload_context = context
+        single_manifest_processor.batch_save_enabled = True
+        single_manifest_processor.preassign_surrogate_key_ids = preassign_surrogate_key_ids
+
+        record_ids, skipped_ids = single_manifest_processor.process_manifest(manifest, False)
+
+        assert len(record_ids) == 2 and not skipped_ids
+        assert len(put_requests) == 2
+        # Without preassigned ids Storage service creates new records on each retry.
+        assert len(stored_records) == expected_stored_records
+
+    def test_batch_response_ids_are_mapped_to_entities(self, single_manifest_processor: SingleManifestProcessor):
+        with open(MANIFEST_BATCH_SAVE_PATH) as f:
+            manifest = json.load(f)
+        single_manifest_processor.batch_save_enabled = True
+        saved_records = []
+
+        def mock_process_manifest_records(records):
+            saved_records.append([copy.deepcopy(r.entity_data) for r in records])
+            return [
+                f"{TENANT}:generated:{uuid.uuid4()}" if is_surrogate_key(r.entity_data.get("id", ""))
+                else r.entity_data.get("id", str(uuid.uuid4()))
+                for r in records
+            ]
+
+        with patch.object(single_manifest_processor.manifest_processor, "process_manifest_records",
+                          side_effect=mock_process_manifest_records):
+            record_ids, skipped_ids = single_manifest_processor.process_manifest(manifest, False)
+
+        assert not skipped_ids
+        assert len(saved_records) == 3
+        generated_ids = [record_id for record_id in record_ids if record_id.startswith(f"{TENANT}:generated:")]
+        assert len(generated_ids) == 1
+        # WorkProduct refers to the id Storage service gave to its surrogate-key WPC.
+        serialized_children = json.dumps(saved_records[2])
+        assert "surrogate-key:" not in serialized_children
+        assert f"{generated_ids[0]}:" in serialized_children
+
+    def test_batch_response_ids_mismatch(self, single_manifest_processor: SingleManifestProcessor):
+        with open(MANIFEST_BATCH_SAVE_PATH) as f:
+            manifest = json.load(f)
+        manifest_analyzer = ManifestAnalyzer(ManifestLinearizer().linearize_manifest(manifest))
+        generation = list(next(manifest_analyzer.entity_generation_queue()))
+        with patch.object(single_manifest_processor.manifest_processor, "process_manifest_records",
+                          return_value=["opendes:master-data--Well:1"]):
+            with pytest.raises(ProcessRecordBatchError):
+                single_manifest_processor._process_entity_nodes_batch(manifest_analyzer, generation)
+        assert all(entity_node.is_invalid for entity_node in generation)
+
+    @pytest.mark.parametrize(
+        "batch_size,invalid_ids,status_code,expected_skipped_ids,expected_max_requests",
+        [
+            pytest.param(16, set(), 400, set(), 1, id="No invalid entities"),
+            pytest.param(16, {"5"}, 400, {"5"}, 1 + 2 * 4, id="One invalid entity"),
+            pytest.param(16, {"0", "15"}, 400, {"0", "15"}, 1 + 2 * 2 * 4, id="Two invalid entities"),
+            pytest.param(1, {"0"}, 400, {"0"}, 1, id="Batch of one entity"),
+            pytest.param(16, {"5"}, 500, {str(i) for i in range(16)}, 1, id="Server error"),
+            pytest.param(16, {"5"}, 403, {str(i) for i in range(16)}, 1, id="Not content client error"),
+            pytest.param(16, {"5"}, None, {str(i) for i in range(16)}, 1, id="Connection error"),
+        ]
+    )
+    def test_process_entity_nodes_batch_by_bisection(
+        self,
+        single_manifest_processor: SingleManifestProcessor,
+        batch_size: int,
+        invalid_ids: Set[str],
+        status_code: int,
+        expected_skipped_ids: Set[str],
+        expected_max_requests: int
+    ):
+        data = [
+            ManifestEntity(entity_data={"id": f"osdu:master-data--Well:{i}"}, manifest_path="")
+            for i in range(batch_size)
+        ]
+        manifest_analyzer = ManifestAnalyzer(data)
+        entity_node_batch = list(manifest_analyzer.entity_id_node_table.values())
+        invalid_ids = {f"osdu:master-data--Well:{i}" for i in invalid_ids}
+        expected_skipped_ids = {f"osdu:master-data--Well:{i}" for i in expected_skipped_ids}
+        requests_sent = []
+
+        def mock_process_manifest_records(records):
+            requests_sent.append(records)
+            if any(r.entity_data["id"] in invalid_ids for r in records):
+                if status_code is None:
+                    raise requests.ConnectionError("Dummy exception")
+                response = requests.Response()
+                response.status_code = status_code
+                raise requests.HTTPError("Dummy exception", response=response)
+            return [r.entity_data["id"] for r in records]
+
+        with patch.object(single_manifest_processor.manifest_processor, "process_manifest_records",
+                          side_effect=mock_process_manifest_records):
+            record_ids, skipped_ids = single_manifest_processor._process_entity_nodes_batch_by_bisection(
+                manifest_analyzer, entity_node_batch)
+
+        assert record_ids == [e.data["id"] for e in entity_node_batch if e.data["id"] not in expected_skipped_ids]
+        assert {e["id"] for e in skipped_ids} == expected_skipped_ids
+        assert {e.srn for e in manifest_analyzer.invalid_entity_nodes} == expected_skipped_ids
+        assert len(requests_sent) <= expected_max_requests
+
+    @staticmethod
+    def create_storage_manifest_processor(session: requests.Session) -> ManifestProcessor:
+        return ManifestProcessor(
+            storage_url="",
+            file_handler=None,
+            source_file_checker=None,
+            token_refresher=BaseTokenRefresher(mock_providers.get_test_credentials()),
+            context=Context(app_key="", data_partition_id=TENANT),
+            session=session
+        )
+
+    @pytest.mark.parametrize(
+        "status_code,expected_skipped_ids,expected_max_requests",
+        [
+            pytest.param(400, {"5"}, 1 + 2 * 4, id="Rejected records"),
+            pytest.param(500, {str(i) for i in range(16)}, 1, id="Server error"),
+        ]
+    )
+    def test_bisection_of_batch_rejected_by_storage_response(
+        self,
+        monkeypatch,
+        single_manifest_processor: SingleManifestProcessor,
+        status_code: int,
+        expected_skipped_ids: Set[str],
+        expected_max_requests: int
+    ):
+        data = [
+            ManifestEntity(entity_data={"id": f"osdu:master-data--Well:{i}"}, manifest_path="")
+            for i in range(16)
+        ]
+        manifest_analyzer = ManifestAnalyzer(data)
+        expected_skipped_ids = {f"osdu:master-data--Well:{i}" for i in expected_skipped_ids}
+        session = requests.Session()
+        put_requests = []
+
+        def mock_put(url, data, **kwargs):
+            record_ids = [record["id"] for record in json.loads(data)]
+            put_requests.append(record_ids)
+            response = requests.Response()
+            if "osdu:master-data--Well:5" in record_ids:
+                response.status_code = status_code
+                response._content = b"{\"message\": \"Invalid record\"}"
+            else:
+                response.status_code = 201
+                response._content = json.dumps({"recordIds": record_ids}).encode()
+            return response
+
+        monkeypatch.setattr(session, "put", mock_put)
+        single_manifest_processor.manifest_processor = self.create_storage_manifest_processor(session)
+        single_manifest_processor.save_records_batch_size = 16
+        single_manifest_processor.bisect_failed_batches = True
+
+        record_ids, skipped_ids = single_manifest_processor._process_records_by_batches(manifest_analyzer)
+
+        assert set(record_ids) == {e.entity_data["id"] for e in data} - expected_skipped_ids
+        assert {e["id"] for e in skipped_ids} == expected_skipped_ids
+        assert len(put_requests) <= expected_max_requests
+
+    @pytest.mark.parametrize(
+        "status_code,expected_requests",
+        [
+            pytest.param(400, 1, id="Rejected records"),
+            pytest.param(500, 3, id="Server error"),
+        ]
+    )
+    def test_rejected_records_are_not_retried(
+        self,
+        monkeypatch,
+        status_code: int,
+        expected_requests: int
+    ):
+        session = requests.Session()
+        put_requests = []
+
+        def mock_put(url, data, **kwargs):
+            put_requests.append(data)
+            response = requests.Response()
+            response.status_code = status_code
+            raise requests.HTTPError("Dummy exception", response=response)
+
+        monkeypatch.setattr(session, "put", mock_put)
+        monkeypatch.setattr(ManifestProcessor.save_record_to_storage.retry, "wait", tenacity.wait_none())
+        manifest_processor = self.create_storage_manifest_processor(session)
+
+        with pytest.raises(requests.HTTPError):
+            manifest_processor.process_manifest_records(
+                [ManifestEntity(entity_data={"id": "osdu:master-data--Well:1"}, manifest_path="")]
+            )
+
+        assert len(put_requests) == expected_requests
+
+    @pytest.fixture
+    def in_flight_requests(self, single_manifest_processor: SingleManifestProcessor):
+        """Patch Storage service with slow saves and count max number of requests in flight."""
+        lock = threading.Lock()
+        in_flight_requests = {"current": 0, "max": 0}
+
+        def mock_process_manifest_records(records):
+            with lock:
+                in_flight_requests["current"] += 1
+                in_flight_requests["max"] = max(in_flight_requests["max"], in_flight_requests["current"])
+            # Earlier records are saved slower, so responses come in reverse order.
+            time.sleep(0.05 / (1 + int(records[0].entity_data["id"].rsplit("-", 1)[-1])))
+            with lock:
+                in_flight_requests["current"] -= 1
+            return [r.entity_data["id"] for r in records]
+
+        with patch.object(single_manifest_processor.manifest_processor, "process_manifest_records",
+                          side_effect=mock_process_manifest_records):
+            yield in_flight_requests
+
+    @pytest.mark.parametrize("max_in_flight_saves", [1, 3])
+    def test_save_batches_concurrently(
+        self,
+        single_manifest_processor: SingleManifestProcessor,
+        in_flight_requests: dict,
+        max_in_flight_saves: int
+    ):
+        data = [
+            ManifestEntity(entity_data={"id": f"osdu:master-data--Well:well-{i}"}, manifest_path="")
+            for i in range(40)
+        ]
+        manifest_analyzer = ManifestAnalyzer(data)
+        single_manifest_processor.save_records_batch_size = 5
+        single_manifest_processor.max_in_flight_saves = max_in_flight_saves
+
+        record_ids, skipped_ids = single_manifest_processor._save_entities_generation(
+            manifest_analyzer, list(manifest_analyzer.entity_id_node_table.values()))
+
+        assert record_ids == [e.entity_data["id"] for e in data] and not skipped_ids
+        assert in_flight_requests["max"] <= max_in_flight_saves
+        assert (in_flight_requests["max"] > 1) == (max_in_flight_saves > 1)
+
+    def test_save_single_entities_concurrently(
+        self,
+        single_manifest_processor: SingleManifestProcessor,
+        in_flight_requests: dict
+    ):
+        data = [
+            ManifestEntity(entity_data={"id": f"osdu:master-data--Well:well-{i}"}, manifest_path="")
+            for i in range(10)
+        ] + [
+            ManifestEntity(entity_data={"id": "osdu:master-data--Wellbore:wellbore-0",
+                                        "parent": "osdu:master-data--Well:well-0:"}, manifest_path="")
+        ]
+        single_manifest_processor.max_in_flight_saves = 4
+
+        record_ids, skipped_ids = single_manifest_processor._process_records_by_one(ManifestAnalyzer(data))
+
+        # Responses come in reverse order, but ids are in the order of sequential saving.
+        assert record_ids == [e.entity_data["id"] for e in data] and not skipped_ids
+        assert 1 < in_flight_requests["max"] <= 4
+        single_manifest_processor.max_in_flight_saves = None
+        assert single_manifest_processor._process_records_by_one(ManifestAnalyzer(data)) == (record_ids, [])
+
+    def test_slow_save_does_not_hold_back_ready_batches(self, single_manifest_processor: SingleManifestProcessor):
+        data = [
+            ManifestEntity(entity_data={"id": "osdu:master-data--Well:slow"}, manifest_path=""),
+            ManifestEntity(entity_data={"id": "osdu:master-data--Well:fast"}, manifest_path=""),
+            ManifestEntity(entity_data={"id": "osdu:master-data--Wellbore:slow-child",
+                                        "parent": "osdu:master-data--Well:slow:"}, manifest_path=""),
+            ManifestEntity(entity_data={"id": "osdu:master-data--Wellbore:child",
+                                        "parent": "osdu:master-data--Well:fast:"}, manifest_path=""),
+        ]
+        manifest_analyzer = ManifestAnalyzer(data)
+        single_manifest_processor.save_records_batch_size = 1
+        single_manifest_processor.max_in_flight_saves = 2
+        child_saved = threading.Event()
+        completed_ids = []
+
+        def mock_process_manifest_records(records):
+            record_id = records[0].entity_data["id"]
+            if record_id.endswith(":slow"):
+                # The slow save lasts until the child of the fast one is saved.
+                child_saved.wait(timeout=1)
+            completed_ids.append(record_id)
+            if record_id.endswith(":child"):
+                child_saved.set()
+            return [record_id]
+
+        with patch.object(single_manifest_processor.manifest_processor, "process_manifest_records",
+                          side_effect=mock_process_manifest_records):
+            record_ids, skipped_ids = single_manifest_processor._process_records_by_dataflow(manifest_analyzer)
+
+        assert completed_ids == [
+            "osdu:master-data--Well:fast", "osdu:master-data--Wellbore:child",
+            "osdu:master-data--Well:slow", "osdu:master-data--Wellbore:slow-child"
+        ]
+        # Ids are in the order of the entity queue, not in the order saves complete in.
+        assert record_ids == [e.entity_data["id"] for e in data] and not skipped_ids
+
+    def test_dataflow_batches_are_filled_before_sending(self, single_manifest_processor: SingleManifestProcessor):
+        wells = [
+            ManifestEntity(entity_data={"id": f"osdu:master-data--Well:well-{i}"}, manifest_path="")
+            for i in range(6)
+        ]
+        wellbores = [
+            ManifestEntity(entity_data={"id": f"osdu:master-data--Wellbore:wellbore-{i}",
+                                        "parent": f"osdu:master-data--Well:well-{i}:"}, manifest_path="")
+            for i in range(6)
+        ]
+        manifest_analyzer = ManifestAnalyzer(wells + wellbores)
+        single_manifest_processor.save_records_batch_size = 4
+        single_manifest_processor.max_in_flight_saves = 2
+        saved_batches = []
+
+        def mock_process_manifest_records(records):
+            saved_batches.append([r.entity_data["id"] for r in records])
+            return [r.entity_data["id"] for r in records]
+
+        with patch.object(single_manifest_processor.manifest_processor, "process_manifest_records",
+                          side_effect=mock_process_manifest_records):
+            record_ids, skipped_ids = single_manifest_processor._process_records_by_dataflow(manifest_analyzer)
+
+        # The 2 wells left from the first batch wait for wellbores instead of being sent alone.
+        assert [len(batch) for batch in saved_batches] == [4, 4, 4]
+        assert record_ids == [e.entity_data["id"] for e in wells + wellbores] and not skipped_ids
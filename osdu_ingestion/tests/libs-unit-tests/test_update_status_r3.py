@@ -64,6 +64,6 @@ class TestUpdateStatus:
     )
     def test_update_workflow_status(self, monkeypatch, status_updater: UpdateStatus, conf_path: str,
                                     status: str):
-        monkeypatch.setattr(requests, "post", lambda *args, **kwargs: MockWorkflowResponse())
-        monkeypatch.setattr(requests, "put", lambda *args, **kwargs: MockWorkflowResponse())
+        monkeypatch.setattr(requests.Session, "post", lambda *args, **kwargs: MockWorkflowResponse())
+        monkeypatch.setattr(requests.Session, "put", lambda *args, **kwargs: MockWorkflowResponse())
         status_updater.update_workflow_status()
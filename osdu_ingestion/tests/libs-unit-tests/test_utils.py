@@ -13,14 +13,16 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import copy
 import os
+import pickle
 import sys
 from typing import Iterable, List
 import pytest
 
 
 
-from osdu_ingestion.libs.utils import split_id, remove_trailing_colon, split_into_batches, is_surrogate_key
+from osdu_ingestion.libs.utils import EntityId, generate_entity_id, split_id, remove_trailing_colon, split_into_batches, is_surrogate_key
 
 
 class TestUtil:
@@ -39,7 +41,15 @@ class TestUtil:
             pytest.param(
                 "namespace:reference-data--UnitQuantity:1:1",
                 ("namespace:reference-data--UnitQuantity:1", "1"),
-                id="With version")
+                id="With version"),
+            pytest.param(
+                "1",
+                ("1", ""),
+                id="With no namespace"),
+            pytest.param(
+                "surrogate-key:wpc-1",
+                ("surrogate-key:wpc-1", ""),
+                id="Surrogate key")
         ]
     )
     def test_split_id_version(self, _id, expected_id_version):
@@ -119,3 +129,79 @@ class TestUtil:
     )
     def test_is_surrogate_key(self, _id: str, result: bool):
         assert is_surrogate_key(_id) == result
+
+    @pytest.mark.parametrize(
+        "first_id,second_id,are_equal",
+        [
+            pytest.param(
+                "namespace:reference-data--UnitQuantity:m:",
+                "namespace:reference-data--UnitQuantity:m",
+                True,
+                id="Trailing colon"),
+            pytest.param(
+                "namespace:reference-data--UnitQuantity:1:1",
+                "namespace:reference-data--UnitQuantity:1:2",
+                False,
+                id="Different versions"),
+            pytest.param(
+                "namespace:reference-data--UnitQuantity:1:1",
+                "namespace:reference-data--UnitQuantity:1",
+                False,
+                id="Versioned and bare"),
+        ]
+    )
+    def test_entity_id_equality(self, first_id: str, second_id: str, are_equal: bool):
+        first_entity_id, second_entity_id = split_id(first_id), split_id(second_id)
+        assert (first_entity_id == second_entity_id) == are_equal
+        assert (second_entity_id in {first_entity_id}) == are_equal
+
+    def test_entity_id_hash_collision(self):
+        first_entity_id = EntityId("namespace:master-data--Well:1", "namespace:master-data--Well:1")
+        second_entity_id = EntityId("namespace:master-data--Well:2", "namespace:master-data--Well:2")
+        object.__setattr__(second_entity_id, "_hash", first_entity_id._hash)
+        assert first_entity_id != second_entity_id
+        assert len({first_entity_id, second_entity_id}) == 2
+
+    def test_split_id_is_interned(self):
+        assert split_id("namespace:master-data--Well:1:") is split_id("namespace:master-data--Well:1:")
+
+    @pytest.mark.parametrize("attribute", ["id", "raw_value", "version", "srn", "_hash"])
+    def test_entity_id_is_immutable(self, attribute: str):
+        entity_id = split_id("namespace:master-data--Well:1:")
+        with pytest.raises(AttributeError):
+            setattr(entity_id, attribute, "namespace:master-data--Well:2")
+        with pytest.raises(AttributeError):
+            delattr(entity_id, attribute)
+        assert split_id("namespace:master-data--Well:1:").srn == "namespace:master-data--Well:1"
+        assert copy.deepcopy(entity_id) == entity_id
+        assert pickle.loads(pickle.dumps(entity_id)) == entity_id
+
+    @pytest.mark.parametrize(
+        "kind,expected_id_prefix",
+        [
+            pytest.param(
+                "osdu:wks:work-product-component--WellLog:1.0.0",
+                "opendes:work-product-component--WellLog:",
+                id="WPC"),
+            pytest.param(
+                "osdu:wks:dataset--File.Generic:1.0.0",
+                "opendes:dataset--File.Generic:",
+                id="Dataset"),
+        ]
+    )
+    def test_generate_entity_id(self, kind: str, expected_id_prefix: str):
+        entity_id = generate_entity_id("opendes", kind)
+        assert entity_id.startswith(expected_id_prefix)
+        assert split_id(entity_id).id == entity_id
+        assert generate_entity_id("opendes", kind) != entity_id
+
+    @pytest.mark.parametrize(
+        "kind",
+        [
+            pytest.param("", id="Empty"),
+            pytest.param("osdu:wks::1.0.0", id="No entity type"),
+        ]
+    )
+    def test_generate_entity_id_malformed_kind(self, kind: str):
+        with pytest.raises(ValueError):
+            generate_entity_id("opendes", kind)
@@ -54,7 +54,6 @@ setuptools.setup(
         "jsonschema==3.2.0",
         "pyyaml==5.4.1",
         "strict-rfc3339==0.7",
-        "toposort==1.6",
         "osdu-api>=0.11.0",
         "dataclasses==0.8;python_version<'3.7'"
     ],